@@ -336,6 +336,43 @@ document.addEventListener("DOMContentLoaded", () => {
   }
 });
 
+// 일자별 여행 계획 스트림(SSE) 읽기
+// EventSource는 Authorization 헤더를 보낼 수 없어 fetch 스트림으로 직접 파싱합니다.
+async function streamPlan(requestId, onEvent) {
+  const response = await fetch(
+    `http://localhost:8080/api/plan/stream/${requestId}`,
+    {
+      headers: { Authorization: `Bearer ${localStorage.getItem("Token")}` },
+    }
+  );
+  if (!response.ok || !response.body) return;
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // 이벤트는 빈 줄("\n\n")로 구분됨
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      let data = "";
+      raw.split("\n").forEach((line) => {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        if (line.startsWith("data: ")) data += line.slice(6);
+      });
+      onEvent(event, data ? JSON.parse(data) : null);
+    }
+  }
+}
+
 const generatePlanButton = document.getElementById("btn-generate");
 generatePlanButton.addEventListener("click", async () => {
   // 사용자가 입력한 모든 여행 정보를 객체로 수집
@@ -366,8 +403,28 @@ generatePlanButton.addEventListener("click", async () => {
 
     if (response.ok) {
       const planResult = await response.json();
-      console.log("여행 계획 생성 성공:", planResult);
-      // 사용자 화면에 계획을 표시하는 로직 추가
+      console.log("여행 계획 생성 시작:", planResult);
+      // 사용자 화면에 계획을 표시하는 로직 추가 (일자별로 도착하는 대로)
+      // 이미 받은 일자가 서버 후처리(검증/예산 맞춤)로 바뀌면 같은 day 번호로 day_update가 오므로 교체합니다.
+      const planDays = [];
+      const putDay = (day) => {
+        const index = planDays.findIndex((d) => d.day === day.day);
+        if (index === -1) planDays.push(day);
+        else planDays[index] = day;
+        planDays.sort((a, b) => a.day - b.day);
+      };
+      streamPlan(planResult.requestId, (event, data) => {
+        if (event === "day") {
+          putDay(data);
+          console.log(`${data.day}일차 계획 도착:`, data);
+        }
+        if (event === "day_update") {
+          putDay(data);
+          console.log(`${data.day}일차 계획 변경:`, data);
+        }
+        if (event === "done") console.log("여행 계획 생성 완료:", data);
+        if (event === "failed") alert(`계획 생성 실패: ${data.error}`);
+      });
     } else {
       const errorData = await response.json();
       alert(`계획 생성 실패: ${errorData.message}`);
@@ -115,6 +115,10 @@ const placeSchema = new mongoose.Schema(
       default: "KTO",
     },
     lastSyncedAt: Date,
+    // 동기화 대상 필드(이름/카테고리/주소/좌표)의 해시. 바뀐 장소만 갱신하는 데 사용 (syncPlaces.mjs)
+    contentHash: String,
+    // 이 장소를 마지막으로 동기화한 CSV 파일 이름. 일부 파일만 동기화할 때 비활성화 범위를 정하는 데 사용
+    sourceFile: String,
   },
   {
     timestamps: true,
@@ -0,0 +1,56 @@
+import mongoose from "mongoose";
+
+// 여행 계획 생성 작업 (POST /api/plan/generate → GET /api/plan/status/:id)
+const planJobSchema = new mongoose.Schema(
+  {
+    // 클라이언트에 돌려주는 작업 ID (UUID)
+    jobId: {
+      type: String,
+      required: true,
+      unique: true,
+      index: true,
+    },
+    owner: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: "User",
+      required: true,
+      index: true,
+    },
+
+    // 작업 상태
+    status: {
+      type: String,
+      enum: ["queued", "running", "done", "failed"],
+      default: "queued",
+      index: true,
+    },
+
+    // 플래너에 전달한 사용자 입력 (원본)
+    input: {
+      type: mongoose.Schema.Types.Mixed,
+      required: true,
+    },
+
+    // 결과: 생성된 Trip 또는 실패 사유
+    trip: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: "Trip",
+      default: null,
+    },
+    error: String,
+
+    // 계획 캐시 사용 여부 ("hit" | "miss" | "off")
+    cache: String,
+
+    startedAt: Date,
+    finishedAt: Date,
+  },
+  {
+    timestamps: true,
+  }
+);
+
+// 완료된 작업 기록은 7일 후 자동 삭제
+planJobSchema.index({ createdAt: 1 }, { expireAfterSeconds: 7 * 24 * 60 * 60 });
+
+export default mongoose.model("PlanJob", planJobSchema);
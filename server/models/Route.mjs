@@ -0,0 +1,51 @@
+import mongoose from "mongoose";
+
+// 이동 구간 하나 (플래너 JSON travel_plan[].route.legs[]의 from/to/distance_km/minutes/mode)
+const legSchema = new mongoose.Schema(
+  {
+    from: { type: String, required: true },
+    to: { type: String, required: true },
+    distanceKm: { type: Number, default: 0, min: 0 },
+    durationMinutes: { type: Number, default: 0, min: 0 },
+    mode: { type: String, enum: ["walk", "transit", "stay"], default: "transit" },
+  },
+  { _id: false }
+);
+
+// 일자별 이동 경로 (전날 숙소 → 장소들 → 그날 숙소 순서)
+const dailyRouteSchema = new mongoose.Schema(
+  {
+    day: { type: Number, required: true, min: 1 },
+    legs: [legSchema],
+    totalDistanceKm: { type: Number, default: 0, min: 0 },
+    totalDurationMinutes: { type: Number, default: 0, min: 0 },
+  },
+  { _id: false }
+);
+
+// 여행 계획(Trip) 하나의 전체 이동 경로. Trip.activeRoute가 가리킵니다.
+const routeSchema = new mongoose.Schema(
+  {
+    tripId: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: "Trip",
+      required: true,
+      index: true,
+    },
+    owner: {
+      type: mongoose.Schema.Types.ObjectId,
+      ref: "User",
+      required: true,
+    },
+    // 거리/시간을 계산한 경로 제공자 (예: "haversine")
+    provider: { type: String, default: "haversine" },
+    days: [dailyRouteSchema],
+    totalDistanceKm: { type: Number, default: 0, min: 0 },
+    totalDurationMinutes: { type: Number, default: 0, min: 0 },
+  },
+  {
+    timestamps: true,
+  }
+);
+
+export default mongoose.model("Route", routeSchema);
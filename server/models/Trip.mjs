@@ -1,5 +1,28 @@
 import mongoose from "mongoose";
 
+// 생성된 일정의 장소/숙소 항목 (플래너 JSON의 name/description/coords/estimated_cost/closest_subway/subway_walk_m)
+const planItemSchema = new mongoose.Schema(
+  {
+    name: { type: String, required: true },
+    description: String,
+    coords: String, // "위도, 경도" 또는 "없음"
+    estimatedCost: { type: Number, default: 0, min: 0 },
+    closestSubway: String,
+    subwayWalkMeters: Number, // 가장 가까운 역까지 도보 거리 (m)
+  },
+  { _id: false }
+);
+
+// 일자별 일정
+const dailyPlanSchema = new mongoose.Schema(
+  {
+    day: { type: Number, required: true, min: 1 },
+    places: [planItemSchema],
+    accommodation: planItemSchema,
+  },
+  { _id: false }
+);
+
 const tripSchema = new mongoose.Schema(
   {
     // 기본 정보
@@ -28,10 +51,11 @@ const tripSchema = new mongoose.Schema(
       type: Date,
       required: [true, "종료 날짜를 입력해주세요"],
       validate: {
+        // 당일치기(시작일 = 종료일) 여행도 허용
         validator: function (value) {
-          return value > this.startDate;
+          return value >= this.startDate;
         },
-        message: "종료 날짜는 시작 날짜 이후여야 합니다.",
+        message: "종료 날짜는 시작 날짜와 같거나 이후여야 합니다.",
       },
     },
     duration: {
@@ -112,6 +136,9 @@ const tripSchema = new mongoose.Schema(
       },
     ],
 
+    // 플래너가 생성한 일자별 일정
+    itinerary: [dailyPlanSchema],
+
     // 템플릿 사용 여부
     template: {
       type: mongoose.Schema.Types.ObjectId,
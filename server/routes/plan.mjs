@@ -1,58 +1,155 @@
 import express from "express";
-import { spawn } from "node:child_process";
-import path from "path";
-import { fileURLToPath } from "url";
 import { protect } from "../middleware/auth.mjs";
+import plannerPool from "../services/plannerPool.mjs";
+import {
+  enqueuePlanJob,
+  getPlanJob,
+  getJobStream,
+  failStaleJobs,
+  getQueueStats,
+  QueueFullError,
+} from "../services/planJobs.mjs";
 
 const router = express.Router();
 
-const __filename = fileURLToPath(import.meta.url);
-const __dirname = path.dirname(__filename);
+// 🔥 상주 플래너 워커 시작 (장소 데이터는 워커당 한 번만 로드)
+plannerPool.start();
 
-// 🔥 프로젝트 루트
-const PROJECT_ROOT = path.resolve(__dirname, "../../");
+// 이전 실행에서 끝나지 못한 작업 정리
+failStaleJobs().catch((err) =>
+  console.error("❌ 중단된 작업 정리 실패:", err.message)
+);
 
+// POST /api/plan/generate - 여행 계획 생성 작업 등록 (결과는 /status/:id 로 조회)
 router.post("/generate", protect, async (req, res) => {
   try {
     const userId = req.user._id;
     const userInput = { ...req.body, userId };
 
-    const requestId = Date.now();
-
-    const pythonScriptPath = path.join(
-      PROJECT_ROOT,
-      "server/services/TripPlan_base_api.py"
-    );
-
-    console.log("▶ Python Script:", pythonScriptPath);
     console.log("▶ User Input:", userInput);
 
-    // ✅ Python 실행 (인자 ❌)
-    const py = spawn("python", [pythonScriptPath], {
-      env: { PYTHONIOENCODING: "utf-8" },
+    const job = await enqueuePlanJob(userId, userInput);
+
+    res.status(202).json({
+      message: "여행 계획 생성 시작",
+      requestId: job.jobId,
+      status: job.status,
+      statusUrl: `/api/plan/status/${job.jobId}`,
     });
+  } catch (err) {
+    if (err instanceof QueueFullError) {
+      res.set("Retry-After", "30");
+      return res.status(429).json({ message: err.message });
+    }
+    console.error(err);
+    res.status(500).json({ message: "실행 실패" });
+  }
+});
 
-    // ✅ JSON을 STDIN으로 전달
-    py.stdin.write(JSON.stringify(userInput));
-    py.stdin.end();
+// GET /api/plan/status/:id - 작업 상태 조회 (done이면 저장된 Trip 포함)
+router.get("/status/:id", protect, async (req, res) => {
+  try {
+    const job = await getPlanJob(req.user._id, req.params.id);
+    if (!job) {
+      return res.status(404).json({ message: "작업을 찾을 수 없습니다." });
+    }
 
-    // (선택) Python 출력 받기
-    py.stdout.on("data", (data) => {
-      console.log("🐍 Python:", data.toString());
+    res.json({
+      requestId: job.jobId,
+      status: job.status,
+      error: job.error,
+      cache: job.cache,
+      createdAt: job.createdAt,
+      startedAt: job.startedAt,
+      finishedAt: job.finishedAt,
+      trip: job.trip,
     });
+  } catch (err) {
+    console.error(err);
+    res.status(500).json({ message: "조회 실패" });
+  }
+});
 
-    py.stderr.on("data", (data) => {
-      console.error("🐍 Python Error:", data.toString());
+// GET /api/plan/stream/:id - 일자별 계획을 완성되는 대로 Server-Sent Events로 전달
+// 이벤트: status(running) → day(일자 계획, 여러 번) → done({ tripId, ... }) 또는 failed({ error })
+//        day_update: 이미 보낸 일자가 검증/예산 맞춤으로 바뀌었을 때 같은 day 번호로 다시 보내는 일자 계획 (교체용)
+// (EventSource는 Authorization 헤더를 보낼 수 없으므로 클라이언트는 fetch 스트림으로 읽습니다.)
+router.get("/stream/:id", protect, async (req, res) => {
+  try {
+    const job = await getPlanJob(req.user._id, req.params.id);
+    if (!job) {
+      return res.status(404).json({ message: "작업을 찾을 수 없습니다." });
+    }
+
+    res.set({
+      "Content-Type": "text/event-stream",
+      "Cache-Control": "no-cache",
+      Connection: "keep-alive",
     });
+    res.flushHeaders();
 
-    res.status(202).json({
-      message: "여행 계획 생성 시작",
-      requestId,
+    const send = (event, data) => {
+      res.write(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`);
+    };
+
+    const stream = getJobStream(job.jobId);
+
+    // 스트림 기록이 없으면(오래전에 끝난 작업) 저장된 결과로 한 번에 응답
+    if (!stream) {
+      if (job.status === "done" && job.trip) {
+        job.trip.itinerary.forEach((day) => send("day", day));
+        send("done", { tripId: job.trip._id, title: job.trip.title });
+      } else {
+        send("failed", { error: job.error || "진행 중인 작업 정보를 찾을 수 없습니다." });
+      }
+      return res.end();
+    }
+
+    // 이미 완성된 일자부터 보내고, 이후 이벤트를 이어서 전달
+    stream.days.forEach((day) => send("day", day));
+    if (stream.result) {
+      send(stream.result.event, stream.result.data);
+      return res.end();
+    }
+
+    const onStatus = (status) => send("status", { status });
+    const onDay = (day) => send("day", day);
+    const onDayUpdate = (day) => send("day_update", day);
+    const onEnd = ({ event, data }) => {
+      send(event, data);
+      res.end();
+    };
+    stream.events.on("status", onStatus);
+    stream.events.on("day", onDay);
+    stream.events.on("day_update", onDayUpdate);
+    stream.events.once("end", onEnd);
+
+    req.on("close", () => {
+      stream.events.off("status", onStatus);
+      stream.events.off("day", onDay);
+      stream.events.off("day_update", onDayUpdate);
+      stream.events.off("end", onEnd);
     });
   } catch (err) {
     console.error(err);
-    res.status(500).json({ message: "실행 실패" });
+    if (!res.headersSent) res.status(500).json({ message: "조회 실패" });
+    else res.end();
   }
 });
 
+// GET /api/plan/cache/stats - 여행 계획 캐시 적중률 (모니터링용)
+router.get("/cache/stats", protect, (req, res) => {
+  res.json(plannerPool.getCacheStats());
+});
+
+// GET /api/plan/queue/stats - 작업 대기열 상태 (모니터링용)
+router.get("/queue/stats", protect, (req, res) => {
+  res.json(getQueueStats());
+});
+
+// GET /api/plan/metrics/stages - 계획 생성 단계별 소요 시간 p50/p95/p99 + 히스토그램 (모니터링용)
+router.get("/metrics/stages", protect, (req, res) => {
+  res.json(plannerPool.getStageStats());
+});
+
 export default router;
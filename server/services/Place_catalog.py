@@ -0,0 +1,163 @@
+import os
+import re
+import sys
+import math
+import unicodedata
+import numpy as np
+import pandas as pd
+
+sys.stdout.reconfigure(encoding="utf-8")
+
+# --- CSV 장소 카탈로그 설정 ---
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CATALOG_FILES = ("attractions", "camping", "food", "hotel", "shop")  # data/korea_tour_<이름>.csv
+
+# Tour API 지역 코드 → 시/도 이름 (syncPlaces.mjs와 동일)
+AREA_NAMES = {
+    1: "서울특별시", 2: "인천광역시", 3: "대전광역시", 4: "대구광역시", 5: "광주광역시",
+    6: "부산광역시", 7: "울산광역시", 8: "세종특별자치시", 31: "경기도", 32: "강원특별자치도",
+    33: "충청북도", 34: "충청남도", 35: "경상북도", 36: "경상남도", 37: "전북특별자치도",
+    38: "전라남도", 39: "제주특별자치도",
+}
+# Tour API 대분류(cat1) → Place.category (syncPlaces.mjs와 동일, 캠핑은 파일 단위)
+CATEGORY_LABELS = {"A01": "자연", "A02": "역사/문화", "A04": "쇼핑", "A05": "맛집", "B02": "숙소"}
+FILE_CATEGORIES = {"camping": "캠핑"}
+
+CATEGORICAL_COLUMNS = ("category", "city", "district")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_title(title):
+    """유니코드 NFC 정규화 + 연속 공백 하나로 + 앞뒤 공백 제거."""
+    if not isinstance(title, str):
+        return None
+    title = _SPACES.sub(" ", unicodedata.normalize("NFC", title)).strip()
+    return title or None
+
+
+def compact_frame(df):
+    """플래너 DataFrame의 반복 문자열 컬럼을 Categorical로, 좌표를 float32로 바꿉니다. (새 df 반환)
+
+    city/district/category 는 행마다 str 객체를 두지 않고 코드(int8/int16) + 카테고리 목록만 유지합니다.
+    """
+    df = df.copy()
+    for column in CATEGORICAL_COLUMNS:
+        if column in df and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    for column in ("x", "y"):
+        if column in df:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(np.float32)
+    if "title" in df:
+        df["title"] = df["title"].map(normalize_title)
+    return df
+
+
+def read_raw_csvs(data_dir=DATA_DIR, names=CATALOG_FILES):
+    """CSV를 그대로(문자열 object 컬럼) 읽어 하나로 합칩니다. 어느 파일에서 왔는지는 source 컬럼에 남깁니다."""
+    frames = []
+    for name in names:
+        path = os.path.join(data_dir, f"korea_tour_{name}.csv")
+        if not os.path.exists(path):
+            continue
+        part = pd.read_csv(path, encoding="utf-8-sig", dtype=str)
+        part["source"] = name
+        frames.append(part)
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_catalog(raw):
+    """합친 원본 CSV → 중복 제거 + 정규화된 플래너용 장소 DataFrame.
+
+    - contentid가 같은 행은 하나만 남김 (contentid가 없으면 정규화한 이름 + 주소로 판단)
+    - 시/도는 지역 코드, 시군구는 주소 두 번째 토큰
+    - 카테고리는 Place 스키마 라벨 (매핑되지 않는 행은 제외)
+    """
+    title = raw["title"].map(normalize_title)
+    addr = raw["addr"].fillna("").str.replace(_SPACES, " ", regex=True).str.strip()
+    tokens = addr.str.split(" ")
+
+    area = pd.to_numeric(raw["area"], errors="coerce")
+    city = area.map(AREA_NAMES).fillna(tokens.str[0])
+    category = raw["source"].map(FILE_CATEGORIES).fillna(raw["cat"].map(CATEGORY_LABELS))
+
+    contentid = raw["contentid"] if "contentid" in raw else pd.Series(np.nan, index=raw.index)
+    key = contentid.where(contentid.notna() & (contentid != "N/A"), "T:" + title.fillna("") + "|" + addr)
+
+    df = pd.DataFrame({
+        "contentId": key,
+        "title": title,
+        "category": category,
+        "city": city,
+        "district": tokens.str[1],
+        "x": pd.to_numeric(raw["x"], errors="coerce"),
+        "y": pd.to_numeric(raw["y"], errors="coerce"),
+    })
+    df = df[df["title"].notna() & df["category"].notna()]
+    # 같은 contentId는 처음 나온 행(CATALOG_FILES 순서 → 행 순서)을 씁니다. syncPlaces.mjs도 같은 규칙.
+    df = df.drop_duplicates(subset="contentId", keep="first").reset_index(drop=True)
+    return compact_frame(df)
+
+
+def load_catalog(data_dir=DATA_DIR):
+    """data/korea_tour_*.csv로부터 중복 제거된 장소 카탈로그를 만듭니다."""
+    return build_catalog(read_raw_csvs(data_dir))
+
+
+# --- Gemini에 보낼 소수의 행만 가벼운 객체로 꺼내 보기 ---
+class PlaceRecord:
+    """카탈로그 한 행의 읽기 전용 뷰. __slots__로 행마다 dict를 만들지 않습니다."""
+
+    __slots__ = ("title", "category", "city", "district", "lat", "lng")
+
+    def __init__(self, title, category, city, district, lat, lng):
+        self.title = title
+        self.category = category
+        self.city = city
+        self.district = district
+        self.lat = lat
+        self.lng = lng
+
+    @property
+    def coords(self):
+        """프롬프트/계획 JSON의 "위도, 경도" 형식 (소수점 6자리). 좌표가 없으면 "없음"."""
+        if self.lat is None or self.lng is None or math.isnan(self.lat) or math.isnan(self.lng):
+            return "없음"
+        return f"{round(self.lat, 6)}, {round(self.lng, 6)}"
+
+    def __repr__(self):
+        return f"PlaceRecord({self.title!r}, {self.category!r}, {self.coords})"
+
+
+def iter_place_records(df_part):
+    """df 일부(후보 행)를 PlaceRecord로 하나씩 꺼냅니다. 컬럼 배열을 한 번만 꺼내 zip으로 돕니다."""
+    def column(name):
+        if name not in df_part:
+            return [None] * len(df_part)
+        return df_part[name].astype(object).where(df_part[name].notna(), None).tolist()
+
+    lat = df_part["y"].to_numpy(dtype=np.float64).tolist()
+    lng = df_part["x"].to_numpy(dtype=np.float64).tolist()
+    for values in zip(column("title"), column("category"), column("city"), column("district"), lat, lng):
+        yield PlaceRecord(*values)
+
+
+def memory_report(raw, catalog):
+    """원본(object 컬럼) 대비 카탈로그 메모리를 df.memory_usage(deep=True) 기준으로 출력합니다."""
+    before = raw.memory_usage(deep=True)
+    after = catalog.memory_usage(deep=True)
+    print(f"원본 CSV 합계: {len(raw)}행 → 카탈로그: {len(catalog)}행 (중복/무효 {len(raw) - len(catalog)}행 제거)")
+    print(f"{'컬럼':<12}{'원본(KB)':>12}{'카탈로그(KB)':>14}  dtype")
+    for column in catalog.columns:
+        source = {"contentId": "contentid", "district": "addr", "city": "area"}.get(column, column)
+        raw_kb = before.get(source, 0) / 1024
+        print(f"{column:<12}{raw_kb:>12.1f}{after[column] / 1024:>14.1f}  {catalog[column].dtype}")
+    print(f"{'합계':<12}{before.sum() / 1024:>12.1f}{after.sum() / 1024:>14.1f}  "
+          f"(x{before.sum() / max(after.sum(), 1):.1f})")
+
+
+if __name__ == "__main__":
+    # 사용법: python Place_catalog.py  (카탈로그 생성 + 메모리 비교)
+    raw_df = read_raw_csvs()
+    catalog_df = build_catalog(raw_df)
+    memory_report(raw_df, catalog_df)
+    print(list(iter_place_records(catalog_df.head(3))))
@@ -0,0 +1,40 @@
+import numpy as np
+
+# --- 좌표 계산 공용 함수 ---
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """두 좌표(배열 가능) 사이의 대원 거리(km). numpy 브로드캐스팅을 그대로 따릅니다."""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lng1, lat2, lng2))
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix(lat_a, lng_a, lat_b=None, lng_b=None):
+    """A 점들과 B 점들 사이의 거리 행렬(km), 모양 (len(A), len(B)). B를 생략하면 A x A."""
+    lat_a = np.asarray(lat_a, dtype=np.float64)
+    lng_a = np.asarray(lng_a, dtype=np.float64)
+    if lat_b is None:
+        lat_b, lng_b = lat_a, lng_a
+    lat_b = np.asarray(lat_b, dtype=np.float64)
+    lng_b = np.asarray(lng_b, dtype=np.float64)
+    return haversine_km(lat_a[:, None], lng_a[:, None], lat_b[None, :], lng_b[None, :])
+
+
+def format_coords(lat, lng):
+    """계획 JSON의 'coords' 문자열 형식 ("위도, 경도")."""
+    return f"{round(float(lat), 6)}, {round(float(lng), 6)}"
+
+
+def parse_coords(coords):
+    """'coords' 문자열을 (위도, 경도) float로 변환합니다. 형식이 잘못되었으면 None."""
+    try:
+        lat, lng = (float(v) for v in str(coords).split(","))
+    except ValueError:
+        return None
+    if not (np.isfinite(lat) and np.isfinite(lng)):
+        return None
+    return lat, lng
@@ -0,0 +1,204 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from Place_themes import get_theme_resolver
+
+sys.stdout.reconfigure(encoding="utf-8")
+
+
+# --- (city, district, category) → 행 위치 인덱스 ---
+class PlaceIndex:
+    """장소 DataFrame을 로드할 때 한 번 만들어 두는 지역/카테고리 인덱스.
+
+    (city, district) 와 (city, district, category) 를 행 위치(int32 배열)로 매핑하므로,
+    요청마다 전체 df를 스캔하지 않고 딕셔너리 조회 + 배열 연결만으로 후보를 고릅니다.
+    테마 매칭은 행이 아니라 카테고리 목록(수십 개)에 대해 한 번만 수행합니다.
+    """
+
+    def __init__(self, df):
+        city = _as_categorical(df["city"])
+        district = _as_categorical(df["district"])
+        category = _as_categorical(df["category"])
+
+        self.categories = [str(c) for c in category.categories]
+        self._city_codes = {str(c): i for i, c in enumerate(city.categories)}
+        self._district_codes = {str(c): i for i, c in enumerate(district.categories)}
+        self._theme_cache = {}
+
+        # 1. (city, district, category) 코드 조합별로 정렬 후 구간을 잘라 위치 배열을 만듭니다.
+        n_district = len(district.categories) + 1
+        n_category = len(self.categories) + 1
+        city_codes = city.codes.astype(np.int64)
+        district_codes = district.codes.astype(np.int64)
+        category_codes = category.codes.astype(np.int64)
+        keys = ((city_codes + 1) * n_district + (district_codes + 1)) * n_category + (category_codes + 1)
+
+        order = np.argsort(keys, kind="stable").astype(np.int32)
+        sorted_keys = keys[order]
+        bounds = np.flatnonzero(np.diff(sorted_keys)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(order)]))
+
+        # by_area[(city_code, district_code)] = {category_code: positions}
+        self.by_area = {}
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            row = order[start]
+            area_key = (int(city_codes[row]), int(district_codes[row]))
+            self.by_area.setdefault(area_key, {})[int(category_codes[row])] = order[start:end]
+
+    def area_key(self, city, district):
+        city_code = self._city_codes.get(city)
+        district_code = self._district_codes.get(district)
+        if city_code is None or district_code is None:
+            return None
+        return (city_code, district_code)
+
+    def area_positions(self, city, district):
+        """(city, district)에 속한 모든 행 위치를 원래 순서대로 반환합니다."""
+        groups = self.by_area.get(self.area_key(city, district), {})
+        return _concat_sorted(groups.values())
+
+    def category_codes_matching(self, themes):
+        """테마(동의어/Tour API 코드 포함) 중 하나와 일치하는 카테고리 코드 집합 (요청 간 캐시).
+
+        해석 규칙은 Place_themes.ThemeResolver를 따릅니다. 표에 없는 테마는 라벨 부분 문자열 일치.
+        """
+        key = tuple(themes)
+        if key not in self._theme_cache:
+            self._theme_cache[key] = get_theme_resolver().category_codes(self.categories, themes)
+        return self._theme_cache[key]
+
+    def select(self, city, district, place_themes, accommodation_theme):
+        """장소 후보 / 숙소 후보 행 위치를 반환합니다. 지역에 데이터가 없으면 None.
+
+        기존 filter_and_format_data의 규칙과 동일합니다.
+        - 장소: 테마 중 하나를 포함(테마가 없으면 전부)하면서 숙소 테마는 포함하지 않는 카테고리
+        - 숙소: 숙소 테마를 포함하는 카테고리
+        - 카테고리가 비어 있는 행(-1)은 테마가 없을 때만 장소 후보
+        """
+        groups = self.by_area.get(self.area_key(city, district))
+        if not groups:
+            return None
+
+        place_codes, accommodation_codes = self.candidate_category_codes(place_themes, accommodation_theme)
+
+        place_parts, accommodation_parts = [], []
+        for code, positions in groups.items():
+            if code in accommodation_codes:
+                accommodation_parts.append(positions)
+            elif code in place_codes:
+                place_parts.append(positions)
+
+        return _concat_sorted(place_parts), _concat_sorted(accommodation_parts)
+
+    def candidate_category_codes(self, place_themes, accommodation_theme):
+        """select 규칙에 따른 (장소 후보 카테고리 코드, 숙소 후보 카테고리 코드) 집합. 코드 -1은 결측."""
+        accommodation_codes = self.category_codes_matching([accommodation_theme])
+        if bool(place_themes) and place_themes != ['']:
+            place_codes = self.category_codes_matching(place_themes) - accommodation_codes
+        else:
+            place_codes = frozenset(range(-1, len(self.categories))) - accommodation_codes
+        return place_codes, accommodation_codes
+
+
+def _as_categorical(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.remove_unused_categories().array
+    return pd.Categorical(series.astype(object).where(series.notna(), None))
+
+
+def _concat_sorted(parts):
+    parts = list(parts)
+    if not parts:
+        return np.empty(0, dtype=np.int32)
+    return np.sort(np.concatenate(parts))
+
+
+_index_cache = {}
+
+def get_place_index(df):
+    """df에 대한 PlaceIndex를 반환합니다. 같은 df라면 프로세스 안에서 한 번만 만듭니다."""
+    cached = _index_cache.get(id(df))
+    if cached is None or cached[0] is not df:
+        cached = (df, PlaceIndex(df))
+        _index_cache.clear()
+        _index_cache[id(df)] = cached
+    return cached[1]
+
+
+# --- 마이크로 벤치마크: 기존 boolean 스캔 + .apply 경로 vs 인덱스 경로 ---
+def _legacy_select(df, city, district, place_themes, accommodation_theme):
+    """인덱스 도입 이전 filter_and_format_data의 후보 선택 로직 (비교용)."""
+    df_city = df[(df['city'] == city) & (df['district'] == district)]
+    if df_city.empty:
+        return None
+    category = df_city['category'].astype(object)
+    if place_themes and place_themes != ['']:
+        place_candidate_mask = category.apply(
+            lambda x: any(theme in str(x) for theme in place_themes) if pd.notna(x) else False
+        )
+    else:
+        place_candidate_mask = df_city['title'].apply(lambda x: True)
+    accommodation_exclusion_mask = category.apply(
+        lambda x: accommodation_theme not in str(x) if pd.notna(x) else True
+    )
+    accommodation_mask = category.apply(
+        lambda x: accommodation_theme in str(x) if pd.notna(x) else False
+    )
+    positions = df_city.index.to_numpy()
+    return (
+        positions[(place_candidate_mask & accommodation_exclusion_mask).to_numpy()],
+        positions[accommodation_mask.to_numpy()],
+    )
+
+
+def run_benchmark(df, place_themes=("맛집", "카페"), accommodation_theme="숙소"):
+    """모든 (city, district) 조합에 대해 두 경로의 결과 일치 여부와 소요 시간을 출력합니다."""
+    df = df.reset_index(drop=True)
+    place_themes = list(place_themes)
+    areas = df[['city', 'district']].astype(object).dropna().drop_duplicates().itertuples(index=False)
+    areas = [tuple(a) for a in areas]
+
+    start = time.perf_counter()
+    index = PlaceIndex(df)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy = [_legacy_select(df, c, d, place_themes, accommodation_theme) for c, d in areas]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.select(c, d, place_themes, accommodation_theme) for c, d in areas]
+    indexed_time = time.perf_counter() - start
+
+    mismatches = sum(
+        1 for a, b in zip(legacy, indexed)
+        if (a is None) != (b is None)
+        or (a is not None and not (np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1])))
+    )
+
+    print(f"장소 {len(df)}건 / 지역 {len(areas)}곳 / 테마 {place_themes} / 숙소 테마 '{accommodation_theme}'")
+    print(f"인덱스 생성: {build_time * 1000:.1f} ms (로드 시 1회)")
+    print(f"기존 경로  : 총 {legacy_time * 1000:.1f} ms, 지역당 {legacy_time / len(areas) * 1000:.3f} ms")
+    print(f"인덱스 경로: 총 {indexed_time * 1000:.1f} ms, 지역당 {indexed_time / len(areas) * 1000:.3f} ms")
+    print(f"속도 향상  : x{legacy_time / max(indexed_time, 1e-9):.1f} / 결과 불일치 {mismatches}건")
+    return mismatches
+
+
+def _load_benchmark_df():
+    """스냅샷이 있으면 스냅샷을, 없으면 data/korea_tour_*.csv 카탈로그(중복 제거 + 범주형)를 벤치마크용 df로 씁니다."""
+    from Place_snapshot import snapshot_exists, load_snapshot
+    if snapshot_exists():
+        return load_snapshot()
+
+    from Place_catalog import load_catalog
+    return load_catalog()
+
+
+if __name__ == "__main__":
+    # 사용법: python Place_index.py  (인덱스 경로 vs 기존 경로 마이크로 벤치마크)
+    bench_df = _load_benchmark_df()
+    run_benchmark(bench_df)
+    run_benchmark(bench_df, place_themes=[""])
+    run_benchmark(bench_df, place_themes=["캠핑"], accommodation_theme="캠핑")
@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+sys.stdout.reconfigure(encoding="utf-8")
+load_dotenv()
+
+# --- 스냅샷 위치 및 구성 ---
+# data/snapshot/<version>/ 아래에 컬럼별 .npy 파일을 저장하고,
+# data/snapshot/CURRENT 파일이 현재 사용 중인 버전을 가리킵니다.
+# 새 버전은 별도 디렉터리에 만든 뒤 CURRENT만 교체하므로, 이미 mmap 중인 워커는 영향을 받지 않습니다.
+SNAPSHOT_DIR = os.getenv(
+    "PLACE_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "snapshot"),
+)
+CATEGORICAL_COLUMNS = ["city", "district", "category"]
+STAT_COLUMNS = {"rating": np.float32, "bookmarkCount": np.int32, "averageCost": np.int32}
+KEEP_VERSIONS = 2
+
+
+def collection_version(collection):
+    """place 컬렉션의 문서 수와 최종 수정 시각으로 버전 스탬프를 만듭니다."""
+    count = collection.count_documents({})
+    latest = collection.find_one({}, {"updatedAt": 1, "_id": 0}, sort=[("updatedAt", -1)])
+    updated_at = latest.get("updatedAt") if latest else None
+    stamp = f"{count}:{updated_at.isoformat() if updated_at else '-'}"
+    return hashlib.sha1(stamp.encode("utf-8")).hexdigest()[:12]
+
+
+def _encode_categorical(values):
+    """문자열 목록을 (int16 코드 배열, 카테고리 목록)으로 변환합니다. 결측은 -1."""
+    cat = pd.Categorical(values)
+    return cat.codes.astype(np.int16), [str(c) for c in cat.categories]
+
+
+def write_snapshot(columns, version, snapshot_dir=SNAPSHOT_DIR, source="mongo"):
+    """title/city/district/category/x/y 컬럼(list)을 버전 디렉터리에 기록하고 CURRENT를 교체합니다."""
+    version_dir = os.path.join(snapshot_dir, version)
+    tmp_dir = version_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    # 1. title: UTF-8 blob 하나 + 문자 단위 offset (문자열 객체 없이 mmap 가능)
+    titles = [str(t) if t is not None else "" for t in columns["title"]]
+    text = "".join(titles)
+    offsets = np.zeros(len(titles) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(t) for t in titles])
+    np.save(os.path.join(tmp_dir, "title_blob.npy"), np.frombuffer(text.encode("utf-8"), dtype=np.uint8))
+    np.save(os.path.join(tmp_dir, "title_offsets.npy"), offsets)
+
+    # 2. city/district/category: 범주형 코드 + 카테고리 목록
+    categories = {}
+    for name in CATEGORICAL_COLUMNS:
+        codes, categories[name] = _encode_categorical(columns[name])
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), codes)
+
+    # 3. 좌표: float32 (한국 범위에서 오차 1m 미만)
+    for name in ["x", "y"]:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(columns[name], dtype=np.float32))
+
+    # 4. 인기도 통계/평균 비용 (있는 경우만): 후보 축소 순위와 로컬 비용 모델에 사용
+    for name, dtype in STAT_COLUMNS.items():
+        if name in columns:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.nan_to_num(np.asarray(columns[name], dtype=np.float64)).astype(dtype))
+
+    meta = {
+        "version": version,
+        "source": source,
+        "count": len(titles),
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "categories": categories,
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    shutil.rmtree(version_dir, ignore_errors=True)
+    os.replace(tmp_dir, version_dir)
+
+    current_tmp = os.path.join(snapshot_dir, "CURRENT.tmp")
+    with open(current_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(snapshot_dir, "CURRENT"))
+
+    _prune_old_versions(snapshot_dir, version)
+    return meta
+
+
+def _prune_old_versions(snapshot_dir, current):
+    """최근 KEEP_VERSIONS개를 제외한 예전 버전 디렉터리를 정리합니다."""
+    versions = [
+        d for d in os.listdir(snapshot_dir)
+        if os.path.isdir(os.path.join(snapshot_dir, d)) and not d.endswith(".tmp") and d != current
+    ]
+    versions.sort(key=lambda d: os.path.getmtime(os.path.join(snapshot_dir, d)), reverse=True)
+    for old in versions[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(os.path.join(snapshot_dir, old), ignore_errors=True)
+
+
+def build_snapshot(snapshot_dir=SNAPSHOT_DIR, force=True):
+    """MongoDB place 컬렉션을 컬럼 단위로 읽어 스냅샷을 만듭니다.
+
+    force=False면 현재 스냅샷 버전이 컬렉션 버전과 같을 때 아무것도 하지 않습니다.
+    """
+    from pymongo import MongoClient
+
+    client_m = MongoClient(os.getenv("DBURL"))
+    collection = client_m["ProjectData"]["place"]
+    version = collection_version(collection)
+
+    if not force and current_version(snapshot_dir) == version:
+        print(f"✅ 스냅샷이 최신 상태입니다. (version: {version})")
+        client_m.close()
+        return None
+
+    projection = {
+        "title": 1,
+        "category": 1,
+        "address.city": 1,
+        "address.district": 1,
+        "coordinates.coordinates": 1,
+        "stats.rating": 1,
+        "stats.bookmarkCount": 1,
+        "averageCost": 1,
+        "_id": 0,
+    }
+    columns = {name: [] for name in ["title", "category", "city", "district", "x", "y", *STAT_COLUMNS]}
+    # 문서를 리스트로 모아두지 않고 커서를 돌며 바로 컬럼에 추가합니다.
+    # 동기화에서 비활성화(isActive:false)된 장소는 제외합니다.
+    for doc in collection.find({"isActive": {"$ne": False}}, projection).batch_size(5000):
+        address = doc.get("address") or {}
+        coords = (doc.get("coordinates") or {}).get("coordinates") or [np.nan, np.nan]
+        columns["title"].append(doc.get("title"))
+        columns["category"].append(doc.get("category"))
+        columns["city"].append(address.get("city"))
+        columns["district"].append(address.get("district"))
+        columns["x"].append(coords[0])
+        columns["y"].append(coords[1])
+        stats = doc.get("stats") or {}
+        columns["rating"].append(stats.get("rating", 0))
+        columns["bookmarkCount"].append(stats.get("bookmarkCount", 0))
+        columns["averageCost"].append(doc.get("averageCost") or 0)
+    client_m.close()
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    meta = write_snapshot(columns, version, snapshot_dir)
+    print(f"✅ 스냅샷 생성 완료: {meta['count']}건 (version: {version})")
+    return meta
+
+
+def current_version(snapshot_dir=SNAPSHOT_DIR):
+    """CURRENT 파일이 가리키는 스냅샷 버전을 반환합니다. 없으면 None."""
+    try:
+        with open(os.path.join(snapshot_dir, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def snapshot_exists(snapshot_dir=SNAPSHOT_DIR):
+    version = current_version(snapshot_dir)
+    return version is not None and os.path.isdir(os.path.join(snapshot_dir, version))
+
+
+def load_snapshot(snapshot_dir=SNAPSHOT_DIR):
+    """현재 스냅샷을 읽기 전용 mmap으로 열어 플래너용 DataFrame을 만듭니다.
+
+    범주형 코드와 좌표 배열은 mmap 그대로 사용하므로 여러 워커가 같은 페이지 캐시를 공유합니다.
+    """
+    version = current_version(snapshot_dir)
+    if version is None:
+        raise FileNotFoundError(f"스냅샷이 없습니다: {snapshot_dir}")
+    version_dir = os.path.join(snapshot_dir, version)
+
+    with open(os.path.join(version_dir, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+
+    def column(name):
+        return np.load(os.path.join(version_dir, f"{name}.npy"), mmap_mode="r")
+
+    text = column("title_blob").tobytes().decode("utf-8")
+    offsets = column("title_offsets")
+    titles = [text[a:b] for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+    data = {"title": titles}
+    for name in CATEGORICAL_COLUMNS:
+        data[name] = pd.Categorical.from_codes(column(name), categories=meta["categories"][name])
+    for name in ["x", "y"]:
+        data[name] = pd.Series(column(name), copy=False)
+    for name in STAT_COLUMNS:
+        if os.path.exists(os.path.join(version_dir, f"{name}.npy")):
+            data[name] = pd.Series(column(name), copy=False)
+
+    df = pd.DataFrame(data, copy=False)
+    df.attrs["snapshot_version"] = meta["version"]
+    return df
+
+
+if __name__ == "__main__":
+    # 사용법: python Place_snapshot.py [build|refresh|info]
+    command = sys.argv[1] if len(sys.argv) > 1 else "refresh"
+
+    if command == "build":
+        build_snapshot(force=True)
+    elif command == "refresh":
+        build_snapshot(force=False)
+    elif command == "info":
+        version = current_version()
+        if version is None:
+            print("❌ 스냅샷이 없습니다. 'python Place_snapshot.py build'로 생성해 주세요.")
+        else:
+            with open(os.path.join(SNAPSHOT_DIR, version, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            print(f"version: {meta['version']} / {meta['count']}건 / built_at: {meta['built_at']}")
+    else:
+        print(f"❌ 알 수 없는 명령입니다: {command} (build | refresh | info)")
+        sys.exit(1)
@@ -0,0 +1,241 @@
+import os
+import sys
+import math
+import time
+import numpy as np
+from Place_geo import haversine_km, haversine_matrix
+from Place_index import _as_categorical
+
+sys.stdout.reconfigure(encoding="utf-8")
+
+# --- 공간 인덱스 설정 ---
+CELL_KM = float(os.getenv("SPATIAL_CELL_KM", "2"))  # 격자 한 칸의 최소 폭 (km)
+KOREA_BOUNDS = (33.0, 43.0, 124.0, 132.0)  # lat_min, lat_max, lng_min, lng_max (Place 스키마 검증과 동일)
+_BUFFER_CHUNK = 2048  # buffer 거리 계산 시 한 번에 비교할 후보 수
+
+
+class SpatialIndex:
+    """장소 좌표를 균일 격자(약 CELL_KM 칸)에 담아 두는 반경/최근접 검색 인덱스.
+
+    행을 격자 칸 번호로 정렬해 두고, 질의 때는 질의점 주변 칸만 searchsorted로 꺼내
+    하버사인 거리를 계산합니다. 카테고리 코드는 PlaceIndex와 같은 방식으로 매기므로
+    PlaceIndex.candidate_category_codes() 결과를 그대로 필터로 넘길 수 있습니다.
+    반환하는 위치는 모두 원래 df의 행 위치(iloc)입니다.
+    """
+
+    def __init__(self, df, cell_km=CELL_KM):
+        lat = df['y'].to_numpy(dtype=np.float64)
+        lng = df['x'].to_numpy(dtype=np.float64)
+        category = _as_categorical(df['category']).codes.astype(np.int16)
+
+        lat_min, lat_max, lng_min, lng_max = KOREA_BOUNDS
+        valid = (lat >= lat_min) & (lat <= lat_max) & (lng >= lng_min) & (lng <= lng_max)
+
+        # 경도 1도의 거리는 위도가 높을수록 짧으므로, 가장 북쪽 기준으로 칸 폭을 잡아 어디서나 cell_km 이상이 되게 합니다.
+        self.cell_km = cell_km
+        self.cell_lat = cell_km / 110.57
+        self.cell_lng = cell_km / (111.32 * math.cos(math.radians(lat_max)))
+        self.n_rows = int((lat_max - lat_min) / self.cell_lat) + 1
+        self.n_cols = int((lng_max - lng_min) / self.cell_lng) + 1
+
+        positions = np.flatnonzero(valid).astype(np.int32)
+        keys = self._cell_keys(lat[positions], lng[positions])
+        order = np.argsort(keys, kind="stable")
+
+        # 칸 번호 순으로 정렬된 점 배열 + 칸별 [start, end) 구간
+        self.positions = positions[order]
+        self.lat = lat[self.positions]
+        self.lng = lng[self.positions]
+        self.category = category[self.positions]
+        sorted_keys = keys[order]
+        self.cell_ids, self.cell_starts = np.unique(sorted_keys, return_index=True)
+        self.cell_ends = np.append(self.cell_starts[1:], len(sorted_keys))
+
+    def __len__(self):
+        return len(self.positions)
+
+    # --- 격자 계산 ---
+    def _cell_rc(self, lat, lng):
+        row = np.floor((np.asarray(lat) - KOREA_BOUNDS[0]) / self.cell_lat).astype(np.int64)
+        col = np.floor((np.asarray(lng) - KOREA_BOUNDS[2]) / self.cell_lng).astype(np.int64)
+        return np.clip(row, 0, self.n_rows - 1), np.clip(col, 0, self.n_cols - 1)
+
+    def _cell_keys(self, lat, lng):
+        row, col = self._cell_rc(lat, lng)
+        return row * self.n_cols + col
+
+    def _gather(self, rows, cols):
+        """주어진 칸(행, 열 배열)에 든 점들의 정렬 배열 내 인덱스를 반환합니다."""
+        inside = (rows >= 0) & (rows < self.n_rows) & (cols >= 0) & (cols < self.n_cols)
+        keys = np.unique(rows[inside] * self.n_cols + cols[inside])
+        slot = np.searchsorted(self.cell_ids, keys)
+        found = slot < len(self.cell_ids)
+        found[found] = self.cell_ids[slot[found]] == keys[found]
+        slot = slot[found]
+        if not len(slot):
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(s, e) for s, e in zip(self.cell_starts[slot], self.cell_ends[slot])])
+
+    def _block(self, lat, lng, rings):
+        """질의점이 속한 칸을 중심으로 (2*rings+1)^2 칸 블록의 점 인덱스."""
+        row, col = self._cell_rc(lat, lng)
+        offsets = np.arange(-rings, rings + 1)
+        rows = (row + offsets)[:, None].repeat(len(offsets), axis=1).ravel()
+        cols = (col + offsets)[None, :].repeat(len(offsets), axis=0).ravel()
+        return self._gather(rows, cols)
+
+    def _filter_category(self, idx, category_codes):
+        if category_codes is None:
+            return idx
+        return idx[np.isin(self.category[idx], np.fromiter(category_codes, dtype=np.int16))]
+
+    # --- 질의 ---
+    def radius(self, lat, lng, km, category_codes=None):
+        """(lat, lng)에서 km 이내인 점의 (행 위치, 거리 km)를 가까운 순으로 반환합니다."""
+        idx = self._filter_category(self._block(lat, lng, math.ceil(km / self.cell_km)), category_codes)
+        dist = haversine_km(lat, lng, self.lat[idx], self.lng[idx])
+        keep = dist <= km
+        idx, dist = idx[keep], dist[keep]
+        order = np.lexsort((self.positions[idx], dist))
+        return self.positions[idx[order]], dist[order]
+
+    def nearest(self, lat, lng, k=1, category_codes=None, max_km=None):
+        """(lat, lng)에서 가장 가까운 k개 점의 (행 위치, 거리 km). max_km를 넘는 점은 제외합니다.
+
+        블록을 두 배씩 넓히며, k번째 거리가 블록이 보장하는 반경(rings * cell_km) 안에 들어오면 멈춥니다.
+        """
+        max_rings = max(self.n_rows, self.n_cols)
+        if max_km is not None:
+            max_rings = min(max_rings, math.ceil(max_km / self.cell_km))
+        rings = 1
+        while True:
+            idx = self._filter_category(self._block(lat, lng, rings), category_codes)
+            dist = haversine_km(lat, lng, self.lat[idx], self.lng[idx])
+            if (len(idx) >= k and np.partition(dist, k - 1)[k - 1] <= rings * self.cell_km) or rings >= max_rings:
+                break
+            rings = min(max_rings, rings * 2)
+
+        if max_km is not None:
+            keep = dist <= max_km
+            idx, dist = idx[keep], dist[keep]
+        order = np.lexsort((self.positions[idx], dist))[:k]
+        return self.positions[idx[order]], dist[order]
+
+    def buffer(self, positions, km, category_codes=None):
+        """주어진 행 위치들(예: 한 시군구의 장소) 중 어느 하나에서라도 km 이내인 점의 행 위치 (정렬)."""
+        source = np.isin(self.positions, positions)
+        if not source.any():
+            return np.empty(0, dtype=np.int32)
+        src_lat, src_lng = self.lat[source], self.lng[source]
+
+        # 1. 원본 점들이 속한 칸을 rings만큼 팽창시킨 칸들만 후보
+        rings = math.ceil(km / self.cell_km)
+        src_rows, src_cols = self._cell_rc(src_lat, src_lng)
+        cells = np.unique(np.column_stack((src_rows, src_cols)), axis=0)
+        offsets = np.arange(-rings, rings + 1)
+        d_row, d_col = np.meshgrid(offsets, offsets, indexing="ij")
+        rows = (cells[:, 0][:, None] + d_row.ravel()[None, :]).ravel()
+        cols = (cells[:, 1][:, None] + d_col.ravel()[None, :]).ravel()
+        idx = self._filter_category(self._gather(rows, cols), category_codes)
+
+        # 2. 후보별 원본 점까지의 최소 거리 (메모리를 위해 나눠서 계산)
+        keep = np.zeros(len(idx), dtype=bool)
+        for start in range(0, len(idx), _BUFFER_CHUNK):
+            part = idx[start:start + _BUFFER_CHUNK]
+            dist = haversine_matrix(self.lat[part], self.lng[part], src_lat, src_lng)
+            keep[start:start + _BUFFER_CHUNK] = dist.min(axis=1) <= km
+        return np.sort(self.positions[idx[keep]])
+
+
+_spatial_cache = {}
+
+def get_spatial_index(df):
+    """df에 대한 SpatialIndex를 반환합니다. 같은 df라면 프로세스 안에서 한 번만 만듭니다."""
+    cached = _spatial_cache.get(id(df))
+    if cached is None or cached[0] is not df:
+        cached = (df, SpatialIndex(df))
+        _spatial_cache.clear()
+        _spatial_cache[id(df)] = cached
+    return cached[1]
+
+
+# --- 마이크로 벤치마크: 전체 행 하버사인 스캔 vs 격자 인덱스 ---
+def _brute_radius(lat_all, lng_all, category, lat, lng, km, codes):
+    dist = haversine_km(lat, lng, lat_all, lng_all)
+    mask = dist <= km
+    if codes is not None:
+        mask &= np.isin(category, np.fromiter(codes, dtype=np.int16))
+    return np.flatnonzero(mask)
+
+
+def run_benchmark(df, queries=300, km=3.0, k=10, seed=42):
+    """무작위 장소 좌표를 질의점으로 반경/최근접/버퍼 검색 결과 일치 여부와 소요 시간을 출력합니다."""
+    from Place_index import PlaceIndex
+
+    df = df.reset_index(drop=True)
+    lat_all = df['y'].to_numpy(dtype=np.float64)
+    lng_all = df['x'].to_numpy(dtype=np.float64)
+    category = _as_categorical(df['category']).codes.astype(np.int16)
+
+    start = time.perf_counter()
+    index = SpatialIndex(df)
+    build_time = time.perf_counter() - start
+
+    place_index = PlaceIndex(df)
+    _, stay_codes = place_index.candidate_category_codes([''], "숙소")
+    rng = np.random.default_rng(seed)
+    picks = index.positions[rng.choice(len(index), size=queries, replace=False)]
+    points = [(lat_all[p], lng_all[p]) for p in picks]
+
+    # 1. 반경 검색
+    start = time.perf_counter()
+    brute = [_brute_radius(lat_all, lng_all, category, la, ln, km, None) for la, ln in points]
+    brute_time = time.perf_counter() - start
+    start = time.perf_counter()
+    indexed = [index.radius(la, ln, km)[0] for la, ln in points]
+    indexed_time = time.perf_counter() - start
+    mismatches = sum(1 for a, b in zip(brute, indexed) if not np.array_equal(a, np.sort(b)))
+    print(f"장소 {len(df)}건 (유효 좌표 {len(index)}건) / 질의 {queries}회 / 격자 {index.cell_km} km")
+    print(f"인덱스 생성: {build_time * 1000:.1f} ms (로드 시 1회)")
+    print(f"[반경 {km} km] 전체 스캔 {brute_time / queries * 1000:.3f} ms/회, "
+          f"인덱스 {indexed_time / queries * 1000:.3f} ms/회, x{brute_time / max(indexed_time, 1e-9):.1f}, 불일치 {mismatches}건")
+
+    # 2. 최근접 숙소 k개
+    start = time.perf_counter()
+    brute = []
+    for la, ln in points:
+        dist = haversine_km(la, ln, lat_all, lng_all)
+        dist[~np.isin(category, np.fromiter(stay_codes, dtype=np.int16))] = np.inf
+        dist[~np.isin(np.arange(len(df)), index.positions)] = np.inf
+        brute.append(np.sort(dist)[:k])
+    brute_time = time.perf_counter() - start
+    start = time.perf_counter()
+    indexed = [index.nearest(la, ln, k, stay_codes)[1] for la, ln in points]
+    indexed_time = time.perf_counter() - start
+    nn_mismatches = sum(1 for a, b in zip(brute, indexed) if not np.allclose(a, b))
+    print(f"[최근접 숙소 {k}개] 전체 스캔 {brute_time / queries * 1000:.3f} ms/회, "
+          f"인덱스 {indexed_time / queries * 1000:.3f} ms/회, x{brute_time / max(indexed_time, 1e-9):.1f}, 불일치 {nn_mismatches}건")
+
+    # 3. 시군구 + km 버퍼
+    areas = df[['city', 'district']].astype(object).dropna().drop_duplicates().head(30).itertuples(index=False)
+    areas = [place_index.area_positions(c, d) for c, d in areas]
+    start = time.perf_counter()
+    brute = []
+    for area in areas:
+        src = area[np.isin(area, index.positions)]
+        dist = haversine_matrix(lat_all, lng_all, lat_all[src], lng_all[src]).min(axis=1) if len(src) else np.full(len(df), np.inf)
+        brute.append(np.flatnonzero((dist <= km) & np.isin(np.arange(len(df)), index.positions)))
+    brute_time = time.perf_counter() - start
+    start = time.perf_counter()
+    indexed = [index.buffer(area, km) for area in areas]
+    indexed_time = time.perf_counter() - start
+    buf_mismatches = sum(1 for a, b in zip(brute, indexed) if not np.array_equal(a, b))
+    print(f"[시군구 + {km} km 버퍼] 전체 스캔 {brute_time / len(areas) * 1000:.1f} ms/회, "
+          f"인덱스 {indexed_time / len(areas) * 1000:.1f} ms/회, x{brute_time / max(indexed_time, 1e-9):.1f}, 불일치 {buf_mismatches}건")
+    return mismatches + nn_mismatches + buf_mismatches
+
+
+if __name__ == "__main__":
+    # 사용법: python Place_spatial.py  (격자 인덱스 vs 전체 스캔 마이크로 벤치마크)
+    from Place_index import _load_benchmark_df
+    run_benchmark(_load_benchmark_df())
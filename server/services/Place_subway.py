@@ -0,0 +1,144 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+from Place_geo import haversine_matrix, parse_coords
+
+sys.stdout.reconfigure(encoding="utf-8")
+
+# --- 가장 가까운 지하철역 조회 설정 ---
+# 역 목록 CSV 형식: name,line,lat,lng (역 이름은 '역' 없이, 환승역은 노선마다 한 줄)
+# 공공데이터포털 '전국도시철도역사정보표준데이터' CSV(역사명/노선명/역위도/역경도)도 그대로 읽습니다.
+# data/subway_stations.csv는 그 내보내기 파일로 바꿔 쓰면 됩니다: python Place_subway.py --import <표준데이터.csv>
+STATION_CSV = os.getenv(
+    "SUBWAY_STATION_CSV",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "subway_stations.csv"),
+)
+MAX_WALK_KM = float(os.getenv("SUBWAY_MAX_WALK_KM", "1.5"))  # 이보다 멀면 '없음'
+WALK_DETOUR = 1.3  # 직선 거리 → 도보 거리 보정 계수
+WALK_METERS_PER_MINUTE = 67  # 약 4 km/h
+
+
+class StationLookup:
+    """역 좌표를 라디안 배열로 미리 올려 두고, 계획 안의 모든 좌표를 한 번의 거리 행렬로 조회합니다.
+
+    역 수(수백~천여 개) × 계획 항목 수(수십 개) 정도라 격자 없이 행렬 한 번이면 충분합니다.
+    환승역은 노선별 행을 역 이름 하나로 묶어 "노선1/노선2"로 표시합니다.
+    """
+
+    def __init__(self, df_stations):
+        grouped = (
+            df_stations.groupby("name", sort=False)
+            .agg(line=("line", lambda s: "/".join(dict.fromkeys(s.astype(str)))), lat=("lat", "mean"), lng=("lng", "mean"))
+            .reset_index()
+        )
+        self.names = grouped["name"].astype(str).to_numpy()
+        self.lines = grouped["line"].to_numpy()
+        self.lat = grouped["lat"].to_numpy(dtype=np.float64)
+        self.lng = grouped["lng"].to_numpy(dtype=np.float64)
+
+    def __len__(self):
+        return len(self.names)
+
+    def nearest(self, lat, lng):
+        """좌표 배열에 대해 (가장 가까운 역 인덱스 배열, 직선 거리 km 배열)을 반환합니다."""
+        dist = haversine_matrix(lat, lng, self.lat, self.lng)
+        idx = dist.argmin(axis=1)
+        return idx, dist[np.arange(len(idx)), idx]
+
+
+STANDARD_COLUMNS = {"역사명": "name", "노선명": "line", "역위도": "lat", "역경도": "lng"}
+
+
+def read_station_csv(path):
+    """역 목록 CSV를 name,line,lat,lng df로 읽습니다. (표준데이터 컬럼명/CP949 인코딩도 허용)"""
+    for encoding in ("utf-8-sig", "cp949"):
+        try:
+            df_stations = pd.read_csv(path, encoding=encoding, dtype=str)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError(f"역 목록 인코딩을 알 수 없습니다: {path}")
+    df_stations = df_stations.rename(columns=STANDARD_COLUMNS)[["name", "line", "lat", "lng"]]
+    df_stations["name"] = df_stations["name"].str.strip().str.replace(r"역$", "", regex=True)
+    df_stations["line"] = df_stations["line"].str.strip()
+    df_stations["lat"] = pd.to_numeric(df_stations["lat"], errors="coerce")
+    df_stations["lng"] = pd.to_numeric(df_stations["lng"], errors="coerce")
+    df_stations = df_stations.dropna(subset=["name", "lat", "lng"])
+    return df_stations.drop_duplicates(subset=["name", "line"]).reset_index(drop=True)
+
+
+def load_station_lookup(path=STATION_CSV):
+    return StationLookup(read_station_csv(path))
+
+
+_lookup = None
+
+def get_station_lookup():
+    """프로세스당 한 번 역 목록을 읽습니다. 파일이 없으면 None."""
+    global _lookup
+    if _lookup is None:
+        if not os.path.exists(STATION_CSV):
+            print(f"⚠️ 지하철역 목록이 없어 가장 가까운 역을 채우지 않습니다: {STATION_CSV}")
+            return None
+        _lookup = load_station_lookup()
+    return _lookup
+
+
+def _plan_items(days):
+    for day in days:
+        for item in day.get("places") or []:
+            if isinstance(item, dict):
+                yield item
+        if isinstance(day.get("accommodation"), dict):
+            yield day["accommodation"]
+
+
+def fill_closest_subway(days, lookup=None, max_walk_km=MAX_WALK_KM):
+    """일자 목록 안의 모든 장소/숙소에 closest_subway와 subway_walk_m(도보 거리 m)를 채웁니다. (제자리 수정)
+
+    closest_subway는 이 함수만 씁니다. 좌표가 없거나 역 목록에서 도보 max_walk_km 안의 역을 찾지 못하면
+    "없음"과 None으로 둡니다.
+    """
+    lookup = lookup if lookup is not None else get_station_lookup()
+    items = list(_plan_items(days))
+    coords = [parse_coords(item.get("coords")) for item in items]
+    located = [i for i, c in enumerate(coords) if c is not None]
+
+    for item in items:
+        item["closest_subway"] = "없음"
+        item["subway_walk_m"] = None
+    if lookup is None or not len(lookup) or not located:
+        return days
+
+    lat = np.array([coords[i][0] for i in located])
+    lng = np.array([coords[i][1] for i in located])
+    idx, dist_km = lookup.nearest(lat, lng)
+    walk_km = dist_km * WALK_DETOUR
+
+    for i, station, walk in zip(located, idx.tolist(), walk_km.tolist()):
+        if walk > max_walk_km:
+            continue
+        walk_m = int(round(walk * 1000, -1))
+        minutes = max(1, round(walk_m / WALK_METERS_PER_MINUTE))
+        items[i]["closest_subway"] = f"{lookup.names[station]}역 ({lookup.lines[station]}, 도보 약 {minutes}분)"
+        items[i]["subway_walk_m"] = walk_m
+    return days
+
+
+if __name__ == "__main__":
+    # 사용법: python Place_subway.py <위도> <경도>
+    #         python Place_subway.py --import <전국도시철도역사정보표준데이터.csv>
+    if len(sys.argv) == 3 and sys.argv[1] == "--import":
+        df_stations = read_station_csv(sys.argv[2])
+        df_stations.to_csv(STATION_CSV, index=False, encoding="utf-8")
+        print(f"✅ 역 {df_stations['name'].nunique()}곳 ({len(df_stations)}행) 저장: {STATION_CSV}")
+        sys.exit(0)
+    lookup = load_station_lookup()
+    if len(sys.argv) != 3:
+        print(f"역 {len(lookup)}곳 ({STATION_CSV})")
+        sys.exit(0)
+    day = {"places": [{"coords": f"{sys.argv[1]}, {sys.argv[2]}"}]}
+    fill_closest_subway([day], lookup)
+    print(day["places"][0])
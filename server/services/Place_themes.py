@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+
+sys.stdout.reconfigure(encoding="utf-8")
+
+# --- 사용자 테마 → 장소 카테고리 해석 설정 ---
+# Place.category 라벨마다 Tour API 대분류 코드(cat1)와 사용자가 입력할 법한 동의어를 둡니다.
+# PLACE_THEME_FILE(JSON, 같은 형식)이 있으면 라벨 단위로 덮어쓰거나 추가합니다.
+PLACE_THEME_FILE = os.getenv(
+    "PLACE_THEME_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "theme_synonyms.json"),
+)
+THEME_TABLE = {
+    "카페": {"codes": [], "synonyms": ["커피", "디저트", "베이커리", "cafe"]},
+    "맛집": {"codes": ["A05"], "synonyms": ["음식", "음식점", "식당", "먹거리", "미식", "food"]},
+    "자연": {"codes": ["A01"], "synonyms": ["자연경관", "산", "바다", "해변", "공원", "nature"]},
+    "역사/문화": {"codes": ["A02"], "synonyms": ["역사", "문화", "박물관", "유적", "전통", "culture"]},
+    "쇼핑": {"codes": ["A04"], "synonyms": ["시장", "백화점", "shopping"]},
+    # A03(레포츠)은 수집 데이터 중 캠핑 데이터셋에만 쓰입니다. (Tripdata_to_df_save.DATASETS)
+    "캠핑": {"codes": ["A03"], "synonyms": ["캠핑장", "글램핑", "차박", "camping"]},
+    "숙소": {"codes": ["B02"], "synonyms": ["숙박", "호텔", "펜션", "모텔", "리조트", "게스트하우스", "hotel"]},
+}
+WEIGHT_SEPARATOR = ":"  # "맛집:2,자연" → 맛집 2 : 자연 1 비율로 후보를 섞음
+
+
+def load_theme_table(path=PLACE_THEME_FILE):
+    table = {label: dict(entry) for label, entry in THEME_TABLE.items()}
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            table.update(json.load(f))
+    return table
+
+
+def _key(theme):
+    return str(theme).strip().lower()
+
+
+class ThemeResolver:
+    """사용자 테마(동의어 포함)를 카테고리 라벨/코드 집합으로 한 번에 바꿉니다.
+
+    - 라벨 이름, 동의어, Tour API 코드(A05 등) 어느 것으로 입력해도 같은 라벨로 해석
+    - 표에 없는 테마는 기존 규칙대로 '라벨에 테마 문자열이 포함되면 일치'로 처리
+    """
+
+    def __init__(self, table=None):
+        self.table = table if table is not None else load_theme_table()
+        self.aliases = {}   # 입력 문자열(소문자) → 라벨
+        self.codes = {}     # Tour API 코드 → 라벨
+        for label, entry in self.table.items():
+            self.aliases[_key(label)] = label
+            for synonym in entry.get("synonyms", ()):
+                self.aliases.setdefault(_key(synonym), label)
+            for code in entry.get("codes", ()):
+                self.codes[code] = label
+                self.aliases.setdefault(_key(code), label)
+
+    def canonical(self, theme):
+        """테마 하나의 라벨. 표에 없으면 None."""
+        return self.aliases.get(_key(theme))
+
+    def label_of(self, category):
+        """카테고리 값(라벨 또는 Tour API 코드)을 라벨로 바꿉니다."""
+        return self.codes.get(category, category)
+
+    def matches(self, category, themes):
+        """카테고리 값 하나가 테마 목록 중 하나와 일치하는지."""
+        if category is None:
+            return False
+        label = self.label_of(str(category))
+        for theme in themes:
+            canonical = self.canonical(theme)
+            if canonical is not None and canonical == label:
+                return True
+            if canonical is None and str(theme) in label:
+                return True
+        return False
+
+    def category_codes(self, categories, themes):
+        """Categorical의 카테고리 목록(categories)에서 테마와 일치하는 코드(위치) 집합."""
+        return frozenset(i for i, category in enumerate(categories) if self.matches(category, themes))
+
+    def mask(self, series, themes):
+        """series(카테고리 컬럼)의 행별 일치 여부. 카테고리 목록에서 한 번 해석한 뒤 isin으로 적용합니다."""
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype("category")
+        codes = np.fromiter(self.category_codes(series.cat.categories, themes), dtype=np.int64)
+        return np.isin(series.cat.codes.to_numpy(), codes)
+
+
+_resolver = None
+
+def get_theme_resolver():
+    """프로세스당 한 번 테마 표를 읽습니다."""
+    global _resolver
+    if _resolver is None:
+        _resolver = ThemeResolver()
+    return _resolver
+
+
+def parse_theme_weights(text, resolver=None):
+    """"맛집:2, 자연" 형식의 테마 문자열 → (테마 목록, {라벨: 비중}).
+
+    비중을 적지 않은 테마는 1이며, 모두 1이면 비중 dict는 비어 있습니다. (기존 요청과 같은 동작)
+    """
+    resolver = resolver or get_theme_resolver()
+    themes, weights = [], {}
+    for part in str(text).split(","):
+        theme, _, weight = part.partition(WEIGHT_SEPARATOR)
+        theme = theme.strip()
+        themes.append(theme)
+        if not theme:
+            continue
+        try:
+            value = float(weight) if weight.strip() else 1.0
+        except ValueError:
+            value = 1.0
+        weights[resolver.canonical(theme) or theme] = max(value, 0.0)
+    if all(value == 1.0 for value in weights.values()):
+        weights = {}
+    return themes, weights
+
+
+# --- 마이크로 벤치마크: 행별 .apply 부분 문자열 검사 vs 카테고리 해석 + isin ---
+def run_benchmark(df, theme_sets=(["맛집", "카페"], ["자연"], ["역사/문화", "쇼핑"], ["숙소"], ["음식", "호텔"]), repeat=20):
+    resolver = ThemeResolver()
+    category = df["category"]
+    as_object = category.astype(object)
+    print(f"장소 {len(df)}건, 테마 조합별 {repeat}회 반복")
+    print(f"{'테마':<20}{'.apply(ms)':>12}{'isin(ms)':>12}{'배수':>8}{'기존 일치':>10}{'새 일치':>10}")
+    for themes in theme_sets:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            legacy = as_object.apply(lambda x: any(t in str(x) for t in themes) if pd.notna(x) else False).to_numpy()
+        legacy_ms = (time.perf_counter() - start) / repeat * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            resolved = resolver.mask(category, themes)
+        resolved_ms = (time.perf_counter() - start) / repeat * 1000
+
+        print(f"{','.join(themes):<20}{legacy_ms:>12.2f}{resolved_ms:>12.3f}{legacy_ms / max(resolved_ms, 1e-9):>8.0f}"
+              f"{int(legacy.sum()):>10}{int(resolved.sum()):>10}")
+
+
+if __name__ == "__main__":
+    # 사용법: python Place_themes.py [테마 ...]  (인자 없이 실행하면 전체 카탈로그로 벤치마크)
+    if len(sys.argv) > 1:
+        resolver = get_theme_resolver()
+        for theme in sys.argv[1:]:
+            print(f"{theme} → {resolver.canonical(theme) or '(표에 없음: 부분 문자열 일치)'}")
+        sys.exit(0)
+    from Place_index import _load_benchmark_df
+    run_benchmark(_load_benchmark_df())
@@ -0,0 +1,29 @@
+import time
+import threading
+
+# --- 공용 호출 속도 제한 ---
+# Tour API 수집(Tripdata_to_df_save.py)과 계획 배치(TripPlan_batch.py)의 Gemini 호출이 같이 씁니다.
+# 환경 변수나 .env를 읽지 않으므로 어디서든 부작용 없이 가져올 수 있습니다.
+
+
+class TokenBucket:
+    """초당 rate개씩 토큰이 차는 버킷. acquire()는 토큰이 생길 때까지 기다립니다. (스레드 안전)"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
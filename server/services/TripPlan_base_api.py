@@ -1,30 +1,64 @@
 import pandas as pd
+import numpy as np
 import os
 import sys
+import time
 from datetime import datetime
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
 import json
+import copy
 import requests
 from pymongo import MongoClient
+from Place_snapshot import snapshot_exists, load_snapshot
+from Place_index import get_place_index
+from Place_catalog import compact_frame, iter_place_records
+from Place_spatial import get_spatial_index
+from Place_subway import fill_closest_subway
+from Place_themes import get_theme_resolver, parse_theme_weights
+from TripPlan_cache import open_plan_cache
+from TripPlan_candidates import apply_prompt_budget, estimate_tokens
+from TripPlan_optimizer import build_local_plan, valid_coords, MIN_PLACES_PER_DAY
+from TripPlan_stream import TravelPlanStreamParser
+from TripPlan_validate import PlanValidator, unused_candidates
+from TripPlan_parallel import partition_candidates, run_days_concurrently, normalize_day_plan
+from TripPlan_trace import span, request_scope, profiled
+from TripPlan_routing import attach_routes
+from TripPlan_costs import prefilter_by_budget, PlanCostModel
 
 sys.stdout.reconfigure(encoding="utf-8")
 print("ARGV:", sys.argv)
 load_dotenv()
 CONNECTION_STRING = os.getenv("DBURL")
 API_KEY = os.getenv("GOOGLE_API")
-client = genai.Client(api_key=API_KEY)
 MODEL_NAME = "gemini-2.5-flash"
+# Gemini 클라이언트는 첫 호출 때 만듭니다. (API 키 없이 import 가능, 벤치마크에서는 재생용 클라이언트로 교체)
+client = None
+# llm: Gemini가 전체 일정 작성 / local: 로컬 최적화만 사용 (Gemini 호출 없음)
+# hybrid: 로컬 최적화로 만든 일정에 Gemini가 제목/설명만 작성
+# split: 후보를 일자별로 나눠 일자별 일정을 병렬 요청 (장기 여행용)
+PLAN_MODES = ("llm", "local", "hybrid", "split")
+DEFAULT_PLAN_MODE = os.getenv("PLAN_MODE", "llm")
+# 시군구 경계 밖 N km 안의 장소도 후보에 포함 (0이면 시군구 안만)
+DISTRICT_BUFFER_KM = float(os.getenv("DISTRICT_BUFFER_KM", "0"))
+# local/hybrid 모드에서 일자 동선 중심 기준으로 숙소를 찾는 최대 거리 (km)
+ACCOMMODATION_SEARCH_KM = float(os.getenv("ACCOMMODATION_SEARCH_KM", "5"))
+# 검증에 실패한 일자만 Gemini에 다시 요청하는 최대 횟수
+PLAN_VALIDATION_RETRIES = int(os.getenv("PLAN_VALIDATION_RETRIES", "1"))
+
+
+def get_client():
+    global client
+    if client is None:
+        client = genai.Client(api_key=API_KEY)
+    return client
 
 
 # --- 1. tripdata 불러오기 ---
 
-client_m = MongoClient(CONNECTION_STRING)
 DATABASE = "ProjectData"
 COLLECTION_PLACE = "place"
-db = client_m[DATABASE]
-collection = db[COLLECTION_PLACE]
 
 projection = {
     # 1. 원하는 최상위 필드
@@ -37,24 +71,69 @@ projection = {
     
     # 3. 원하는 중첩 필드 (coordinates 객체 내의 coordinates 배열)
     "coordinates.coordinates": 1,
+
+    # 4. 후보 축소 시 인기도 순위에 사용하는 통계
+    "stats.rating": 1,
+    "stats.bookmarkCount": 1,
+
+    # 5. 로컬 비용 모델의 1인(숙소는 1박 1실) 평균 비용 (TripPlan_costs.py)
+    "averageCost": 1,
     
-    # 4. 기본으로 포함되는 _id 필드는 제외
+    # 6. 기본으로 포함되는 _id 필드는 제외
     "_id": 0 
 }
 
-cursor = collection.find({}, projection)
-data_list = list(cursor)
+def load_place_data():
+    """MongoDB place 컬렉션을 읽어 title/category/city/district/x/y DataFrame을 만듭니다.
+    
+    프로세스당 한 번만 호출하고, 워커 모드(--serve)에서는 이 결과를 모든 요청에 재사용합니다.
+    `python Place_snapshot.py build`로 만든 스냅샷이 있으면 Mongo 전체 조회 대신 스냅샷을 mmap으로 읽습니다.
+    """
+    if snapshot_exists():
+        with span("snapshot_load") as s:
+            df = load_snapshot()
+            s["rows"] = len(df)
+        print(f"✅ 장소 스냅샷 로드 (version: {df.attrs['snapshot_version']}, {len(df)}건)")
+        return df
+
+    with span("mongo_load") as s:
+        client_m = MongoClient(CONNECTION_STRING)
+        collection = client_m[DATABASE][COLLECTION_PLACE]
+
+        cursor = collection.find({"isActive": {"$ne": False}}, projection)
+        data_list = list(cursor)
+        client_m.close()
+        s["docs"] = len(data_list)
 
-df = pd.DataFrame(data_list)
-df['city'] = df['address'].apply(lambda x: x.get('city'))
-df['district'] = df['address'].apply(lambda x: x.get('district'))
-df['x'] = df['coordinates'].apply(lambda x: x.get('coordinates')[0])
-df['y'] = df['coordinates'].apply(lambda x: x.get('coordinates')[1])
+    with span("df_build") as s:
+        df = _build_place_frame(data_list)
+        s["rows"] = len(df)
 
-df = df.drop('address', axis=1)
-df = df.drop('coordinates', axis=1)
+    print(df.head(1))
+    return df
 
-print(df.head(1))
+def _build_place_frame(data_list):
+    """Mongo 문서 목록 → 플래너용 DataFrame (중첩 필드 펼치기 + compact_frame)."""
+    df = pd.DataFrame(data_list)
+    df['city'] = df['address'].apply(lambda x: x.get('city'))
+    df['district'] = df['address'].apply(lambda x: x.get('district'))
+    df['x'] = df['coordinates'].apply(lambda x: x.get('coordinates')[0])
+    df['y'] = df['coordinates'].apply(lambda x: x.get('coordinates')[1])
+
+    if 'stats' in df:
+        df['rating'] = df['stats'].apply(lambda x: x.get('rating', 0) if isinstance(x, dict) else 0)
+        df['bookmarkCount'] = df['stats'].apply(lambda x: x.get('bookmarkCount', 0) if isinstance(x, dict) else 0)
+        df = df.drop('stats', axis=1)
+
+    if 'averageCost' in df:
+        df['averageCost'] = pd.to_numeric(df['averageCost'], errors="coerce").fillna(0).astype(np.int32)
+
+    df = df.drop('address', axis=1)
+    df = df.drop('coordinates', axis=1)
+
+    # city/district/category는 Categorical, 좌표는 float32로 (행마다 str 객체를 들고 있지 않도록)
+    df = compact_frame(df)
+    return df
 
 # def main():
 #     input_data = sys.stdin.read()
@@ -67,11 +146,19 @@ print(df.head(1))
 #     main()
 
 # --- 2. 사용자 입력 받기 (수정됨: 숙소 테마 자동 결정) ---
+class TripPlanError(Exception):
+    """입력 오류나 후보 부족처럼 여행 계획을 만들 수 없는 경우에 발생합니다."""
+
+
 def get_user_inputs():
     """사용자로부터 여행 계획에 필요한 정보를 입력받고, 장소 테마에 따라 숙소 테마를 자동 결정합니다."""
     
     input_data = sys.stdin.read()
     user_input = json.loads(input_data)
+    return parse_user_inputs(user_input)
+
+def parse_user_inputs(user_input):
+    """stdin/워커 요청으로 받은 JSON(dict)을 여행 계획용 user_info로 변환합니다."""
     
     start_loc = user_input["start_loc"]
     # city 값은 tripdata['city'].unique()에서 확인하여 입력하는 것을 권장합니다.
@@ -79,41 +166,54 @@ def get_user_inputs():
     district = user_input["detail_addr"]
     
     # 날짜 입력 및 기간 계산
-    while True:
-        try:
-            start_date_str = user_input["start_date"]
-            end_date_str = user_input["end_date"]
-            start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-            end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
-            
-            if start_date > end_date:
-                print("❌ 오류: 시작 날짜는 마지막 날짜보다 빠를 수 없습니다. 다시 입력해 주세요.")
-                continue
-            
-            duration = (end_date - start_date).days + 1
-            break
-        except ValueError:
-            print("❌ 오류: 날짜 형식이 올바르지 않습니다 (YYYY-MM-DD). 다시 입력해 주세요.")
-
     try:
-        budget = user_input["budget_per_person"]
-        people = user_input["total_people"]
+        start_date_str = user_input["start_date"]
+        end_date_str = user_input["end_date"]
+        start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
+        end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
     except ValueError:
-        print("❌ 오류: 예산과 인원수는 숫자로 입력해야 합니다. 프로그램을 다시 시작해 주세요.")
-        exit()
+        raise TripPlanError("❌ 오류: 날짜 형식이 올바르지 않습니다 (YYYY-MM-DD). 다시 입력해 주세요.")
+
+    if start_date > end_date:
+        raise TripPlanError("❌ 오류: 시작 날짜는 마지막 날짜보다 빠를 수 없습니다. 다시 입력해 주세요.")
+
+    duration = (end_date - start_date).days + 1
+
+    try:
+        budget = int(user_input["budget_per_person"])
+        people = int(user_input["total_people"])
+    except (KeyError, TypeError, ValueError):
+        # 클라이언트의 parseInt 결과가 NaN이면 JSON으로는 null이 옵니다.
+        raise TripPlanError("❌ 오류: 예산과 인원수는 숫자로 입력해야 합니다. 프로그램을 다시 시작해 주세요.")
+    if budget <= 0 or people <= 0:
+        raise TripPlanError("❌ 오류: 예산과 인원수는 0보다 커야 합니다.")
         
-    # 🌟 장소 테마 입력 받기 🌟
+    # 🌟 장소 테마 입력 받기 🌟 ("맛집:2,자연"처럼 테마별 비중을 붙일 수 있음)
     place_theme = user_input["place_themes"]
-    place_themes_list = [t.strip() for t in place_theme.split(',')]
+    place_themes_list, theme_weights = parse_theme_weights(place_theme)
     
     # 🌟 숙소 테마 자동 결정 (수정된 로직) 🌟
-    # 장소 테마에 '캠핑'이 있으면 숙소 테마를 '캠핑'으로 설정, 아니면 '숙소'로 설정
-    if '캠핑' in place_themes_list:
+    # 장소 테마에 '캠핑'(동의어 포함)이 있으면 숙소 테마를 '캠핑'으로 설정, 아니면 '숙소'로 설정
+    resolver = get_theme_resolver()
+    if '캠핑' in [resolver.canonical(t) or t for t in place_themes_list]:
         accommodation_theme = "캠핑"
     else:
         accommodation_theme = "숙소"
         
     print(f"\n[자동 설정된 숙소 테마]: {accommodation_theme}")
+
+    plan_mode = user_input.get("plan_mode") or DEFAULT_PLAN_MODE
+    if plan_mode not in PLAN_MODES:
+        raise TripPlanError(f"❌ 오류: 지원하지 않는 계획 모드입니다: {plan_mode} ({', '.join(PLAN_MODES)})")
+
+    try:
+        # 0은 '주변 검색 끔'이므로 값이 없을 때(None)만 기본값을 씁니다.
+        buffer_km = user_input.get("buffer_km")
+        buffer_km = float(DISTRICT_BUFFER_KM if buffer_km is None else buffer_km)
+    except (TypeError, ValueError):
+        raise TripPlanError("❌ 오류: 주변 검색 거리(buffer_km)는 숫자로 입력해야 합니다.")
+    if buffer_km < 0:
+        raise TripPlanError("❌ 오류: 주변 검색 거리(buffer_km)는 0 이상이어야 합니다.")
     
     return {
         "start_loc": start_loc,
@@ -125,77 +225,134 @@ def get_user_inputs():
         "budget_per_person": budget,
         "total_people": people,
         "place_themes": place_themes_list, # 장소 테마
+        "theme_weights": theme_weights, # 테마별 후보 비중 {라벨: 비중} (모두 같으면 빈 dict)
         "accommodation_theme": accommodation_theme, # 숙소 테마 (자동 결정 값 사용)
+        "plan_mode": plan_mode,
+        "buffer_km": buffer_km, # 시군구 주변 후보 포함 거리 (km)
         "userid": user_input["userId"]
     }
 
-# --- 3. 데이터 필터링 및 전처리 (수정 없음, 'accommodation_theme' 변수 사용 로직 유지) ---
+# --- 3. 데이터 필터링 및 전처리 (PlaceIndex 조회로 후보 선택, 'accommodation_theme' 변수 사용 로직 유지) ---
 def filter_and_format_data(df, end_city, district, place_themes, accommodation_theme):
     """장소는 사용자가 입력한 테마로, 숙소는 결정된 숙소 테마로 분리하여 필터링합니다."""
     
-    # 1. 지역 필터링 (공통)
-    df_city = df[(df['city'] == end_city) & (df['district'] == district)].copy()
+    candidates = filter_candidates(df, end_city, district, place_themes, accommodation_theme)
+    if candidates is None:
+        return None
+    df_places, df_accommodations = candidates
+    return format_candidates(df_places), format_candidates(df_accommodations)
+
+def filter_candidates(df, end_city, district, place_themes, accommodation_theme, buffer_km=0, theme_weights=None):
+    """장소/숙소 후보 DataFrame 두 개를 반환합니다. 지역에 데이터가 없으면 None.
+    
+    buffer_km > 0 이면 시군구 장소들로부터 buffer_km 안에 있는 이웃 지역 장소/숙소도 후보에 넣습니다.
+    theme_weights가 있으면 후보를 줄일 때 테마별 비중대로 섞습니다.
+    """
+    
+    # 1. 지역 필터링 (공통) - 로드 시 한 번 만든 (city, district, category) 인덱스를 조회
+    index = get_place_index(df)
+    selected = index.select(end_city, district, place_themes, accommodation_theme)
     
-    if df_city.empty:
+    if selected is None:
         print(f"\n❌ 오류: '{end_city}' 지역에 해당하는 장소를 찾을 수 없습니다. 조건을 다시 확인해 주세요.")
         return None
 
-    # 2. 장소 목록 필터링 (city + place_themes 사용)
-    if place_themes and place_themes != ['']:
-        # 2-1. 장소 후보 마스크 (place_themes에 포함)
-        place_candidate_mask = df_city['category'].apply(
-            lambda x: any(theme in str(x) for theme in place_themes) if pd.notna(x) else False
+    # 2. 장소 목록: 테마 카테고리에 속하면서 숙소 테마가 아닌 것
+    # 3. 숙소 목록: 결정된 accommodation_theme(예: '캠핑' 또는 '숙소') 카테고리
+    place_positions, accommodation_positions = selected
+
+    # 2-1. 시군구 + N km 버퍼: 경계 근처의 이웃 시군구 후보를 공간 인덱스로 추가
+    if buffer_km > 0:
+        spatial = get_spatial_index(df)
+        area_positions = index.area_positions(end_city, district)
+        place_codes, accommodation_codes = index.candidate_category_codes(place_themes, accommodation_theme)
+        place_positions = np.union1d(place_positions, spatial.buffer(area_positions, buffer_km, place_codes))
+        accommodation_positions = np.union1d(
+            accommodation_positions, spatial.buffer(area_positions, buffer_km, accommodation_codes)
         )
-    else:
-        # 장소 테마가 없으면, 지역 내 모든 항목을 후보로 설정
-        place_candidate_mask = df_city['title'].apply(lambda x: True)
-    
-    # 2-2. 숙소 테마를 제외한 순수 장소 목록 필터링
-    # accommodation_theme(예: '숙소', '캠핑')를 포함하지 않는 항목만 선택
-    accommodation_exclusion_mask = df_city['category'].apply(
-        lambda x: accommodation_theme not in str(x) if pd.notna(x) else True 
-    )
-    
-    # 최종 장소 마스크: 장소 후보이면서 숙소 테마가 아닌 것
-    final_place_mask = place_candidate_mask & accommodation_exclusion_mask
-    df_places = df_city[final_place_mask].copy()
 
-    # 3. 숙소 목록 필터링 (city + accommodation_theme 변수 사용)
-    # 결정된 accommodation_theme 변수 값(예: '캠핑' 또는 '숙소')으로 필터링
-    accommodation_mask = df_city['category'].apply(
-        lambda x: accommodation_theme in str(x) if pd.notna(x) else False
-    )
-    df_accommodations = df_city[accommodation_mask].copy()
-    
-    # 4. Gemini에게 전달할 데이터 형식화
-    
-    # 4-1. 장소 후보 목록 형식화 (기존 로직 유지)
-    formatted_places = []
-    if not df_places.empty:
-        places_data = df_places[[ 'title', 'y', 'x' ]].fillna("없음").to_dict('records')
-        for p in places_data:
-            details = (
-                f"이름: {p['title']}, "
-                f"좌표: {p['y']}, {p['x']}" 
-            )
-            formatted_places.append(details)
+    df_places = df.iloc[place_positions]
+    df_accommodations = df.iloc[accommodation_positions]
+
+    # 3-1. 프롬프트 토큰 예산에 맞춰 후보 축소 (테마 균형 + 좌표 격자 분산 + 평점/북마크 순위)
+    total_candidates = len(df_places) + len(df_accommodations)
+    with span("prompt_budget", before=total_candidates) as s:
+        df_places, df_accommodations = apply_prompt_budget(
+            df_places, df_accommodations, theme_weights=theme_weights
+        )
+        s["after"] = len(df_places) + len(df_accommodations)
+    if len(df_places) + len(df_accommodations) < total_candidates:
+        print(f"\n✂️ 후보 축소: {total_candidates}개 → 장소 {len(df_places)}개, 숙소 {len(df_accommodations)}개")
+
+    return df_places, df_accommodations
+
+def nearest_stay_finder(df, accommodation_theme, max_km=ACCOMMODATION_SEARCH_KM):
+    """(위도, 경도) → 전체 장소 중 max_km 안에서 가장 가까운 숙소 행(없으면 None)을 찾는 함수를 만듭니다."""
+    spatial = get_spatial_index(df)
+    _, accommodation_codes = get_place_index(df).candidate_category_codes([''], accommodation_theme)
+
+    def find(lat, lng):
+        positions, _ = spatial.nearest(lat, lng, 1, accommodation_codes, max_km=max_km)
+        return df.iloc[int(positions[0])] if len(positions) else None
+    return find
 
-    # 4-2. 숙소 후보 목록 형식화 (기존 로직 유지)
-    formatted_accommodations = []
-    if not df_accommodations.empty:
-        accommodation_data = df_accommodations[[ 'title', 'y', 'x' ]].fillna("없음").to_dict('records')
-        for a in accommodation_data:
+def format_candidates(df_part):
+    """Gemini에게 전달할 후보 목록 형식화 ("이름: ..., 좌표: 위도, 경도")."""
+    formatted = []
+    if not df_part.empty:
+        # 프롬프트에 들어가는 소수의 행만 PlaceRecord(__slots__)로 꺼냅니다. (좌표는 소수점 6자리)
+        for p in iter_place_records(df_part):
             details = (
-                f"이름: {a['title']}, "
-                f"좌표: {a['y']}, {a['x']}"
+                f"이름: {p.title}, "
+                f"좌표: {p.coords}" 
             )
-            formatted_accommodations.append(details)
+            formatted.append(details)
+    return formatted
 
-    return formatted_places, formatted_accommodations
+def _prompt_fields(prompt, places_data, accommodation_data):
+    """추적 기록용 프롬프트 크기 + 후보 수."""
+    return {
+        "chars": len(prompt),
+        "tokens": estimate_tokens(prompt),
+        "places": len(places_data),
+        "accommodations": len(accommodation_data),
+    }
+
+# --- 4-0. 응답 JSON 스키마 (일괄 생성 / 일자별 병렬 생성 공용) ---
+def build_daily_plan_schema():
+    """하루 일정(day, places, accommodation) 응답 스키마를 만듭니다."""
+    
+    # 1. 장소/숙소 상세 정보 스키마
+    LocationDetails_schema = types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "name": types.Schema(type=types.Type.STRING),
+            "description": types.Schema(type=types.Type.STRING),
+            "coords": types.Schema(type=types.Type.STRING, description="위도, 경도 문자열 (예: 37.5665, 126.9780)"),
+            "estimated_cost": types.Schema(type=types.Type.INTEGER, description="총 소비 금액 (원)")
+        },
+        required=["name", "description", "coords", "estimated_cost"]
+    )
+
+    # 2. 하루 일정 스키마 (day, places, accommodation 포함)
+    DailyPlan_schema = types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "day": types.Schema(type=types.Type.INTEGER, description="여행 일차 (1, 2, 3...)"),
+            "places": types.Schema(
+                type=types.Type.ARRAY,
+                description="그날 방문할 장소 목록.",
+                items=LocationDetails_schema
+            ),
+            "accommodation": LocationDetails_schema
+        },
+        required=["day", "places", "accommodation"]
+    )
+    return DailyPlan_schema
 
 # --- 4. Gemini API 호출 함수 (수정 없음, 기존 JSON 구조 스키마 유지) ---
-def generate_travel_plan(user_info, places_data, accommodation_data):
-    """Gemini API를 호출하여 여행 계획을 생성합니다."""
+def build_travel_plan_prompt(user_info, places_data, accommodation_data):
+    """전체 일정 생성(llm 모드) 프롬프트 문자열을 만듭니다."""
     
     # 전체 예산 계산
     total_budget = user_info['budget_per_person'] * user_info['total_people']
@@ -231,8 +388,7 @@ def generate_travel_plan(user_info, places_data, accommodation_data):
               "name": "장소 이름 (전체 후보 목록에서 선택)",
               "description": "창의적인 설명",
               "coords": "위도, 경도",
-              "estimated_cost": 50000,
-              "closest_subway": "가장 가까운 지하철역 이름 또는 없음"
+              "estimated_cost": 50000
             }},
             // ... day 1의 다른 장소 ...
           ],
@@ -240,8 +396,7 @@ def generate_travel_plan(user_info, places_data, accommodation_data):
             "name": "숙소 이름 (숙소 후보 목록에서 선택)",
             "description": "숙소 설명 (창의적으로 작성)",
             "coords": "숙소의 위도, 경도 (숙소 후보 목록에서 선택)",
-            "estimated_cost": 150000,
-            "closest_subway": "가장 가까운 지하철역 이름 또는 없음"
+            "estimated_cost": 150000
           }}
         }},
         // ... 2일차 계획은 "day": 2 객체로 추가 ...
@@ -253,47 +408,23 @@ def generate_travel_plan(user_info, places_data, accommodation_data):
     2. 배열 내 각 객체는 **'day' (숫자), 'places' (배열), 'accommodation' (객체)** 키를 가져야 합니다.
     3. 'places'의 'name' 및 'coords' 값은 반드시 [전체 장소 후보 목록]에서 가져와야 합니다.
     4. 'accommodation'의 'name' 및 'coords' 값은 반드시 [숙소 후보 목록]에서 가져와야 합니다.
-    5. **'closest_subway'** 값은 **'coords'**를 참고하여 **가장 가까운 지하철역 이름을 찾아 작성해야 합니다.** 가까운 지하철역이 없다면 **"없음"**으로 작성하세요.
-    6. 'estimated_cost'는 숫자 (integer) 형식으로만 작성해야 합니다.
-    7. 여행 시작날과 마지막날이 같다면 'day'는 1로 작성하고, 숙소이름은 "없음"으로 작성해주세요.
-    8. 일자 별 'places'는 최소 2개 최대 4개까지만 추천합니다. 일자 별 'accommodation'은 1개만 추천합니다.
+    5. 'estimated_cost'는 숫자 (integer) 형식으로만 작성해야 합니다.
+    6. 여행 시작날과 마지막날이 같다면 'day'는 1로 작성하고, 숙소이름은 "없음"으로 작성해주세요.
+    7. 일자 별 'places'는 최소 2개 최대 4개까지만 추천합니다. 일자 별 'accommodation'은 1개만 추천합니다.
 
 
     **최종 출력은 오직 요구된 JSON 형식이어야 합니다. 다른 텍스트는 포함하지 마세요.**
     """
+    return prompt
 
-    print("\n⏳ Gemini API에 여행 계획 생성을 요청 중입니다...")
+def build_travel_plan_config():
+    """전체 일정 생성(llm 모드) 응답 스키마 설정을 만듭니다."""
     
     # --- JSON 스키마 정의 ---
 
-    # 1. 장소/숙소 상세 정보 스키마
-    LocationDetails_schema = types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "name": types.Schema(type=types.Type.STRING),
-            "description": types.Schema(type=types.Type.STRING),
-            "coords": types.Schema(type=types.Type.STRING, description="위도, 경도 문자열 (예: 37.5665, 126.9780)"),
-            "estimated_cost": types.Schema(type=types.Type.INTEGER, description="총 소비 금액 (원)"),
-            "closest_subway": types.Schema(type=types.Type.STRING, description="가장 가까운 지하철역 이름 또는 '없음'")
-        },
-        required=["name", "description", "coords", "estimated_cost", "closest_subway"]
-    )
+    # 1~2. 장소/숙소 상세 정보 스키마 + 하루 일정 스키마 (일자별 병렬 생성과 공용)
+    DailyPlan_schema = build_daily_plan_schema()
 
-    # 2. 하루 일정 스키마 (day, places, accommodation 포함)
-    DailyPlan_schema = types.Schema(
-        type=types.Type.OBJECT,
-        properties={
-            "day": types.Schema(type=types.Type.INTEGER, description="여행 일차 (1, 2, 3...)"),
-            "places": types.Schema(
-                type=types.Type.ARRAY,
-                description="그날 방문할 장소 목록.",
-                items=LocationDetails_schema
-            ),
-            "accommodation": LocationDetails_schema
-        },
-        required=["day", "places", "accommodation"]
-    )
-    
     # 3. 최상위 travel_plan 스키마 (배열)
     travel_plan_schema = types.Schema(
         type=types.Type.ARRAY,
@@ -321,81 +452,521 @@ def generate_travel_plan(user_info, places_data, accommodation_data):
         )
     )
     # --- JSON 스키마 정의 끝 ---
+    return config
 
+def generate_travel_plan(user_info, places_data, accommodation_data, on_day=None):
+    """Gemini API를 호출하여 여행 계획을 생성합니다.
+    
+    on_day가 주어지면 스트리밍 호출을 사용하고, 'travel_plan'의 일자 객체가 완성될 때마다 on_day(day)를 호출합니다.
+    """
+    
+    with span("prompt_build", kind="plan") as s:
+        prompt = build_travel_plan_prompt(user_info, places_data, accommodation_data)
+        config = build_travel_plan_config()
+        s.update(_prompt_fields(prompt, places_data, accommodation_data))
+
+    print(f"\n📏 프롬프트 크기: {len(prompt)}자, 약 {estimate_tokens(prompt)} 토큰 (장소 후보 {len(places_data)}개, 숙소 후보 {len(accommodation_data)}개)")
+    print("\n⏳ Gemini API에 여행 계획 생성을 요청 중입니다...")
+
+    raw_text = ""
     try:
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt,
-            config=config,
-        )
+        with span("gemini_call", kind="plan", stream=on_day is not None) as s:
+            if on_day is None:
+                response = get_client().models.generate_content(
+                    model=MODEL_NAME,
+                    contents=prompt,
+                    config=config,
+                )
+                raw_text = response.text
+            else:
+                # 스트리밍: 일자 객체가 닫히는 즉시 전달하여 첫 일정이 보이기까지의 시간을 줄입니다.
+                started = time.perf_counter()
+                parser = TravelPlanStreamParser()
+                for chunk in get_client().models.generate_content_stream(
+                    model=MODEL_NAME,
+                    contents=prompt,
+                    config=config,
+                ):
+                    for day in parser.feed(chunk.text or ""):
+                        s.setdefault("first_day_ms", round((time.perf_counter() - started) * 1000, 2))
+                        on_day(day)
+                raw_text = parser.full_text()
+            s["response_chars"] = len(raw_text or "")
         
-        return json.loads(response.text)
+        with span("parse", kind="plan"):
+            return json.loads(raw_text)
         
     except json.JSONDecodeError:
         print("\n❌ JSON 파싱 오류: Gemini가 요청한 JSON 형식을 정확히 반환하지 못했습니다.")
-        print(f"\n[Gemini 응답 원문 (확인용)]:\n{response.text}")
+        print(f"\n[Gemini 응답 원문 (확인용)]:\n{raw_text}")
         return None
     except Exception as e:
         print(f"\n❌ Gemini API 호출 중 다른 오류가 발생했습니다: {e}")
         return None
 
-# --- 5. 메인 실행 로직 ---
-if __name__ == "__main__":
-    # 1. 사용자 입력 받기 (숙소 테마 자동 결정 포함)
-    user_info = get_user_inputs()
-    #    return {
-    #     "start_loc": start_loc,
-    #     "end_city": end_city,
-    #     "district": district,
-    #     "start_date": start_date_str,
-    #     "end_date": end_date_str,
-    #     "duration": duration,
-    #     "budget_per_person": budget,
-    #     "total_people": people,
-    #     "place_themes": place_themes_list, # 장소 테마
-    #     "accommodation_theme": accommodation_theme # 숙소 테마 (자동 결정 값 사용)
-    # }
-    
-    # 2. 데이터 필터링 및 형식화
-    # formatted_places, formatted_accommodations
-    filter_results = filter_and_format_data(
-        df, 
-        user_info['end_city'],
-        user_info['district'],
-        user_info['place_themes'], # 장소 테마 사용
-        user_info['accommodation_theme'] # 자동 결정된 숙소 테마 사용
+# --- 4-1. 로컬 일정에 설명만 덧붙이는 Gemini 호출 (hybrid 모드) ---
+def decorate_plan(user_info, plan):
+    """로컬 최적화로 만든 일정(장소/순서/숙소 고정)에 Gemini가 제목과 설명만 작성합니다.
+    
+    호출이 실패하면 로컬 일정을 그대로 반환합니다.
+    """
+    outline = [
+        {
+            "day": day["day"],
+            "places": [p["name"] for p in day["places"]],
+            "accommodation": day["accommodation"]["name"],
+        }
+        for day in plan["travel_plan"]
+    ]
+    prompt = f"""
+    당신은 전문 여행 플래너입니다. 아래 일정은 이미 장소와 방문 순서, 숙소가 확정되어 있습니다.
+    일정은 바꾸지 말고 여행 제목, 전체 설명, 그리고 각 장소/숙소의 창의적인 설명만 작성해 주세요.
+    사용자는 "{user_info['place_themes']}" 테마를 선호하며, 여행 인원은 {user_info['total_people']}명입니다.
+    
+    [확정된 일정]
+    {json.dumps(outline, ensure_ascii=False)}
+    
+    'days' 배열은 일정과 같은 순서여야 하고, 'place_descriptions'는 해당 일자 'places'와 같은 순서/개수여야 합니다.
+    숙소가 "없음"이면 'accommodation_description'은 빈 문자열로 작성하세요.
+    """
+
+    config = types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "title": types.Schema(type=types.Type.STRING),
+                "description": types.Schema(type=types.Type.STRING),
+                "days": types.Schema(
+                    type=types.Type.ARRAY,
+                    items=types.Schema(
+                        type=types.Type.OBJECT,
+                        properties={
+                            "day": types.Schema(type=types.Type.INTEGER),
+                            "place_descriptions": types.Schema(
+                                type=types.Type.ARRAY,
+                                items=types.Schema(type=types.Type.STRING),
+                            ),
+                            "accommodation_description": types.Schema(type=types.Type.STRING),
+                        },
+                        required=["day", "place_descriptions", "accommodation_description"],
+                    ),
+                ),
+            },
+            required=["title", "description", "days"],
+        ),
     )
-    if filter_results:
-        formatted_places, formatted_accommodations = filter_results
-        
-        # 숙소 후보가 없으면 오류 메시지 출력 후 종료
-        if not formatted_accommodations:
-            print(f"\n❌ 오류: '{user_info['end_city']}' 지역에서 '{user_info['accommodation_theme']}' 테마를 가진 항목을 찾을 수 없습니다. 숙소 없이 여행 계획을 진행할 수 없습니다.")
-        elif not formatted_places:
-            print(f"\n❌ 오류: '{user_info['end_city']}' 지역에 장소 후보가 없습니다.")
-        else:
-            # 3. Gemini API 호출
-            travel_plan_json = generate_travel_plan(
-                user_info,
-                formatted_places, 
-                formatted_accommodations
+
+    print("\n⏳ Gemini API에 일정 설명 작성을 요청 중입니다...")
+    try:
+        with span("gemini_call", kind="decorate", chars=len(prompt)) as s:
+            response = get_client().models.generate_content(model=MODEL_NAME, contents=prompt, config=config)
+            s["response_chars"] = len(response.text or "")
+        with span("parse", kind="decorate"):
+            decoration = json.loads(response.text)
+    except Exception as e:
+        print(f"\n⚠️ 설명 작성에 실패하여 로컬 일정을 그대로 사용합니다: {e}")
+        return plan
+
+    plan["title"] = decoration.get("title") or plan["title"]
+    plan["description"] = decoration.get("description") or plan["description"]
+    for day, text in zip(plan["travel_plan"], decoration.get("days", [])):
+        for place, description in zip(day["places"], text.get("place_descriptions", [])):
+            if description:
+                place["description"] = description
+        if text.get("accommodation_description") and day["accommodation"]["name"] != "없음":
+            day["accommodation"]["description"] = text["accommodation_description"]
+    return plan
+
+# --- 4-2. 일자별 병렬 생성 (split 모드) ---
+def generate_day_plan(user_info, day_number, is_last_day, places_data, accommodation_data):
+    """하루치 일정(DailyPlan_schema)만 Gemini에게 요청합니다. 실패 시 예외를 올려 재시도하게 합니다."""
+    
+    total_budget = user_info['budget_per_person'] * user_info['total_people']
+    if is_last_day:
+        accommodation_rule = '여행 마지막 날이므로 숙소 이름은 "없음", 좌표는 "없음", 비용은 0으로 작성하세요.'
+    else:
+        accommodation_rule = "'accommodation'의 'name' 및 'coords' 값은 반드시 [숙소 후보 목록]에서 가져와야 합니다."
+
+    prompt = f"""
+    당신은 전문 여행 플래너입니다. {user_info['duration']}일 여행 중 {day_number}일차 일정만 **JSON 형식**으로 작성해 주세요.
+    사용자는 "{user_info['place_themes']}" 테마의 장소를 선호하며, 여행 전체 예산은 {total_budget}원(하루 약 {total_budget // user_info['duration']}원), 여행 인원은 {user_info['total_people']}명입니다.
+    
+    [{day_number}일차 장소 후보 목록] (places에 사용)
+    {places_data}
+    
+    [숙소 후보 목록] (accommodation에 사용)
+    {accommodation_data}
+
+    [JSON 출력 요구사항]
+    1. 'day'는 {day_number}로 작성합니다.
+    2. 'places'의 'name' 및 'coords' 값은 반드시 [{day_number}일차 장소 후보 목록]에서 가져와야 하며, 최소 2개 최대 4개까지만 추천합니다.
+    3. {accommodation_rule}
+    4. 'estimated_cost'는 숫자 (integer) 형식으로만 작성해야 합니다.
+    """
+
+    config = types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=build_daily_plan_schema(),
+    )
+    with span("gemini_call", kind="day", day=day_number, **_prompt_fields(prompt, places_data, accommodation_data)) as s:
+        response = get_client().models.generate_content(model=MODEL_NAME, contents=prompt, config=config)
+        s["response_chars"] = len(response.text or "")
+    with span("parse", kind="day", day=day_number):
+        return json.loads(response.text)
+
+def generate_plan_summary(user_info, travel_plan):
+    """완성된 일자별 일정으로 여행 제목과 전체 설명만 짧게 요청합니다. 실패하면 기본 문구를 사용합니다."""
+    
+    outline = [{"day": d["day"], "places": [p.get("name") for p in d["places"]]} for d in travel_plan]
+    prompt = f"""
+    아래 {user_info['duration']}일 여행 일정({user_info['end_city']} {user_info['district']})에 어울리는
+    여행 제목(title)과 한두 문장의 전체 설명(description)을 JSON으로 작성해 주세요.
+    {json.dumps(outline, ensure_ascii=False)}
+    """
+    config = types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=types.Schema(
+            type=types.Type.OBJECT,
+            properties={
+                "title": types.Schema(type=types.Type.STRING),
+                "description": types.Schema(type=types.Type.STRING),
+            },
+            required=["title", "description"],
+        ),
+    )
+    try:
+        with span("gemini_call", kind="summary", chars=len(prompt)) as s:
+            response = get_client().models.generate_content(model=MODEL_NAME, contents=prompt, config=config)
+            s["response_chars"] = len(response.text or "")
+        return json.loads(response.text)
+    except Exception as e:
+        print(f"\n⚠️ 여행 제목/설명 생성에 실패하여 기본 문구를 사용합니다: {e}")
+        return {
+            "title": f"{user_info['end_city']} {user_info['district']} {user_info['duration']}일 여행",
+            "description": f"{', '.join(t for t in user_info['place_themes'] if t) or '자유'} 테마 여행 일정입니다.",
+        }
+
+def generate_travel_plan_parallel(user_info, df_places, df_accommodations, on_day=None):
+    """후보를 일자별 지리 그룹으로 나눈 뒤 일자별 계획을 동시에 요청하고 하나의 계획으로 합칩니다."""
+    
+    partitions = partition_candidates(df_places, df_accommodations, user_info['duration'])
+    if not partitions:
+        return None
+    last = len(partitions) - 1
+
+    def plan_day(i):
+        day_places, day_accommodations = partitions[i]
+        day_plan = generate_day_plan(
+            user_info, i + 1, i == last,
+            format_candidates(day_places), format_candidates(day_accommodations)
+        )
+        return normalize_day_plan(day_plan, i + 1)
+
+    def on_result(i, day_plan):
+        if on_day is not None:
+            on_day(day_plan)
+
+    print(f"\n⏳ Gemini API에 {len(partitions)}일치 일정을 병렬로 요청 중입니다...")
+    try:
+        travel_plan = run_days_concurrently(len(partitions), plan_day, on_result=on_result)
+    except Exception as e:
+        print(f"\n❌ 일자별 일정 생성에 실패했습니다: {e}")
+        return None
+
+    summary = generate_plan_summary(user_info, travel_plan)
+    return {
+        "title": summary.get("title"),
+        "description": summary.get("description"),
+        "travel_plan": travel_plan,
+    }
+
+# --- 5. 계획 생성 파이프라인 (CLI / 워커 공용) ---
+# --- 4-3. 응답 검증 + 깨진 일자만 재요청 (llm / split 모드) ---
+def validate_and_repair(user_info, plan, df_places, df_accommodations):
+    """Gemini 계획을 후보 목록 기준으로 고치고, 고칠 수 없는 일자만 일자별 프롬프트로 다시 요청합니다.
+
+    (고친 계획, 모델 응답에서 바뀐 일자 번호 집합)을 반환합니다.
+    (이름/좌표 맞춤, 중복·후보 밖 항목 제거, 마지막 날 숙소 제거, 재요청, 숙소 보충)
+    """
+    
+    validator = PlanValidator(user_info, df_places, df_accommodations)
+    plan, broken = validator.validate(plan)
+    print(f"\n🧹 응답 검증: {validator.summary()} / 문제 일자 {broken or '없음'}")
+
+    for attempt in range(1, PLAN_VALIDATION_RETRIES + 1):
+        if not broken:
+            break
+        print(f"\n🔧 {broken}일차만 다시 요청합니다. ({attempt}/{PLAN_VALIDATION_RETRIES})")
+
+        def repair(i):
+            number = broken[i]
+            used = validator.used_positions(plan, skip_day=number)
+            day_plan = generate_day_plan(
+                user_info, number, number == validator.duration,
+                format_candidates(unused_candidates(df_places, used)), format_candidates(df_accommodations)
             )
-            
-            # 4. 결과 출력
-            if travel_plan_json:
-                print("\n=============================================")
-                print("🎉 생성된 여행 계획 (JSON 형식) 🎉")
-                print("=============================================")
-                # 보기 좋게 JSON 출력
-                trip_plan_json = json.dumps(travel_plan_json, indent=4, ensure_ascii=False)
-                print(trip_plan_json)
-                print("=============================================")
-                file_path = "travel_plan.json"
-                try:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(travel_plan_json, f, ensure_ascii=False, indent=4)
-                    print(f"\n✅ 여행 계획이 '{file_path}' 파일로 저장되었습니다.")
-                except Exception as e:
-                    print(f"\n❌ 파일 저장 중 오류가 발생했습니다: {e}")
-            else:
-                print("\n여행 계획 생성에 실패했습니다.")
\ No newline at end of file
+            return validator.check_day(day_plan, number, used)
+
+        try:
+            repaired = run_days_concurrently(len(broken), repair)
+        except Exception as e:
+            print(f"\n⚠️ 일자 재요청에 실패했습니다: {e}")
+            break
+        for number, (day, problems) in zip(broken, repaired):
+            current = plan['travel_plan'][number - 1]
+            if len(day['places']) >= len(current['places']):
+                plan['travel_plan'][number - 1] = day
+                validator.changed_days.add(number)
+        # 동시에 고친 날끼리 장소가 겹칠 수 있으므로 전체를 다시 검사
+        plan, broken = validator.validate(plan)
+
+    for day in plan['travel_plan']:
+        validator.fill_missing_accommodation(day)
+    return plan, validator.changed_days
+
+def prepare_candidates(df, user_info):
+    """지역/테마 필터링 + 예산 사전 필터 + 후보 수 검사. (장소 df, 숙소 df)를 반환합니다.
+
+    계획을 만들 수 없는 조건(지역 없음, 숙소/장소 부족)이면 TripPlanError를 발생시킵니다.
+    """
+    # 1. 데이터 필터링
+    with span("filter") as s:
+        candidates = filter_candidates(
+            df, 
+            user_info['end_city'],
+            user_info['district'],
+            user_info['place_themes'], # 장소 테마 사용
+            user_info['accommodation_theme'], # 자동 결정된 숙소 테마 사용
+            buffer_km=user_info.get('buffer_km', 0),
+            theme_weights=user_info.get('theme_weights')
+        )
+        if candidates is not None:
+            s["places"], s["accommodations"] = len(candidates[0]), len(candidates[1])
+    if candidates is None:
+        raise TripPlanError(f"❌ 오류: '{user_info['end_city']}' 지역에 해당하는 장소를 찾을 수 없습니다.")
+
+    df_places, df_accommodations = candidates
+
+    # 1-1. 예산: 하루 예산 안에 들어갈 수 없는 후보를 미리 뺍니다.
+    with span("budget_filter") as s:
+        df_places, df_accommodations = prefilter_by_budget(df_places, df_accommodations, user_info)
+        s["places"], s["accommodations"] = len(df_places), len(df_accommodations)
+    
+    # 숙소 후보가 없으면 계획을 진행할 수 없습니다.
+    if df_accommodations.empty:
+        raise TripPlanError(f"❌ 오류: '{user_info['end_city']}' 지역에서 '{user_info['accommodation_theme']}' 테마를 가진 항목을 찾을 수 없습니다. 숙소 없이 여행 계획을 진행할 수 없습니다.")
+    if df_places.empty:
+        raise TripPlanError(f"❌ 오류: '{user_info['end_city']}' 지역에 장소 후보가 없습니다.")
+    # 하루 최소 장소 수를 모든 날에 채울 수 없으면 어느 모드로도 검증을 통과할 수 없습니다.
+    usable_places = len(valid_coords(df_places))
+    if usable_places < MIN_PLACES_PER_DAY * int(user_info['duration']):
+        raise TripPlanError(
+            f"❌ 오류: '{user_info['end_city']}' 지역의 장소 후보가 {usable_places}개뿐이라 "
+            f"{user_info['duration']}일 일정(하루 최소 {MIN_PLACES_PER_DAY}곳)을 만들 수 없습니다."
+        )
+    return df_places, df_accommodations
+
+def day_snapshot(day):
+    """내보낸 일자와 최종 일자를 비교하기 위한 직렬화 값."""
+    return json.dumps(day, ensure_ascii=False, sort_keys=True, default=str)
+
+def finish_plan(travel_plan_json, cost_model, on_day=None, streamed_days=None, changed_days=()):
+    """예산 맞춤 → 지하철역 → 이동 구간 후처리를 합니다. (제자리 수정)
+
+    on_day가 있으면 아직 내보내지 않은 일자와, 이미 내보냈지만 최종 내용이 보낸 내용(streamed_days의
+    day_snapshot)과 다르거나 검증(changed_days)·예산 맞춤으로 바뀐 일자를 (다시) 내보냅니다.
+    """
+    streamed_days = streamed_days or {}
+    # 2-5. 비용 검증: 합계가 예산을 넘으면 재요청 대신 더 싼 근처 숙소로 바꾸거나 비싼 장소를 뺍니다.
+    with span("budget") as s:
+        changed_days = set(changed_days) | cost_model.enforce(travel_plan_json)
+        s["within_budget"] = travel_plan_json['budget']['within_budget']
+        s["adjustments"] = len(travel_plan_json['budget']['adjustments'])
+    if on_day is not None:
+        for day in travel_plan_json['travel_plan']:
+            fill_closest_subway([day])
+            sent = streamed_days.get(day['day'])
+            if sent is None or day['day'] in changed_days or sent != day_snapshot(day):
+                on_day(day)
+
+    # 3. 후처리: 모든 장소/숙소의 가장 가까운 지하철역 + 도보 거리를 한 번에 계산
+    with span("subway"):
+        fill_closest_subway(travel_plan_json.get('travel_plan') or [])
+
+    # 4. 일자별 이동 구간(전날 숙소 → 장소들 → 숙소)의 거리/시간 + 합계 (좌표 쌍 LRU 캐시)
+    with span("routing"):
+        attach_routes(travel_plan_json.get('travel_plan') or [])
+    return travel_plan_json
+
+def plan_trip(df, user_info, cache=None, on_day=None, refresh=False):
+    """필터링 → Gemini 호출까지 한 번의 여행 계획 생성을 수행합니다.
+    
+    (계획 dict, 캐시 상태 "hit" | "miss" | "off")를 반환합니다.
+    on_day가 주어지면 일자별 계획이 완성되는 대로 on_day(day)를 호출합니다.
+    refresh면 캐시를 읽지 않고 새로 만들어 캐시에 덮어씁니다. (배치 미리 생성용)
+    캐시에는 예산 맞춤 전 계획을 넣고, 꺼낼 때마다 그 요청의 예산으로 다시 맞춥니다.
+    (캐시 키는 예산을 구간으로만 묶으므로 같은 키라도 요청마다 예산이 다를 수 있음)
+    """
+    
+    # 0. 같은 조건(지역/기간/테마/예산 구간/인원)의 계획이 캐시에 있으면 Gemini를 호출하지 않습니다.
+    cached_plan = None
+    if cache is not None and not refresh:
+        with span("cache_lookup") as s:
+            cached_plan = cache.get(user_info)
+            s["hit"] = cached_plan is not None
+
+    df_places, df_accommodations = prepare_candidates(df, user_info)
+    # 항목 비용은 Gemini 추정 대신 로컬 비용 모델로 매깁니다.
+    cost_model = PlanCostModel(user_info, df_places, df_accommodations)
+
+    if cached_plan is not None:
+        print("\n⚡ 캐시된 여행 계획을 사용합니다.")
+        # 캐시 항목(메모리 LRU에서는 같은 객체)을 건드리지 않도록 복사본을 이 요청의 예산에 맞춥니다.
+        return finish_plan(copy.deepcopy(cached_plan), cost_model, on_day), "hit"
+
+    # 2. 계획 생성
+    # llm/split 모드는 응답을 검증한 뒤 확정하므로, 스트리밍 중에는 검증을 통과한 일자만 먼저 내보냅니다.
+    # (로컬/hybrid 계획은 한 번에 완성되므로 예산 맞춤 뒤 finish_plan에서 내보냄)
+    # 내보낸 일자는 {번호: 보낸 내용}으로 기억해 두고, 최종 내용이 다르면 finish_plan에서 다시 보냅니다.
+    emit_day = None
+    streamed_days = {}
+    if user_info['plan_mode'] in ("llm", "split") and on_day is not None:
+        stream_validator = PlanValidator(user_info, df_places, df_accommodations)
+        stream_used = set()  # 스트림 전체에서 공유: 앞서 내보낸 날의 장소가 다음 날에 다시 나오지 않게 함
+
+        def emit_day(day):
+            number = day.get('day')
+            if not isinstance(number, int) or number in streamed_days:
+                return
+            day_used = set(stream_used)
+            checked, problems = stream_validator.check_day(day, number, day_used)
+            if problems:
+                return
+            stream_used.update(day_used)
+            # 내보내기 전에 비용을 다시 매기고 가장 가까운 지하철역(로컬 역 목록 기준)을 채웁니다.
+            sent = fill_closest_subway([cost_model.price_day(checked)])[0]
+            streamed_days[number] = day_snapshot(sent)
+            on_day(sent)
+
+    if user_info['plan_mode'] == "llm":
+        # 2-1. Gemini가 전체 일정 작성
+        travel_plan_json = generate_travel_plan(
+            user_info,
+            format_candidates(df_places), 
+            format_candidates(df_accommodations),
+            on_day=emit_day
+        )
+    elif user_info['plan_mode'] == "split":
+        # 2-2. 일자별 후보 그룹마다 Gemini를 병렬 호출한 뒤 병합
+        travel_plan_json = generate_travel_plan_parallel(user_info, df_places, df_accommodations, on_day=emit_day)
+    else:
+        # 2-3. 로컬 최적화(클러스터링 + 경로 정렬)로 일정 작성, hybrid면 설명만 Gemini가 작성
+        with span("local_plan"):
+            travel_plan_json = build_local_plan(
+                user_info, df_places, df_accommodations,
+                nearest_stay=nearest_stay_finder(df, user_info['accommodation_theme']),
+                cost_model=cost_model
+            )
+        if travel_plan_json and user_info['plan_mode'] == "hybrid":
+            travel_plan_json = decorate_plan(user_info, travel_plan_json)
+    if not travel_plan_json:
+        raise TripPlanError("여행 계획 생성에 실패했습니다.")
+
+    changed_days = set()
+    if user_info['plan_mode'] in ("llm", "split"):
+        # 2-4. 이름/좌표를 후보 목록 값으로 맞추고 깨진 일자만 다시 요청
+        with span("validate"):
+            travel_plan_json, changed_days = validate_and_repair(user_info, travel_plan_json, df_places, df_accommodations)
+
+    unbudgeted_plan = copy.deepcopy(travel_plan_json) if cache is not None else None
+    finish_plan(travel_plan_json, cost_model, on_day, streamed_days, changed_days)
+
+    if cache is None:
+        return travel_plan_json, "off"
+    with span("cache_put"):
+        cache.put(user_info, unbudgeted_plan)
+    return travel_plan_json, "miss"
+
+def traced_plan_trip(request_id, df, user_info, cache=None, on_day=None):
+    """plan_trip 전체를 plan_total 단계로 기록합니다. (PLAN_PROFILE이 켜져 있으면 요청 단위 프로파일링)"""
+    with request_scope(request_id, mode=user_info['plan_mode']), profiled(f"plan_{request_id}"):
+        with span("plan_total", duration=int(user_info['duration'])) as s:
+            plan, cache_status = plan_trip(df, user_info, cache, on_day)
+            s["cache"] = cache_status
+            s["response_chars"] = len(json.dumps(plan, ensure_ascii=False))
+    return plan, cache_status
+
+# --- 6. 워커 모드: 장소 데이터를 한 번만 로드하고 여러 요청 처리 ---
+def serve(df, cache=None):
+    """stdin으로 JSON Lines 요청을 받아 stdout으로 JSON Lines 응답을 돌려주는 상주 워커입니다.
+    
+    요청: {"id": "...", "input": {...}, "stream": true}  (input은 단발 실행 시 stdin으로 받던 JSON과 동일)
+    응답: {"id": "...", "ok": true, "plan": {...}, "cache": "hit"} 또는 {"id": "...", "ok": false, "error": "..."}
+    stream이 true면 최종 응답 전에 일자별로 {"id": "...", "type": "day", "day": {...}}를 먼저 보냅니다.
+    단계별 소요 시간은 응답 채널이 아닌 추적 채널(TRACE_FD)로 따로 나갑니다. (TripPlan_trace.py)
+    """
+    # 응답 채널은 stdout만 사용하고, 기존 print 로그는 모두 stderr로 보냅니다.
+    channel = sys.stdout
+    sys.stdout = sys.stderr
+
+    def reply(message):
+        channel.write(json.dumps(message, ensure_ascii=False) + "\n")
+        channel.flush()
+
+    reply({"type": "ready", "places": len(df)})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        job_id = None
+        try:
+            request = json.loads(line)
+            job_id = request.get("id")
+            user_info = parse_user_inputs(request["input"])
+            on_day = None
+            if request.get("stream"):
+                on_day = lambda day, job_id=job_id: reply({"id": job_id, "type": "day", "day": day})
+            plan, cache_status = traced_plan_trip(job_id, df, user_info, cache, on_day)
+            reply({"id": job_id, "ok": True, "plan": plan, "cache": cache_status})
+        except TripPlanError as e:
+            reply({"id": job_id, "ok": False, "error": str(e)})
+        except Exception as e:
+            print(f"\n❌ 워커 요청 처리 중 오류가 발생했습니다: {e}")
+            reply({"id": job_id, "ok": False, "error": f"{type(e).__name__}: {e}"})
+
+# --- 7. 메인 실행 로직 ---
+if __name__ == "__main__":
+    df = load_place_data()
+    plan_cache = open_plan_cache()
+
+    if "--serve" in sys.argv:
+        serve(df, plan_cache)
+        sys.exit(0)
+
+    # 1. 사용자 입력 받기 (숙소 테마 자동 결정 포함)
+    try:
+        user_info = get_user_inputs()
+        # 2~3. 데이터 필터링 및 Gemini API 호출
+        travel_plan_json, _ = traced_plan_trip("cli", df, user_info, plan_cache)
+    except TripPlanError as e:
+        print(f"\n{e}")
+        sys.exit(1)
+    
+    # 4. 결과 출력
+    print("\n=============================================")
+    print("🎉 생성된 여행 계획 (JSON 형식) 🎉")
+    print("=============================================")
+    # 보기 좋게 JSON 출력
+    trip_plan_json = json.dumps(travel_plan_json, indent=4, ensure_ascii=False)
+    print(trip_plan_json)
+    print("=============================================")
+    file_path = "travel_plan.json"
+    try:
+        with span("write", path=file_path), open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(travel_plan_json, f, ensure_ascii=False, indent=4)
+        print(f"\n✅ 여행 계획이 '{file_path}' 파일로 저장되었습니다.")
+    except Exception as e:
+        print(f"\n❌ 파일 저장 중 오류가 발생했습니다: {e}")
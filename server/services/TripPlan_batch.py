@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from Place_index import get_place_index
+from TripPlan_cache import PlanCache, plan_cache_key
+from Rate_limit import TokenBucket
+import TripPlan_base_api as planner
+
+sys.stdout.reconfigure(encoding="utf-8")
+
+# --- 인기 일정 미리 생성(배치) 설정 ---
+# 요청 명세 JSONL(한 줄 = 단발 실행 시 stdin으로 받던 JSON)을 읽어 계획을 만들고 계획 캐시에 넣어 둡니다.
+BATCH_CONCURRENCY = int(os.getenv("PLAN_BATCH_CONCURRENCY", "2"))  # 동시에 처리할 명세 수
+GEMINI_RPM = float(os.getenv("PLAN_BATCH_GEMINI_RPM", "30"))  # Gemini 호출 분당 상한 (할당량에 맞춤)
+GEMINI_BURST = int(os.getenv("PLAN_BATCH_GEMINI_BURST", "2"))  # 순간 최대 호출 수
+BATCH_USER_ID = "batch"
+
+
+class RateLimitedGemini:
+    """client.models 호출마다 토큰 버킷에서 토큰을 받은 뒤 실제 Gemini 클라이언트로 넘깁니다.
+
+    split 모드처럼 요청 하나가 여러 번 호출해도 호출 단위로 할당량을 지킵니다.
+    """
+
+    def __init__(self, client, limiter):
+        self.client = client
+        self.limiter = limiter
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def models(self):
+        return self
+
+    def _acquire(self):
+        self.limiter.acquire()
+        with self._lock:
+            self.calls += 1
+
+    def generate_content(self, **kwargs):
+        self._acquire()
+        return self.client.models.generate_content(**kwargs)
+
+    def generate_content_stream(self, **kwargs):
+        self._acquire()
+        return self.client.models.generate_content_stream(**kwargs)
+
+
+def read_specs(path):
+    """JSONL 명세를 읽습니다. userId가 없으면 배치용 ID를, 날짜 대신 duration만 있으면 오늘부터의 날짜를 채웁니다."""
+    specs = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                spec = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️ {line_no}번째 줄을 건너뜁니다 (JSON 오류: {e})")
+                continue
+            spec.setdefault("userId", BATCH_USER_ID)
+            spec.setdefault("start_loc", "")
+            if "start_date" not in spec and "duration" in spec:
+                start = date.today()
+                spec["start_date"] = start.isoformat()
+                spec["end_date"] = (start + timedelta(days=int(spec["duration"]) - 1)).isoformat()
+            specs.append((line_no, spec))
+    return specs
+
+
+def describe(user_info):
+    return (f"{user_info['end_city']} {user_info['district']} {user_info['duration']}일 "
+            f"[{','.join(user_info['place_themes'])}] {user_info['plan_mode']}")
+
+
+def run_batch(df, cache, specs, concurrency=BATCH_CONCURRENCY, force=False):
+    """명세마다 필터링 → 계획 생성을 수행해 캐시에 저장합니다. 결과 개수(Counter)를 반환합니다.
+
+    - 캐시에 아직 유효한(TTL 안) 계획이 있는 명세는 건너뜀 (force면 다시 생성)
+    - 같은 캐시 키로 정규화되는 명세는 한 번만 생성
+    """
+    counts = Counter()
+    jobs = []
+    seen = set()
+    for line_no, spec in specs:
+        try:
+            user_info = planner.parse_user_inputs(spec)
+        except (planner.TripPlanError, KeyError) as e:
+            print(f"❌ {line_no}번째 줄: 명세 오류 ({e})")
+            counts["invalid"] += 1
+            continue
+        key, _ = plan_cache_key(user_info)
+        if key in seen:
+            counts["duplicate"] += 1
+            continue
+        seen.add(key)
+        if not force and cache.is_fresh(user_info):
+            counts["fresh"] += 1
+            continue
+        jobs.append(user_info)
+
+    print(f"\n📋 명세 {len(specs)}개 → 생성 {len(jobs)}개 "
+          f"(캐시 유효 {counts['fresh']} / 중복 {counts['duplicate']} / 오류 {counts['invalid']})")
+    if not jobs:
+        return counts
+
+    # 요청 스레드들이 동시에 인덱스를 만들지 않도록 미리 만들어 둡니다.
+    get_place_index(df)
+
+    def plan_one(user_info):
+        started = time.perf_counter()
+        # 캐시에는 예산 맞춤 전 계획이 들어가고, 꺼낼 때 요청마다 예산을 다시 맞춥니다. (plan_trip 참고)
+        plan, _ = planner.plan_trip(df, user_info, cache, refresh=True)
+        return plan, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(plan_one, user_info): user_info for user_info in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            user_info = futures[future]
+            try:
+                plan, seconds = future.result()
+                counts["stored"] += 1
+                print(f"[{done}/{len(jobs)}] ✅ {describe(user_info)} ({seconds:.1f}초) {plan.get('title')}")
+            except planner.TripPlanError as e:
+                counts["rejected"] += 1
+                print(f"[{done}/{len(jobs)}] ⚠️ {describe(user_info)}: {e}")
+            except Exception as e:
+                counts["failed"] += 1
+                print(f"[{done}/{len(jobs)}] ❌ {describe(user_info)}: {type(e).__name__}: {e}")
+
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ 배치 완료 ({elapsed:.1f}초): 저장 {counts['stored']} / 거절 {counts['rejected']} / "
+          f"실패 {counts['failed']} / 건너뜀 {counts['fresh'] + counts['duplicate']}")
+    return counts
+
+
+if __name__ == "__main__":
+    # 사용법: python TripPlan_batch.py specs.jsonl [--concurrency 2] [--rpm 30] [--force]
+    # 명세 예: {"end_area": "제주특별자치도", "detail_addr": "제주시", "duration": 3, "place_themes": "맛집,자연",
+    #           "budget_per_person": 500000, "total_people": 2}
+    parser = argparse.ArgumentParser(description="인기 여행 계획을 미리 생성해 계획 캐시에 넣어 둡니다.")
+    parser.add_argument("specs", help="요청 명세 JSONL 파일")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="동시에 처리할 명세 수")
+    parser.add_argument("--rpm", type=float, default=GEMINI_RPM, help="Gemini 호출 분당 상한")
+    parser.add_argument("--force", action="store_true", help="캐시가 유효해도 다시 생성")
+    args = parser.parse_args()
+
+    batch_specs = read_specs(args.specs)
+    planner.client = RateLimitedGemini(planner.get_client(), TokenBucket(args.rpm / 60, GEMINI_BURST))
+    plan_cache = PlanCache()
+    try:
+        batch_counts = run_batch(
+            planner.load_place_data(), plan_cache, batch_specs, concurrency=args.concurrency, force=args.force
+        )
+        print(f"   Gemini 호출 {planner.client.calls}회, 캐시 {plan_cache.stats()['entries']}건")
+        exit_code = 1 if batch_counts["failed"] or batch_counts["invalid"] else 0
+    finally:
+        plan_cache.close()
+    sys.exit(exit_code)
@@ -0,0 +1,367 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import contextlib
+import tracemalloc
+from datetime import date, timedelta
+import numpy as np
+from Place_catalog import load_catalog
+import TripPlan_trace
+import TripPlan_base_api as planner
+
+sys.stdout.reconfigure(encoding="utf-8")
+
+# --- 플래너 벤치마크 설정 ---
+# Mongo/Gemini 없이 data/korea_tour_*.csv 카탈로그 + 녹화된 응답 재생으로 계획 생성 전체를 반복 측정합니다.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RECORDED_PLANS = (
+    os.path.join(ROOT_DIR, "travel_plan.json"),
+    os.path.join(ROOT_DIR, "travel_plan_당일.json"),
+)
+DEFAULT_DURATIONS = "1,2,3,4,5,6,7"
+DEFAULT_THEMES = "맛집,카페;자연;역사/문화,쇼핑;캠핑"  # ';'로 조합 구분
+DEFAULT_MODES = "llm"
+BENCH_START_DATE = date(2025, 5, 1)
+BENCH_BUDGET_PER_PERSON = 300000
+BENCH_PEOPLE = 2
+
+_CANDIDATE = re.compile(r"이름: (.+?), 좌표: (없음|-?\d+(?:\.\d+)?, -?\d+(?:\.\d+)?)")
+_ACCOMMODATION_HEADING = "[숙소 후보 목록]"
+
+
+# --- 녹화 응답 재생용 Gemini 대역 ---
+class ReplayGemini:
+    """client.models 자리에 끼워 넣는 결정적(deterministic) Gemini 대역.
+
+    녹화된 계획(travel_plan*.json)의 일자 구성/설명/비용을 틀로 쓰고, 장소와 숙소 이름/좌표는
+    프롬프트에 실린 후보 목록에서 순서대로 골라 채웁니다. 그래서 검증 단계까지 실제와 같은 경로를 탑니다.
+    호출마다 latency_ms(± jitter_ms)만큼 기다리며, 스트리밍 호출은 stream_chunks 조각으로 나눠 보냅니다.
+    """
+
+    def __init__(self, recorded_paths=RECORDED_PLANS, latency_ms=0, jitter_ms=0, stream_chunks=8, seed=0):
+        self.days, self.titles = [], []
+        for path in recorded_paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                plan = json.load(f)
+            self.days.extend(plan.get("travel_plan") or [])
+            if plan.get("title"):
+                self.titles.append((plan["title"], plan.get("description", "")))
+        if not self.days:
+            raise FileNotFoundError(f"재생할 녹화 응답이 없습니다: {', '.join(recorded_paths)}")
+        if not self.titles:
+            self.titles.append(("벤치마크 여행", "녹화 응답 재생"))
+
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.stream_chunks = max(1, stream_chunks)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @property
+    def models(self):
+        return self
+
+    # -- 대기 시간 --
+    def _delay(self):
+        with self._lock:
+            self.calls += 1
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    # -- 응답 만들기 --
+    def _template(self, prompt, day_number):
+        # 같은 프롬프트에는 항상 같은 녹화 일자를 쓰도록 프롬프트 해시로 시작점을 정합니다.
+        offset = int(hashlib.md5(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        return self.days[(offset + day_number) % len(self.days)]
+
+    @staticmethod
+    def _candidates(prompt):
+        split = prompt.find(_ACCOMMODATION_HEADING)
+        places, accommodations = [], []
+        for match in _CANDIDATE.finditer(prompt):
+            target = accommodations if split != -1 and match.start() > split else places
+            target.append((match.group(1), match.group(2)))
+        return places, accommodations
+
+    def _day(self, prompt, day_number, is_last_day, places, accommodations, cursor):
+        template = self._template(prompt, day_number)
+        items = []
+        for item in (template.get("places") or [])[:4]:
+            if cursor[0] >= len(places):
+                break
+            name, coords = places[cursor[0]]
+            cursor[0] += 1
+            items.append({
+                "name": name,
+                "description": item.get("description", ""),
+                "coords": coords,
+                "estimated_cost": int(item.get("estimated_cost") or 0),
+            })
+
+        stay = template.get("accommodation") or {}
+        if is_last_day or not accommodations:
+            accommodation = {"name": "없음", "description": "", "coords": "없음", "estimated_cost": 0}
+        else:
+            name, coords = accommodations[(day_number - 1) % len(accommodations)]
+            accommodation = {
+                "name": name,
+                "description": stay.get("description", ""),
+                "coords": coords,
+                "estimated_cost": int(stay.get("estimated_cost") or 0),
+            }
+        return {"day": day_number, "places": items, "accommodation": accommodation}
+
+    def _respond(self, prompt, config):
+        properties = set(getattr(config.response_schema, "properties", None) or {})
+        title, description = self.titles[len(prompt) % len(self.titles)]
+
+        if "travel_plan" in properties:
+            # 전체 일정 (llm 모드)
+            duration = int(re.search(r"(\d+)일간", prompt).group(1))
+            places, accommodations = self._candidates(prompt)
+            cursor = [0]
+            days = [self._day(prompt, n, n == duration, places, accommodations, cursor) for n in range(1, duration + 1)]
+            return {"title": title, "description": description, "travel_plan": days}
+
+        if "places" in properties:
+            # 하루 일정 (split 모드 / 깨진 일자 재요청)
+            day_number = int(re.search(r"(\d+)일차 일정만", prompt).group(1))
+            places, accommodations = self._candidates(prompt)
+            return self._day(prompt, day_number, "마지막 날이므로" in prompt, places, accommodations, [0])
+
+        if "days" in properties:
+            # 설명만 작성 (hybrid 모드)
+            outline = json.loads(re.search(r"\[확정된 일정\]\s*(\[.*\])", prompt).group(1))
+            days = []
+            for day in outline:
+                template = self._template(prompt, day["day"])
+                texts = [p.get("description", "") for p in template.get("places") or []] or [""]
+                days.append({
+                    "day": day["day"],
+                    "place_descriptions": [texts[i % len(texts)] for i in range(len(day["places"]))],
+                    "accommodation_description": (template.get("accommodation") or {}).get("description", ""),
+                })
+            return {"title": title, "description": description, "days": days}
+
+        # 제목/설명만 (split 모드 요약)
+        return {"title": title, "description": description}
+
+    # -- google.genai client.models 와 같은 호출 형식 --
+    def generate_content(self, model, contents, config=None):
+        delay = self._delay()
+        text = json.dumps(self._respond(contents, config), ensure_ascii=False)
+        time.sleep(delay)
+        return _Response(text)
+
+    def generate_content_stream(self, model, contents, config=None):
+        delay = self._delay()
+        text = json.dumps(self._respond(contents, config), ensure_ascii=False)
+        size = max(1, -(-len(text) // self.stream_chunks))
+        for start in range(0, len(text), size):
+            time.sleep(delay / self.stream_chunks)
+            yield _Response(text[start:start + size])
+
+
+class _Response:
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+
+# --- 시나리오 ---
+def build_scenarios(df, durations, theme_sets, modes, sample=None):
+    """(city, district) 전체 × 여행 기간 × 테마 조합 × 계획 모드 행렬을 만듭니다.
+
+    sample을 주면 지역을 고르게 띄엄띄엄 sample곳만 사용합니다. (항상 같은 지역 선택)
+    """
+    areas = df[["city", "district"]].astype(object).dropna().drop_duplicates()
+    areas = sorted(tuple(a) for a in areas.itertuples(index=False))
+    if sample and sample < len(areas):
+        step = len(areas) / sample
+        areas = [areas[int(i * step)] for i in range(sample)]
+
+    scenarios = []
+    for city, district in areas:
+        for duration in durations:
+            for themes in theme_sets:
+                for mode in modes:
+                    scenarios.append({
+                        "userId": "benchmark",
+                        "start_loc": "서울특별시",
+                        "end_area": city,
+                        "detail_addr": district,
+                        "start_date": BENCH_START_DATE.isoformat(),
+                        "end_date": (BENCH_START_DATE + timedelta(days=duration - 1)).isoformat(),
+                        "place_themes": themes,
+                        "budget_per_person": BENCH_BUDGET_PER_PERSON,
+                        "total_people": BENCH_PEOPLE,
+                        "plan_mode": mode,
+                    })
+    return scenarios
+
+
+def _percentiles(values):
+    if not values:
+        return {"p50": 0, "p95": 0, "p99": 0, "max": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50": round(float(p50), 2), "p95": round(float(p95), 2),
+            "p99": round(float(p99), 2), "max": round(float(max(values)), 2)}
+
+
+def _peak_rss_mb():
+    """프로세스 최대 RSS (MB). resource 모듈이 없는 환경(Windows)에서는 None."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_benchmark(df, scenarios, gemini, stream=False, trace_memory=False, progress_every=100):
+    """시나리오를 차례로 실행하고 모드별 처리량/지연 시간/메모리와 단계별 지연 시간을 집계합니다.
+
+    stream이 True면 워커의 스트리밍 요청과 같이 일자별 콜백(on_day)을 넘겨 실행합니다.
+    """
+    on_day = (lambda day: None) if stream else None
+    planner.client = gemini
+
+    spans = []
+    TripPlan_trace.add_sink(lambda record: spans.append(record) if record.get("type") == "span" else None)
+
+    results = {}
+    stage_ms = {}
+    started = time.perf_counter()
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        for i, request in enumerate(scenarios, 1):
+            mode = request["plan_mode"]
+            result = results.setdefault(mode, {"ok": 0, "rejected": 0, "failed": 0, "latency": [], "heap_kb": [], "wall": 0.0})
+            spans.clear()
+            if trace_memory:
+                tracemalloc.start()
+            t0 = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(devnull):
+                    user_info = planner.parse_user_inputs(request)
+                    planner.traced_plan_trip(f"bench-{i}", df, user_info, None, on_day)
+                status = "ok"
+            except planner.TripPlanError:
+                status = "rejected"
+            except Exception as e:
+                status = "failed"
+                print(f"⚠️ {request['end_area']} {request['detail_addr']} {mode}: {type(e).__name__}: {e}")
+            elapsed = time.perf_counter() - t0
+            if trace_memory:
+                result["heap_kb"].append(tracemalloc.get_traced_memory()[1] / 1024)
+                tracemalloc.stop()
+
+            result[status] += 1
+            result["wall"] += elapsed
+            if status == "ok":
+                result["latency"].append(elapsed * 1000)
+                for record in spans:
+                    stage_ms.setdefault(record["stage"], []).append(record["ms"])
+            if progress_every and i % progress_every == 0:
+                print(f"   ... {i}/{len(scenarios)}")
+    total_seconds = time.perf_counter() - started
+
+    report = {
+        "scenarios": len(scenarios),
+        "seconds": round(total_seconds, 2),
+        "gemini_calls": gemini.calls,
+        "gemini_latency_ms": gemini.latency_ms,
+        "peak_rss_mb": _peak_rss_mb(),
+        "modes": {},
+        "stages": {stage: {"count": len(v), **_percentiles(v)} for stage, v in sorted(stage_ms.items())},
+    }
+    for mode, r in results.items():
+        runs = r["ok"] + r["rejected"] + r["failed"]
+        report["modes"][mode] = {
+            "ok": r["ok"],
+            "rejected": r["rejected"],
+            "failed": r["failed"],
+            "throughput_per_s": round(runs / r["wall"], 2) if r["wall"] else 0,
+            "latency_ms": _percentiles(r["latency"]),
+            "heap_peak_kb": _percentiles(r["heap_kb"]) if trace_memory else None,
+        }
+    return report
+
+
+def print_report(report, baseline=None):
+    """보고서를 표로 출력합니다. baseline(이전 실행의 JSON 보고서)이 있으면 변화율도 함께 보여 줍니다."""
+    def delta(now, before):
+        if not before:
+            return ""
+        return f" ({(now - before) / before * 100:+.1f}%)"
+
+    print(f"\n📊 시나리오 {report['scenarios']}개, {report['seconds']}초, Gemini 대역 호출 {report['gemini_calls']}회 "
+          f"(호출당 {report['gemini_latency_ms']} ms), 최대 RSS {report['peak_rss_mb']} MB")
+    for mode, m in report["modes"].items():
+        before = (baseline or {}).get("modes", {}).get(mode, {})
+        lat, old = m["latency_ms"], before.get("latency_ms", {})
+        print(f"\n[{mode}] 성공 {m['ok']} / 거절 {m['rejected']} / 실패 {m['failed']}, "
+              f"처리량 {m['throughput_per_s']}건/초{delta(m['throughput_per_s'], before.get('throughput_per_s'))}")
+        print(f"   지연(ms) p50 {lat['p50']}{delta(lat['p50'], old.get('p50'))} / "
+              f"p95 {lat['p95']}{delta(lat['p95'], old.get('p95'))} / "
+              f"p99 {lat['p99']}{delta(lat['p99'], old.get('p99'))} / max {lat['max']}")
+        if m["heap_peak_kb"]:
+            print(f"   Python 힙 최대(KB) p50 {m['heap_peak_kb']['p50']} / p95 {m['heap_peak_kb']['p95']} / max {m['heap_peak_kb']['max']}")
+
+    print(f"\n{'단계':<16}{'건수':>8}{'p50(ms)':>12}{'p95(ms)':>12}{'max(ms)':>12}")
+    old_stages = (baseline or {}).get("stages", {})
+    for stage, s in report["stages"].items():
+        change = delta(s["p95"], old_stages.get(stage, {}).get("p95"))
+        print(f"{stage:<16}{s['count']:>8}{s['p50']:>12}{s['p95']:>12}{s['max']:>12}{change}")
+
+
+if __name__ == "__main__":
+    # 사용법: python TripPlan_benchmark.py [--sample 20] [--latency-ms 800] [--out after.json --compare before.json]
+    parser = argparse.ArgumentParser(description="CSV 카탈로그 + 녹화 응답 재생으로 플래너 성능을 측정합니다.")
+    parser.add_argument("--durations", default=DEFAULT_DURATIONS, help="여행 기간(일) 목록, 쉼표 구분")
+    parser.add_argument("--themes", default=DEFAULT_THEMES, help="테마 조합 목록, 조합은 ';' / 테마는 ',' 구분")
+    parser.add_argument("--modes", default=DEFAULT_MODES, help=f"계획 모드 목록 ({', '.join(planner.PLAN_MODES)})")
+    parser.add_argument("--sample", type=int, default=None, help="지역(시군구) 수 제한 (기본: 전체)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Gemini 호출당 대기 시간")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="대기 시간 흔들림 (±)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stream", action="store_true", help="스트리밍 요청(일자별 전달)으로 실행")
+    parser.add_argument("--tracemalloc", action="store_true", help="시나리오별 Python 힙 최대 사용량 측정 (느려짐)")
+    parser.add_argument("--out", help="보고서를 JSON으로 저장할 경로")
+    parser.add_argument("--compare", help="비교할 이전 보고서 JSON 경로")
+    args = parser.parse_args()
+
+    bench_df = load_catalog()
+    bench_scenarios = build_scenarios(
+        bench_df,
+        durations=[int(d) for d in args.durations.split(",") if d.strip()],
+        theme_sets=[t.strip() for t in args.themes.split(";") if t.strip()],
+        modes=[m.strip() for m in args.modes.split(",") if m.strip()],
+        sample=args.sample,
+    )
+    print(f"✅ 카탈로그 {len(bench_df)}건, 시나리오 {len(bench_scenarios)}개")
+
+    gemini_stand_in = ReplayGemini(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+    bench_report = run_benchmark(
+        bench_df, bench_scenarios, gemini_stand_in, stream=args.stream, trace_memory=args.tracemalloc
+    )
+
+    baseline_report = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline_report = json.load(f)
+    print_report(bench_report, baseline_report)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(bench_report, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 보고서 저장: {args.out}")
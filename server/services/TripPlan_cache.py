@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+sys.stdout.reconfigure(encoding="utf-8")
+
+# --- 캐시 설정 (환경 변수로 조정) ---
+PLAN_CACHE_PATH = os.getenv(
+    "PLAN_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "plan_cache.sqlite3"),
+)
+PLAN_CACHE_TTL = int(os.getenv("PLAN_CACHE_TTL", str(24 * 60 * 60)))  # 초
+PLAN_CACHE_MAX = int(os.getenv("PLAN_CACHE_MAX", "5000"))  # 디스크 LRU 최대 항목 수
+PLAN_CACHE_MEMORY_MAX = 256  # 프로세스 메모리 LRU 최대 항목 수
+BUDGET_BUCKET = int(os.getenv("PLAN_CACHE_BUDGET_BUCKET", "100000"))  # 1인 예산 구간 (원)
+
+
+def plan_cache_key(user_info):
+    """같은 계획으로 취급할 요청을 하나의 키로 정규화합니다.
+
+    - 절대 날짜 대신 여행 기간(duration)만 사용
+    - 테마는 공백 제거/중복 제거 후 정렬
+    - 1인 예산은 BUDGET_BUCKET 단위 구간으로 묶음
+    - 주변 검색 거리(buffer_km), 테마별 비중(theme_weights)은 지정했을 때만 키에 포함 (기존 키 유지)
+    """
+    themes = sorted({t.strip() for t in user_info["place_themes"] if t and t.strip()})
+    canonical = {
+        "city": user_info["end_city"],
+        "district": user_info["district"],
+        "duration": int(user_info["duration"]),
+        "themes": themes,
+        "accommodation": user_info["accommodation_theme"],
+        "budget_bucket": int(user_info["budget_per_person"]) // BUDGET_BUCKET,
+        "people": int(user_info["total_people"]),
+        "mode": user_info.get("plan_mode", "llm"),
+    }
+    if user_info.get("buffer_km"):
+        canonical["buffer_km"] = float(user_info["buffer_km"])
+    if user_info.get("theme_weights"):
+        canonical["theme_weights"] = {k: float(v) for k, v in sorted(user_info["theme_weights"].items())}
+    raw = json.dumps(canonical, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest(), canonical
+
+
+class PlanCache:
+    """SQLite에 저장되는 여행 계획 캐시 (TTL + LRU).
+
+    자주 쓰는 항목은 프로세스 메모리 LRU에도 올려 두고, 디스크 쪽은 last_access 기준으로
+    max_entries를 넘는 오래된 항목부터 지웁니다. 여러 워커 프로세스가 같은 파일을 공유합니다.
+    """
+
+    def __init__(self, path=PLAN_CACHE_PATH, ttl=PLAN_CACHE_TTL, max_entries=PLAN_CACHE_MAX,
+                 memory_entries=PLAN_CACHE_MEMORY_MAX):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()  # key -> (created_at, plan)
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "stores": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS plan_cache (
+                key TEXT PRIMARY KEY,
+                request TEXT NOT NULL,
+                plan TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_plan_cache_access ON plan_cache(last_access)")
+        self._conn.commit()
+
+    def get(self, user_info):
+        """캐시된 계획을 반환합니다. 없거나 TTL이 지났으면 None."""
+        key, _ = plan_cache_key(user_info)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._conn.execute(
+                    "SELECT created_at, plan FROM plan_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], json.loads(row[1]))
+
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+
+            if now - entry[0] > self.ttl:
+                self._memory.pop(key, None)
+                self._conn.execute("DELETE FROM plan_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.counters["expired"] += 1
+                self.counters["misses"] += 1
+                return None
+
+            self._remember(key, entry)
+            self._conn.execute("UPDATE plan_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.counters["hits"] += 1
+            return entry[1]
+
+    def is_fresh(self, user_info):
+        """카운터를 바꾸지 않고 TTL 안의 항목이 있는지만 확인합니다."""
+        key, _ = plan_cache_key(user_info)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at FROM plan_cache WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def put(self, user_info, plan):
+        key, canonical = plan_cache_key(user_info)
+        now = time.time()
+        with self._lock:
+            self._remember(key, (now, plan))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plan_cache (key, request, plan, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(canonical, ensure_ascii=False), json.dumps(plan, ensure_ascii=False), now, now),
+            )
+            self._evict_locked()
+            self._conn.commit()
+            self.counters["stores"] += 1
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_locked(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM plan_cache WHERE key IN "
+                "(SELECT key FROM plan_cache ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.counters["evictions"] += overflow
+            self._memory.clear()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()[0]
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": entries,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self):
+        self._conn.close()
+
+
+def open_plan_cache():
+    """PLAN_CACHE=off 이면 None, 아니면 기본 설정의 PlanCache를 엽니다."""
+    if os.getenv("PLAN_CACHE", "on").lower() in ("off", "0", "false"):
+        return None
+    return PlanCache()
+
+
+if __name__ == "__main__":
+    # 사용법: python TripPlan_cache.py [stats|clear]
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = PlanCache()
+    if command == "stats":
+        print(json.dumps(cache.stats(), ensure_ascii=False))
+    elif command == "clear":
+        cache._conn.execute("DELETE FROM plan_cache")
+        cache._conn.commit()
+        print("✅ 여행 계획 캐시를 비웠습니다.")
+    else:
+        print(f"❌ 알 수 없는 명령입니다: {command} (stats | clear)")
+        sys.exit(1)
@@ -0,0 +1,136 @@
+import os
+import math
+import numpy as np
+import pandas as pd
+from Place_themes import get_theme_resolver
+
+# --- 후보 축소 설정 (환경 변수로 조정) ---
+# 프롬프트에 넣을 후보 목록 전체의 토큰 예산과, 그중 장소 목록에 배정할 비율
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+PLACE_BUDGET_RATIO = float(os.getenv("PROMPT_PLACE_BUDGET_RATIO", "0.75"))
+MIN_CANDIDATES = 8  # 예산이 작아도 이 개수까지는 남깁니다.
+
+# 후보 한 줄("이름: ..., 좌표: 37.123456, 127.123456")에서 제목을 뺀 고정 부분의 대략적인 토큰 수
+LINE_OVERHEAD_TOKENS = 16
+
+
+def estimate_tokens(text):
+    """프롬프트 토큰 수 근사치. ASCII는 4자당 1토큰, 한글 등 비ASCII는 1자당 1토큰으로 셉니다."""
+    text = str(text)
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
+
+
+def _title_tokens(df_part):
+    """행별 후보 한 줄의 예상 토큰 수 (벡터 연산)."""
+    titles = df_part['title'].astype(str)
+    total = titles.str.len().to_numpy()
+    non_ascii = titles.str.count(r'[^\x00-\x7f]').to_numpy()
+    return (total - non_ascii) / 4 + non_ascii + LINE_OVERHEAD_TOKENS
+
+
+def _ranking_columns(df_part):
+    """인기도 순위에 쓸 (rating, bookmarkCount) 배열. 컬럼이 없으면 0."""
+    n = len(df_part)
+    rating = df_part['rating'].fillna(0).to_numpy(dtype=np.float64) if 'rating' in df_part else np.zeros(n)
+    bookmarks = df_part['bookmarkCount'].fillna(0).to_numpy(dtype=np.float64) if 'bookmarkCount' in df_part else np.zeros(n)
+    return rating, bookmarks
+
+
+def _spatial_pick(df_part, quota):
+    """격자 샘플링으로 공간적으로 고르게 quota개를 고릅니다. 반환값은 df_part 내 위치 배열.
+
+    좌표 범위를 약 sqrt(quota) x sqrt(quota) 격자로 나누고, 각 칸에서 인기도 1위 →
+    모든 칸의 2위 → ... 순서로 뽑습니다. 한 동네에 몰린 후보가 목록을 독차지하지 않습니다.
+    """
+    n = len(df_part)
+    if n <= quota:
+        return np.arange(n)
+
+    cells = max(1, int(math.ceil(math.sqrt(quota))))
+    x = df_part['x'].to_numpy(dtype=np.float64)
+    y = df_part['y'].to_numpy(dtype=np.float64)
+    x = np.nan_to_num(x, nan=np.nanmean(x) if np.isfinite(x).any() else 0.0)
+    y = np.nan_to_num(y, nan=np.nanmean(y) if np.isfinite(y).any() else 0.0)
+    gx = np.clip(((x - x.min()) / max(np.ptp(x), 1e-9) * cells).astype(np.int64), 0, cells - 1)
+    gy = np.clip(((y - y.min()) / max(np.ptp(y), 1e-9) * cells).astype(np.int64), 0, cells - 1)
+    cell = gx * cells + gy
+
+    rating, bookmarks = _ranking_columns(df_part)
+    # 칸 → 평점 내림차순 → 북마크 내림차순 → 원래 순서
+    order = np.lexsort((np.arange(n), -bookmarks, -rating, cell))
+    sorted_cell = cell[order]
+    group_start = np.r_[0, np.flatnonzero(np.diff(sorted_cell)) + 1]
+    rank_in_cell = np.arange(n) - np.repeat(group_start, np.diff(np.r_[group_start, n]))
+
+    # 칸 내 순위가 낮은(인기 많은) 것부터, 같은 순위끼리는 인기도 순으로 quota개
+    pick = np.lexsort((-bookmarks[order], -rating[order], rank_in_cell))[:quota]
+    return np.sort(order[pick])
+
+
+def _balanced_quotas(sizes, quota, weights=None):
+    """카테고리별 후보 수(sizes)에 맞춰 quota를 나눕니다. (남는 몫은 큰 그룹에 재분배)
+
+    weights가 없으면 최대한 균등하게, 있으면 카테고리별 비중({카테고리: 비중}, 없는 카테고리는 1)에 비례하게 나눕니다.
+    """
+    weight = {key: (weights or {}).get(key, 1.0) for key in sizes}
+    quotas = {key: 0 for key in sizes}
+    remaining = quota
+    # 배정량 대비 후보가 적은(먼저 바닥나는) 카테고리부터 채워야 남는 몫이 뒤로 넘어갑니다.
+    pending = sorted((k for k in sizes if weight[k] > 0), key=lambda k: sizes[k] / weight[k])
+    while pending and remaining > 0:
+        total_weight = sum(weight[k] for k in pending)
+        key = pending.pop(0)
+        share = max(1, int(remaining * weight[key] // total_weight))
+        take = min(sizes[key], share)
+        quotas[key] = take
+        remaining -= take
+    return quotas
+
+
+def prune_candidates(df_part, token_budget, theme_weights=None):
+    """token_budget 안에 들어가도록 후보를 줄입니다. 테마(카테고리) 균형 + 공간 분산을 유지합니다.
+
+    theme_weights({라벨: 비중})가 있으면 카테고리별 몫을 비중대로 나눕니다.
+    """
+    if df_part.empty:
+        return df_part
+
+    line_tokens = _title_tokens(df_part)
+    if line_tokens.sum() <= token_budget:
+        return df_part
+
+    quota = max(MIN_CANDIDATES, int(token_budget // line_tokens.mean()))
+    if quota >= len(df_part):
+        return df_part
+
+    categories = df_part['category'].astype(object).fillna("").to_numpy()
+    groups = {key: np.flatnonzero(categories == key) for key in pd.unique(categories)}
+    weights = None
+    if theme_weights:
+        resolver = get_theme_resolver()
+        weights = {key: theme_weights.get(resolver.label_of(key), 1.0) for key in groups}
+    quotas = _balanced_quotas({key: len(pos) for key, pos in groups.items()}, quota, weights)
+
+    selected = []
+    for key, positions in groups.items():
+        if quotas[key] == 0:
+            continue
+        picked = _spatial_pick(df_part.iloc[positions], quotas[key])
+        selected.append(positions[picked])
+
+    return df_part.iloc[np.sort(np.concatenate(selected))]
+
+
+def apply_prompt_budget(df_places, df_accommodations, token_budget=PROMPT_TOKEN_BUDGET, theme_weights=None):
+    """장소/숙소 후보를 전체 토큰 예산에 맞게 나눠 줄입니다.
+
+    숙소 쪽이 배정량보다 적게 쓰면 남는 예산을 장소 쪽으로 넘깁니다.
+    theme_weights는 장소 후보의 테마별 비중입니다. (parse_theme_weights 참고)
+    """
+    accommodation_budget = token_budget * (1 - PLACE_BUDGET_RATIO)
+    df_accommodations = prune_candidates(df_accommodations, accommodation_budget)
+
+    used = _title_tokens(df_accommodations).sum() if not df_accommodations.empty else 0
+    df_places = prune_candidates(df_places, token_budget - used, theme_weights)
+    return df_places, df_accommodations
@@ -0,0 +1,237 @@
+import os
+import math
+import numpy as np
+import pandas as pd
+from Place_geo import haversine_km, format_coords, parse_coords
+from Place_themes import get_theme_resolver
+from TripPlan_optimizer import MIN_PLACES_PER_DAY
+
+# --- 로컬 비용 모델 설정 (환경 변수로 조정) ---
+# Place.averageCost(원)가 있으면 그 값을, 없으면(0) 카테고리 기본 단가 × 지역 계수를 씁니다.
+# 장소는 1인 기준, 숙소/캠핑은 1박 1실(2인) 기준입니다.
+DEFAULT_COSTS = {
+    "맛집": 15000,
+    "카페": 8000,
+    "쇼핑": 30000,
+    "역사/문화": 5000,
+    "자연": 3000,
+    "관광지": 5000,
+    "캠핑": 40000,
+    "숙소": 100000,
+}
+DEFAULT_COST = 10000
+REGION_COST_FACTORS = {
+    "서울특별시": 1.2,
+    "제주특별자치도": 1.15,
+    "부산광역시": 1.05,
+    "인천광역시": 1.05,
+    "경기도": 1.05,
+    "강원특별자치도": 1.05,
+}
+STAY_BUDGET_SHARE = float(os.getenv("PLAN_STAY_BUDGET_SHARE", "0.6"))  # 숙박에 쓸 수 있는 전체 예산 비율 상한
+STAY_SWAP_KM = float(os.getenv("PLAN_STAY_SWAP_KM", "3"))  # 예산 초과 시 더 싼 숙소로 바꿀 때 찾는 거리
+MIN_BUDGET_CANDIDATES = 8  # 예산으로 거를 때도 이 개수(싼 순)까지는 남김
+
+
+def _by_category(series, values, default):
+    """범주형 컬럼의 카테고리 목록에만 values(dict)를 적용하고 코드로 펼칩니다. (행별 Python 호출 없음)"""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype("category")
+    lookup = np.array([values(c) for c in series.cat.categories] + [default], dtype=np.float64)
+    codes = series.cat.codes.to_numpy()
+    return lookup[np.where(codes < 0, len(lookup) - 1, codes)]
+
+
+def unit_costs(df_part):
+    """행별 단가(원) 배열. averageCost > 0 이면 그대로, 아니면 카테고리 기본 단가 × 지역 계수."""
+    n = len(df_part)
+    if n == 0:
+        return np.zeros(0)
+    resolver = get_theme_resolver()
+    defaults = _by_category(df_part['category'], lambda c: DEFAULT_COSTS.get(resolver.label_of(str(c)), DEFAULT_COST), DEFAULT_COST)
+    if 'city' in df_part:
+        defaults = defaults * _by_category(df_part['city'], lambda c: REGION_COST_FACTORS.get(str(c), 1.0), 1.0)
+    if 'averageCost' in df_part:
+        average = pd.to_numeric(df_part['averageCost'], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+        return np.where(average > 0, average, defaults)
+    return defaults
+
+
+def _multiplier(people, accommodation):
+    return max(1, math.ceil(people / 2)) if accommodation else people
+
+
+def item_costs(df_part, people, accommodation=False):
+    """행별 항목 비용(원) 배열: 장소는 단가 × 인원, 숙소는 단가 × 방 수(2인 1실)."""
+    return np.round(unit_costs(df_part) * _multiplier(int(people), accommodation)).astype(np.int64)
+
+
+def total_budget(user_info):
+    return int(user_info['budget_per_person']) * int(user_info['total_people'])
+
+
+# --- 1. 후보 단계: 예산에 들어갈 수 없는 후보를 미리 제외 ---
+def _keep_affordable(costs, cap, minimum=MIN_BUDGET_CANDIDATES):
+    keep = costs <= cap
+    if keep.sum() < min(minimum, len(costs)):
+        keep = np.zeros(len(costs), dtype=bool)
+        keep[np.argsort(costs, kind="stable")[:minimum]] = True
+    return keep
+
+
+def prefilter_by_budget(df_places, df_accommodations, user_info):
+    """하루 예산 안에 들어갈 수 없는 장소/숙소 후보를 뺍니다. (장소 df, 숙소 df)를 반환합니다.
+
+    - 숙소: 1박 비용이 (전체 예산 × STAY_BUDGET_SHARE / 박 수)를 넘으면 제외
+    - 장소: 가장 싼 숙소로 묵는다고 보고 남은 하루 예산에서, 다른 장소(최저가) 하나와 함께 들어가지 않으면 제외
+    예산이 0이면 거르지 않으며, 어느 쪽이든 최소 MIN_BUDGET_CANDIDATES개(싼 순)는 남깁니다.
+    장소는 모든 날에 하루 최소 장소 수를 채울 수 있을 만큼(MIN_PLACES_PER_DAY × 일수)도 남깁니다.
+    """
+    budget = total_budget(user_info)
+    if budget <= 0:
+        return df_places, df_accommodations
+    people = int(user_info['total_people'])
+    duration = int(user_info['duration'])
+    nights = duration - 1
+
+    cheapest_stay = 0
+    if nights > 0 and not df_accommodations.empty:
+        stay_costs = item_costs(df_accommodations, people, accommodation=True)
+        keep = _keep_affordable(stay_costs, budget * STAY_BUDGET_SHARE / nights)
+        df_accommodations = df_accommodations[keep]
+        cheapest_stay = int(stay_costs[keep].min())
+
+    if not df_places.empty:
+        place_costs = item_costs(df_places, people)
+        day_budget = (budget - cheapest_stay * nights) / duration
+        cap = day_budget - (MIN_PLACES_PER_DAY - 1) * int(place_costs.min())
+        minimum = max(MIN_BUDGET_CANDIDATES, MIN_PLACES_PER_DAY * duration)
+        df_places = df_places[_keep_affordable(place_costs, cap, minimum)]
+    return df_places, df_accommodations
+
+
+# --- 2. 계획 단계: 항목 비용을 모델 값으로 바꾸고 합계를 예산에 맞춤 ---
+class PlanCostModel:
+    """후보 목록 기준으로 계획의 estimated_cost를 다시 매기고, 예산을 넘으면 고칩니다.
+
+    Gemini가 적은 비용은 쓰지 않고 후보 이름으로 찾은 모델 비용을 씁니다. (후보에 없는 항목은 원래 값 유지)
+    예산을 넘으면 재요청 대신 ① 근처(STAY_SWAP_KM)의 더 싼 숙소로 교체 → ② 하루 2곳을 넘는 날의 가장 비싼 장소 제거
+    순서로 맞춥니다.
+    """
+
+    def __init__(self, user_info, df_places, df_accommodations):
+        self.budget = total_budget(user_info)
+        self.people = int(user_info['total_people'])
+        self.place_costs = dict(zip(df_places['title'].astype(str), item_costs(df_places, self.people).tolist()))
+        stay_costs = item_costs(df_accommodations, self.people, accommodation=True)
+        self.stay_costs = dict(zip(df_accommodations['title'].astype(str), stay_costs.tolist()))
+        self.stays = (
+            df_accommodations['title'].astype(str).to_numpy(),
+            df_accommodations['y'].to_numpy(dtype=np.float64),
+            df_accommodations['x'].to_numpy(dtype=np.float64),
+            stay_costs,
+        )
+
+    def costs_of(self, df_part, accommodation=False):
+        """이 요청 인원 기준의 행별 항목 비용 배열. (build_local_plan용)"""
+        return item_costs(df_part, self.people, accommodation)
+
+    def _price(self, item, prices):
+        if not isinstance(item, dict) or item.get("name") == "없음":
+            return 0
+        cost = prices.get(str(item.get("name")))
+        if cost is None:
+            try:
+                cost = max(0, int(item.get("estimated_cost") or 0))
+            except (TypeError, ValueError):
+                cost = 0
+        item["estimated_cost"] = int(cost)
+        return int(cost)
+
+    def price_day(self, day):
+        """일자 하나의 항목 비용을 모델 값으로 바꿉니다. (제자리 수정 후 day 반환)"""
+        for item in day.get("places") or []:
+            self._price(item, self.place_costs)
+        self._price(day.get("accommodation"), self.stay_costs)
+        return day
+
+    @staticmethod
+    def day_total(day):
+        items = list(day.get("places") or []) + [day.get("accommodation") or {}]
+        return sum(int(item.get("estimated_cost") or 0) for item in items if isinstance(item, dict))
+
+    def _cheaper_stay(self, stay):
+        point = parse_coords(stay.get("coords"))
+        titles, lat, lng, costs = self.stays
+        if point is None or not len(titles):
+            return None
+        near = haversine_km(point[0], point[1], lat, lng) <= STAY_SWAP_KM
+        cheaper = near & (costs < int(stay.get("estimated_cost") or 0))
+        if not cheaper.any():
+            return None
+        best = int(np.flatnonzero(cheaper)[np.argmin(costs[cheaper])])
+        return best
+
+    def enforce(self, plan):
+        """계획 전체 비용을 다시 매기고 예산에 맞춥니다. plan['budget']에 합계/일자별 비용/조정 내역을 남깁니다.
+
+        숙소를 바꾸거나 장소를 뺀 일자 번호 집합을 반환합니다. (이미 내보낸 일자를 다시 보낼 때 사용)
+        """
+        days = plan.get("travel_plan") or []
+        for day in days:
+            self.price_day(day)
+        total = sum(self.day_total(day) for day in days)
+        changes = []
+        changed_days = set()
+
+        if self.budget > 0 and total > self.budget:
+            # ① 숙소 교체: 절약 폭이 큰 날부터
+            swaps = []
+            for day in days:
+                stay = day.get("accommodation")
+                if isinstance(stay, dict) and stay.get("name") != "없음":
+                    best = self._cheaper_stay(stay)
+                    if best is not None:
+                        swaps.append((int(stay["estimated_cost"]) - int(self.stays[3][best]), day, best))
+            for saving, day, best in sorted(swaps, key=lambda s: -s[0]):
+                if total <= self.budget:
+                    break
+                titles, lat, lng, costs = self.stays
+                old = day["accommodation"]["name"]
+                day["accommodation"].update({
+                    "name": str(titles[best]),
+                    "description": f"{day['day']}일차 예산에 맞춘 근처 숙소",
+                    "coords": format_coords(lat[best], lng[best]),
+                    "estimated_cost": int(costs[best]),
+                    "closest_subway": "없음",  # 이전 숙소 기준 값은 버리고 후처리에서 다시 채움
+                    "subway_walk_m": None,
+                })
+                total -= saving
+                changes.append(f"{day['day']}일차 숙소 {old} → {titles[best]}")
+                changed_days.add(day['day'])
+
+            # ② 장소 제거: 하루 최소 장소 수는 유지하면서 가장 비싼 장소부터
+            while total > self.budget:
+                removable = [
+                    (int(place.get("estimated_cost") or 0), day, i)
+                    for day in days if len(day.get("places") or []) > MIN_PLACES_PER_DAY
+                    for i, place in enumerate(day["places"])
+                ]
+                if not removable:
+                    break
+                cost, day, i = max(removable, key=lambda r: r[0])
+                if cost <= 0:
+                    break
+                removed = day["places"].pop(i)
+                total -= cost
+                changes.append(f"{day['day']}일차 장소 제외: {removed.get('name')}")
+                changed_days.add(day['day'])
+
+        plan["budget"] = {
+            "total": self.budget,
+            "estimated_total": int(total),
+            "per_day": [self.day_total(day) for day in days],
+            "within_budget": self.budget <= 0 or total <= self.budget,
+            "adjustments": changes,
+        }
+        return changed_days
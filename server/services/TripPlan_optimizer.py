@@ -0,0 +1,206 @@
+import os
+import numpy as np
+from Place_geo import haversine_matrix, format_coords
+
+# --- 로컬 일정 최적화 설정 ---
+MIN_PLACES_PER_DAY = 2  # 하루 방문지 수 범위 (프롬프트 규칙 7)
+MAX_PLACES_PER_DAY = 4
+PLACES_PER_DAY = int(os.getenv("LOCAL_PLACES_PER_DAY", "3"))  # MIN~MAX_PLACES_PER_DAY
+KMEANS_ITERATIONS = 25
+
+NO_ACCOMMODATION = {
+    "name": "없음",
+    "description": "여행 마지막 날에는 별도의 숙박 계획이 없습니다.",
+    "coords": "없음",
+    "estimated_cost": 0,
+    "closest_subway": "없음",
+}
+
+
+def valid_coords(df_part):
+    """좌표가 없거나 한국 범위(Place 스키마 검증과 동일)를 벗어난 행을 제외합니다."""
+    x = df_part['x'].astype('float64')
+    y = df_part['y'].astype('float64')
+    mask = x.between(124, 132) & y.between(33, 43)
+    return df_part[mask.to_numpy()].reset_index(drop=True)
+
+
+def project_km(lat, lng):
+    """k-means용 근사 평면 좌표(km). 한 지역 안에서는 등장방형 투영으로 충분합니다."""
+    lat0 = np.radians(np.nanmean(lat))
+    return np.column_stack((lng * 111.32 * np.cos(lat0), lat * 110.57))
+
+
+def kmeans(points, k, iterations=KMEANS_ITERATIONS):
+    """결정적(farthest-point 초기화) k-means. 중심 좌표 배열 (k, 2)를 반환합니다."""
+    k = min(k, len(points))
+    # 초기 중심: 전체 평균에 가장 가까운 점 → 기존 중심들에서 가장 먼 점을 차례로 추가
+    first = np.argmin(((points - points.mean(axis=0)) ** 2).sum(axis=1))
+    centers = [points[first]]
+    nearest = ((points - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        nxt = int(np.argmax(nearest))
+        centers.append(points[nxt])
+        nearest = np.minimum(nearest, ((points - points[nxt]) ** 2).sum(axis=1))
+    centers = np.array(centers)
+
+    for _ in range(iterations):
+        dist = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = dist.argmin(axis=1)
+        moved = centers.copy()
+        for c in range(k):
+            members = points[labels == c]
+            if len(members):
+                moved[c] = members.mean(axis=0)
+        if np.allclose(moved, centers):
+            break
+        centers = moved
+    return centers
+
+
+def balanced_groups(points, centers, capacity):
+    """각 중심에 가까운 순서대로 최대 capacity개씩 점을 배정합니다. (균형 잡힌 k-medoids 근사)
+
+    모든 (점, 중심) 거리를 오름차순으로 훑으며, 아직 배정되지 않은 점을 자리가 남은 중심에 붙입니다.
+    후보가 많으면 중심에서 먼 점은 자연스럽게 빠지므로 하루 동선이 촘촘해집니다.
+    """
+    dist = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+    groups = [[] for _ in range(len(centers))]
+    taken = np.zeros(len(points), dtype=bool)
+    for flat in np.argsort(dist, axis=None, kind="stable"):
+        p, c = divmod(int(flat), len(centers))
+        if taken[p] or len(groups[c]) >= capacity:
+            continue
+        groups[c].append(p)
+        taken[p] = True
+        if all(len(g) >= capacity for g in groups):
+            break
+    return [np.array(g, dtype=np.int64) for g in groups]
+
+
+def order_route(dist, start=0):
+    """열린 경로 TSP 근사: 최근접 이웃으로 시작한 뒤 2-opt로 교차 구간을 풀어 줍니다."""
+    n = len(dist)
+    if n <= 2:
+        return list(range(n)) if start == 0 else [start] + [i for i in range(n) if i != start]
+
+    # 1. 최근접 이웃
+    order = [start]
+    visited = np.zeros(n, dtype=bool)
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[order[-1]])
+        nxt = int(np.argmin(row))
+        order.append(nxt)
+        visited[nxt] = True
+
+    # 2. 2-opt (시작점은 고정, 끝점은 열려 있음)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                a, b = order[i - 1], order[i]
+                c = order[j]
+                d = order[j + 1] if j + 1 < n else None
+                before = dist[a, b] + (dist[c, d] if d is not None else 0.0)
+                after = dist[a, c] + (dist[b, d] if d is not None else 0.0)
+                if after + 1e-9 < before:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    improved = True
+    return order
+
+
+def _item(row, description, cost):
+    return {
+        "name": str(row['title']),
+        "description": description,
+        "coords": format_coords(row['y'], row['x']),
+        "estimated_cost": int(cost),
+        "closest_subway": "없음",
+    }
+
+
+def _zero_costs(df_part, accommodation=False):
+    return np.zeros(len(df_part), dtype=np.int64)
+
+
+def build_local_plan(user_info, df_places, df_accommodations, places_per_day=None, nearest_stay=None, cost_model=None):
+    """Gemini 없이 travel_plan.json과 같은 구조의 여행 계획을 만듭니다.
+
+    1) 장소 좌표를 여행 일수만큼 k-means로 묶고 일자별 최대 places_per_day개를 배정
+    2) 일자 순서는 클러스터 중심끼리의 경로로 정하고, 일자 안 방문 순서는 NN + 2-opt
+    3) 숙소는 그날 방문지 중심에서 가장 가까운 곳 (마지막 날은 '없음')
+       nearest_stay(위도, 경도)가 주어지면 후보 목록 대신 그 함수(공간 인덱스 검색)로 먼저 찾습니다.
+    항목 비용은 cost_model(TripPlan_costs.PlanCostModel)로 매기며, 없으면 0입니다.
+    """
+    duration = int(user_info['duration'])
+    costs_of = cost_model.costs_of if cost_model is not None else _zero_costs
+    per_day = min(MAX_PLACES_PER_DAY, max(MIN_PLACES_PER_DAY, places_per_day or PLACES_PER_DAY))
+
+    places = valid_coords(df_places)
+    accommodations = valid_coords(df_accommodations)
+    # 모든 날에 최소 장소 수를 채울 수 없으면 만들지 않습니다. (plan_trip이 먼저 TripPlanError로 거름)
+    if len(places) < MIN_PLACES_PER_DAY * duration:
+        return None
+
+    lat = places['y'].to_numpy(dtype=np.float64)
+    lng = places['x'].to_numpy(dtype=np.float64)
+    points = project_km(lat, lng)
+
+    # 1. 일자별 클러스터링 (후보가 부족하면 하루 장소 수를 최소 장소 수까지 줄임)
+    per_day = max(MIN_PLACES_PER_DAY, min(per_day, len(places) // duration))
+    centers = kmeans(points, duration)
+    groups = [g for g in balanced_groups(points, centers, per_day) if len(g)]
+
+    # 2. 일자 순서: 서쪽 끝 클러스터에서 출발해 중심 간 경로 순서로
+    center_lat = np.array([lat[g].mean() for g in groups])
+    center_lng = np.array([lng[g].mean() for g in groups])
+    day_order = order_route(haversine_matrix(center_lat, center_lng), start=int(np.argmin(center_lng)))
+
+    # 항목 비용은 후보 전체에 대해 한 번에 계산 (TripPlan_costs.py)
+    place_costs = costs_of(places)
+    acc_costs = costs_of(accommodations, accommodation=True)
+    acc_lat = accommodations['y'].to_numpy(dtype=np.float64)
+    acc_lng = accommodations['x'].to_numpy(dtype=np.float64)
+
+    travel_plan = []
+    previous_stay = None
+    for day, g in enumerate((groups[i] for i in day_order), start=1):
+        # 3. 일자 내 방문 순서: 전날 숙소에서 가장 가까운 장소부터
+        dist = haversine_matrix(lat[g], lng[g])
+        start = 0
+        if previous_stay is not None:
+            start = int(np.argmin(haversine_matrix([previous_stay[0]], [previous_stay[1]], lat[g], lng[g])[0]))
+        route = [int(g[i]) for i in order_route(dist, start=start)]
+
+        day_places = [
+            _item(places.iloc[p], f"{day}일차 {n}번째 방문지 ({places.iloc[p]['category']})", place_costs[p])
+            for n, p in enumerate(route, start=1)
+        ]
+
+        # 4. 숙소: 마지막 날(당일치기 포함)은 없음, 나머지는 그날 동선 중심에서 가장 가까운 곳
+        last_day = day == len(groups)
+        if last_day or accommodations.empty:
+            accommodation = dict(NO_ACCOMMODATION)
+            previous_stay = None
+        else:
+            center = (lat[route].mean(), lng[route].mean())
+            stay = nearest_stay(*center) if nearest_stay is not None else None
+            if stay is None:
+                to_stay = haversine_matrix([center[0]], [center[1]], acc_lat, acc_lng)[0]
+                nearest = int(np.argmin(to_stay))
+                stay, stay_cost = accommodations.iloc[nearest], acc_costs[nearest]
+            else:
+                stay_cost = costs_of(stay.to_frame().T, accommodation=True)[0]
+            accommodation = _item(stay, f"{day}일차 동선 중심에서 가장 가까운 숙소", stay_cost)
+            previous_stay = (float(stay['y']), float(stay['x']))
+
+        travel_plan.append({"day": day, "places": day_places, "accommodation": accommodation})
+
+    themes = ", ".join(t for t in user_info['place_themes'] if t) or "자유"
+    return {
+        "title": f"{user_info['end_city']} {user_info['district']} {duration}일 여행",
+        "description": f"{themes} 테마 장소를 동선 기준으로 묶은 {duration}일 일정입니다.",
+        "travel_plan": travel_plan,
+    }
@@ -0,0 +1,100 @@
+import os
+import math
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+from Place_geo import haversine_matrix
+from TripPlan_optimizer import valid_coords, project_km, kmeans, balanced_groups, order_route, NO_ACCOMMODATION, MAX_PLACES_PER_DAY
+
+# --- 일자별 병렬 생성 설정 (환경 변수로 조정) ---
+PARALLEL_DAY_CONCURRENCY = int(os.getenv("PARALLEL_DAY_CONCURRENCY", "4"))  # 동시 Gemini 호출 수
+PARALLEL_DAY_RETRIES = int(os.getenv("PARALLEL_DAY_RETRIES", "3"))  # 일자별 최대 재시도 횟수
+PARALLEL_DAY_BACKOFF = float(os.getenv("PARALLEL_DAY_BACKOFF", "1.0"))  # 첫 재시도 대기(초), 이후 2배씩
+ACCOMMODATIONS_PER_DAY = 15  # 일자별 프롬프트에 넣을 숙소 후보 수 (그날 동선 중심에서 가까운 순)
+
+
+def partition_candidates(df_places, df_accommodations, duration):
+    """후보 장소를 일자 수만큼 지리적으로 나누고, 그룹마다 가까운 숙소 후보를 붙입니다.
+
+    [(그날 장소 후보 df, 그날 숙소 후보 df), ...]를 일자 순서대로 반환합니다.
+    일자 순서는 그룹 중심을 서쪽 끝에서부터 이은 경로 순서입니다.
+    """
+    places = valid_coords(df_places)
+    accommodations = valid_coords(df_accommodations)
+    if places.empty:
+        return []
+
+    lat = places['y'].to_numpy(dtype=np.float64)
+    lng = places['x'].to_numpy(dtype=np.float64)
+    points = project_km(lat, lng)
+
+    centers = kmeans(points, duration)
+    capacity = math.ceil(len(places) / len(centers))
+    groups = [g for g in balanced_groups(points, centers, capacity) if len(g)]
+
+    center_lat = np.array([lat[g].mean() for g in groups])
+    center_lng = np.array([lng[g].mean() for g in groups])
+    day_order = order_route(haversine_matrix(center_lat, center_lng), start=int(np.argmin(center_lng)))
+
+    acc_lat = accommodations['y'].to_numpy(dtype=np.float64)
+    acc_lng = accommodations['x'].to_numpy(dtype=np.float64)
+
+    partitions = []
+    for i in day_order:
+        g = groups[i]
+        if len(accommodations):
+            to_stay = haversine_matrix([center_lat[i]], [center_lng[i]], acc_lat, acc_lng)[0]
+            nearest = np.argsort(to_stay, kind="stable")[:ACCOMMODATIONS_PER_DAY]
+            day_accommodations = accommodations.iloc[np.sort(nearest)]
+        else:
+            day_accommodations = accommodations
+        partitions.append((places.iloc[np.sort(g)], day_accommodations))
+    return partitions
+
+
+def run_with_retry(fn, retries=PARALLEL_DAY_RETRIES, base_delay=PARALLEL_DAY_BACKOFF, label=""):
+    """fn()을 실행하고, 예외가 나거나 None을 반환하면 지수 백오프(+지터)로 재시도합니다."""
+    last_error = None
+    for attempt in range(retries + 1):
+        try:
+            result = fn()
+            if result is not None:
+                return result
+            last_error = ValueError("빈 응답")
+        except Exception as e:
+            last_error = e
+        if attempt < retries:
+            delay = base_delay * (2 ** attempt) * (1 + random.random() * 0.5)
+            print(f"\n🔁 {label} 재시도 {attempt + 1}/{retries} ({delay:.1f}초 후): {last_error}")
+            time.sleep(delay)
+    raise last_error
+
+
+def run_days_concurrently(count, fn, max_workers=PARALLEL_DAY_CONCURRENCY, on_result=None):
+    """fn(i)를 i = 0..count-1 에 대해 최대 max_workers개씩 동시에 실행합니다.
+
+    완료되는 순서대로 on_result(i, 결과)를 호출하고, 최종 결과는 i 순서의 리스트로 반환합니다.
+    하나라도 재시도 끝에 실패하면 그 예외를 그대로 올립니다.
+    """
+    results = [None] * count
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, count))) as executor:
+        futures = {
+            executor.submit(run_with_retry, lambda i=i: fn(i), label=f"{i + 1}일차"): i
+            for i in range(count)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            if on_result is not None:
+                on_result(i, results[i])
+    return results
+
+
+def normalize_day_plan(day_plan, day_number):
+    """일자 계획 하나를 travel_plan 항목 형식으로 정리합니다. (일차 번호 고정, 장소 최대 4개, 숙소 누락 보정)"""
+    places = [p for p in day_plan.get("places") or [] if isinstance(p, dict)][:MAX_PLACES_PER_DAY]
+    accommodation = day_plan.get("accommodation")
+    if not isinstance(accommodation, dict) or not accommodation.get("name"):
+        accommodation = dict(NO_ACCOMMODATION)
+    return {"day": day_number, "places": places, "accommodation": accommodation}
@@ -0,0 +1,214 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+from Place_geo import haversine_km, parse_coords
+
+sys.stdout.reconfigure(encoding="utf-8")
+
+# --- 일자별 이동 거리/시간 계산 설정 (환경 변수로 조정) ---
+ROUTE_PROVIDER = os.getenv("ROUTE_PROVIDER", "haversine")
+ROUTE_DETOUR = float(os.getenv("ROUTE_DETOUR", "1.3"))  # 직선 거리 → 실제 이동 거리 보정 계수
+ROUTE_WALK_MAX_KM = float(os.getenv("ROUTE_WALK_MAX_KM", "1.0"))  # 이 거리(보정 후) 이하는 도보
+ROUTE_WALK_KMH = float(os.getenv("ROUTE_WALK_KMH", "4"))
+ROUTE_TRANSIT_KMH = float(os.getenv("ROUTE_TRANSIT_KMH", "25"))  # 차량/대중교통 평균 속도
+ROUTE_TRANSIT_OVERHEAD_MIN = float(os.getenv("ROUTE_TRANSIT_OVERHEAD_MIN", "8"))  # 승차/환승/주차 대기
+ROUTE_CACHE_CELLS = int(os.getenv("ROUTE_CACHE_CELLS", "50000"))  # 좌표 쌍 LRU 최대 항목 수
+ROUTE_COORD_DIGITS = 5  # 캐시 키 좌표 반올림 자릿수 (약 1 m)
+
+
+# --- 경로 제공자: 좌표 쌍 목록 → (거리 km, 시간 분, 이동 수단) ---
+class RouteProvider:
+    """경로 제공자 인터페이스. 실제 길찾기 API를 붙일 때는 이 클래스를 상속해 legs()만 구현하고
+    register_provider()로 등록한 뒤 ROUTE_PROVIDER로 고릅니다.
+    """
+
+    name = "base"
+
+    def legs(self, origins, destinations):
+        """origins[i] → destinations[i] 쌍마다 (거리 km 배열, 시간 분 배열, 이동 수단 목록)을 반환합니다."""
+        raise NotImplementedError
+
+
+class HaversineProvider(RouteProvider):
+    """직선 거리 × 보정 계수 + 속도 모델로 추정하는 로컬 제공자 (API 호출 없음).
+
+    보정 거리가 walk_max_km 이하이면 도보, 그보다 멀면 차량/대중교통 속도 + 고정 대기 시간.
+    """
+
+    name = "haversine"
+
+    def __init__(self, detour=ROUTE_DETOUR, walk_max_km=ROUTE_WALK_MAX_KM, walk_kmh=ROUTE_WALK_KMH,
+                 transit_kmh=ROUTE_TRANSIT_KMH, transit_overhead_min=ROUTE_TRANSIT_OVERHEAD_MIN):
+        self.detour = detour
+        self.walk_max_km = walk_max_km
+        self.walk_kmh = walk_kmh
+        self.transit_kmh = transit_kmh
+        self.transit_overhead_min = transit_overhead_min
+
+    def legs(self, origins, destinations):
+        a = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        b = np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+        km = haversine_km(a[:, 0], a[:, 1], b[:, 0], b[:, 1]) * self.detour
+        walk = km <= self.walk_max_km
+        minutes = np.where(
+            walk,
+            km / self.walk_kmh * 60,
+            km / self.transit_kmh * 60 + self.transit_overhead_min,
+        )
+        minutes[km == 0] = 0
+        return km, minutes, ["walk" if w else "transit" for w in walk.tolist()]
+
+
+ROUTE_PROVIDERS = {HaversineProvider.name: HaversineProvider}
+
+def register_provider(provider_class):
+    ROUTE_PROVIDERS[provider_class.name] = provider_class
+
+
+# --- 좌표 쌍 단위 LRU 캐시 ---
+class RouteMatrixCache:
+    """(제공자, 출발 좌표, 도착 좌표) → (거리, 시간, 수단) 셀을 LRU로 보관하는 거리/시간 행렬 계산기.
+
+    인기 장소는 여러 계획에 반복해서 나오므로, 행렬을 만들 때 캐시에 없는 셀만 모아 제공자를 한 번 호출합니다.
+    """
+
+    def __init__(self, provider, max_cells=ROUTE_CACHE_CELLS):
+        self.provider = provider
+        self.max_cells = max_cells
+        self._cells = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, a, b):
+        return (
+            round(a[0], ROUTE_COORD_DIGITS), round(a[1], ROUTE_COORD_DIGITS),
+            round(b[0], ROUTE_COORD_DIGITS), round(b[1], ROUTE_COORD_DIGITS),
+        )
+
+    def matrix(self, points):
+        """points(위도, 경도 목록) 사이의 (거리 km 행렬, 시간 분 행렬, 수단 행렬)."""
+        n = len(points)
+        km = np.zeros((n, n))
+        minutes = np.zeros((n, n))
+        modes = [["stay"] * n for _ in range(n)]
+
+        missing = []
+        with self._lock:
+            for i in range(n):
+                for j in range(n):
+                    if i == j:
+                        continue
+                    key = self._key(points[i], points[j])
+                    cell = self._cells.get(key)
+                    if cell is None:
+                        missing.append((i, j, key))
+                        continue
+                    self._cells.move_to_end(key)
+                    km[i, j], minutes[i, j], modes[i][j] = cell
+            self.hits += n * (n - 1) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            leg_km, leg_minutes, leg_modes = self.provider.legs(
+                [points[i] for i, _, _ in missing], [points[j] for _, j, _ in missing]
+            )
+            with self._lock:
+                for (i, j, key), d, t, mode in zip(missing, leg_km.tolist(), leg_minutes.tolist(), leg_modes):
+                    km[i, j], minutes[i, j], modes[i][j] = d, t, mode
+                    self._cells[key] = (d, t, mode)
+                while len(self._cells) > self.max_cells:
+                    self._cells.popitem(last=False)
+        return km, minutes, modes
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "cells": len(self._cells),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_router = None
+
+def get_route_cache():
+    """프로세스당 하나의 행렬 캐시 (워커 모드에서는 요청 간 공유)."""
+    global _router
+    if _router is None:
+        provider_class = ROUTE_PROVIDERS.get(ROUTE_PROVIDER)
+        if provider_class is None:
+            print(f"⚠️ 알 수 없는 경로 제공자 '{ROUTE_PROVIDER}' → haversine 사용")
+            provider_class = HaversineProvider
+        _router = RouteMatrixCache(provider_class())
+    return _router
+
+
+# --- 일자별 이동 구간 ---
+def _stops(day, previous_stay=None):
+    """(이름, (위도, 경도)) 방문 순서 목록: 전날 숙소 → 장소들 → 그날 숙소. 좌표가 없는 항목은 건너뜁니다."""
+    items = []
+    if previous_stay is not None:
+        items.append(previous_stay)
+    items.extend(p for p in day.get("places") or [] if isinstance(p, dict))
+    if isinstance(day.get("accommodation"), dict):
+        items.append(day["accommodation"])
+
+    stops = []
+    for item in items:
+        point = parse_coords(item.get("coords"))
+        if point is not None and item.get("name") != "없음":
+            stops.append((item.get("name"), point))
+    return stops
+
+
+def route_day(day, previous_stay=None, router=None):
+    """일자 하나의 방문 순서대로 구간(legs)과 합계를 계산합니다."""
+    router = router or get_route_cache()
+    stops = _stops(day, previous_stay)
+    km, minutes, modes = router.matrix([point for _, point in stops])
+
+    legs = []
+    for i in range(len(stops) - 1):
+        legs.append({
+            "from": stops[i][0],
+            "to": stops[i + 1][0],
+            "distance_km": round(float(km[i, i + 1]), 2),
+            "minutes": int(round(minutes[i, i + 1])),
+            "mode": modes[i][i + 1],
+        })
+    return {
+        "provider": router.provider.name,
+        "legs": legs,
+        "total_km": round(sum(leg["distance_km"] for leg in legs), 2),
+        "total_minutes": sum(leg["minutes"] for leg in legs),
+    }
+
+
+def attach_routes(days, router=None):
+    """계획의 모든 일자에 'route'를 채웁니다. (제자리 수정) 둘째 날부터는 전날 숙소에서 출발합니다."""
+    previous_stay = None
+    for day in days:
+        day["route"] = route_day(day, previous_stay, router)
+        stay = day.get("accommodation")
+        previous_stay = stay if isinstance(stay, dict) and stay.get("name") != "없음" else None
+    return days
+
+
+if __name__ == "__main__":
+    # 사용법: python TripPlan_routing.py [계획 JSON 경로]  (기본: 저장소 루트의 travel_plan.json)
+    import json
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(root, "travel_plan.json")
+    with open(path, encoding="utf-8") as f:
+        sample_plan = json.load(f)
+    for sample_day in attach_routes(sample_plan.get("travel_plan") or []):
+        route = sample_day["route"]
+        print(f"{sample_day['day']}일차: {route['total_km']} km / {route['total_minutes']}분")
+        for leg in route["legs"]:
+            print(f"   {leg['from']} → {leg['to']}: {leg['distance_km']} km, {leg['minutes']}분 ({leg['mode']})")
+    attach_routes(sample_plan.get("travel_plan") or [])
+    print(get_route_cache().stats())
@@ -0,0 +1,76 @@
+import json
+
+
+class TravelPlanStreamParser:
+    """스트리밍으로 들어오는 여행 계획 JSON에서 완성된 일자 객체를 바로 꺼내는 증분 파서.
+
+    응답 전체를 기다리지 않고, 최상위 'travel_plan' 배열 안의 {...} 하나가 닫히는 순간
+    json.loads 하여 반환합니다. 문자열 안의 괄호/따옴표 이스케이프를 고려해 한 글자씩 한 번만 훑습니다.
+    """
+
+    def __init__(self, array_key="travel_plan"):
+        self.array_key = array_key
+        self.text = []          # 지금까지 받은 전체 텍스트 조각
+        self._buffer = ""       # 현재 열려 있는 일자 객체 텍스트
+        self._stack = []        # 열린 괄호 스택 ('{' 또는 '[')
+        self._in_string = False
+        self._escape = False
+        self._string_chars = []
+        self._last_string = None
+        self._top_key = None    # 최상위 객체에서 현재 값이 속한 키
+        self._array_depth = None  # travel_plan 배열이 열린 스택 깊이
+        self._capturing = False
+
+    def feed(self, chunk):
+        """텍스트 조각을 넣고, 이번 조각으로 완성된 일자 객체 목록을 반환합니다."""
+        self.text.append(chunk)
+        completed = []
+        for ch in chunk:
+            if self._capturing:
+                self._buffer += ch
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = "".join(self._string_chars)
+                else:
+                    self._string_chars.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_chars = []
+            elif ch == ":" and len(self._stack) == 1 and self._stack[0] == "{":
+                self._top_key = self._last_string
+            elif ch in "{[":
+                if (
+                    ch == "["
+                    and self._array_depth is None
+                    and len(self._stack) == 1
+                    and self._top_key == self.array_key
+                ):
+                    self._array_depth = len(self._stack) + 1
+                elif ch == "{" and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._capturing = True
+                    self._buffer = "{"
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._capturing and ch == "}" and len(self._stack) == self._array_depth:
+                    self._capturing = False
+                    try:
+                        completed.append(json.loads(self._buffer))
+                    except json.JSONDecodeError:
+                        pass
+                    self._buffer = ""
+                elif ch == "]" and self._array_depth is not None and len(self._stack) == self._array_depth - 1:
+                    self._array_depth = -1  # 배열 종료 (이후 다른 배열은 무시)
+        return completed
+
+    def full_text(self):
+        return "".join(self.text)
@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+sys.stdout.reconfigure(encoding="utf-8")
+
+# --- 단계별 소요 시간 추적 설정 ---
+# 추적 기록(JSON Lines)은 stdout/stderr와 섞이지 않도록 별도 채널로만 씁니다.
+#   TRACE_FD: 이미 열려 있는 파일 디스크립터 번호 (plannerPool.mjs가 워커에 3번 파이프를 열어 줌)
+#   PLAN_TRACE_FILE: 단발 실행 등에서 추적 기록을 덧붙여 쓸 파일 경로
+TRACE_FD = os.getenv("TRACE_FD")
+PLAN_TRACE_FILE = os.getenv("PLAN_TRACE_FILE")
+# 요청 단위 프로파일링: off | cprofile | tracemalloc
+PLAN_PROFILE = os.getenv("PLAN_PROFILE", "off").lower()
+PLAN_PROFILE_DIR = os.getenv(
+    "PLAN_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "profiles"),
+)
+PROFILE_TOP = 20  # 로그에 출력할 상위 함수/할당 위치 수
+
+_lock = threading.Lock()
+_channel = None
+_channel_opened = False
+_request = {}  # 현재 처리 중인 요청 정보 (워커는 한 번에 한 요청만 처리하므로 전역으로 충분)
+_sinks = []  # 같은 프로세스 안에서 기록을 바로 받는 함수들 (벤치마크 집계용)
+
+
+def _open_channel():
+    global _channel, _channel_opened
+    _channel_opened = True
+    try:
+        if TRACE_FD:
+            _channel = os.fdopen(int(TRACE_FD), "w", encoding="utf-8", buffering=1)
+        elif PLAN_TRACE_FILE:
+            _channel = open(PLAN_TRACE_FILE, "a", encoding="utf-8", buffering=1)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 추적 채널을 열 수 없어 단계별 기록을 끕니다: {e}")
+        _channel = None
+    return _channel
+
+
+def enabled():
+    return (_channel if _channel_opened else _open_channel()) is not None
+
+
+def add_sink(fn):
+    """추적 기록(dict)을 채널과 별개로 받을 함수를 등록합니다."""
+    _sinks.append(fn)
+
+
+def emit(record):
+    """추적 기록 한 줄을 채널에 씁니다. 채널도 등록된 함수도 없으면 아무것도 하지 않습니다."""
+    record = {**_request, **record}
+    for sink in _sinks:
+        sink(record)
+    if not enabled():
+        return
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        try:
+            _channel.write(line + "\n")
+        except (OSError, ValueError):
+            pass
+
+
+@contextmanager
+def request_scope(request_id, **fields):
+    """이 블록 안에서 나오는 모든 span에 요청 ID(와 plan_mode 등)를 붙입니다."""
+    global _request
+    previous = _request
+    _request = {"request": request_id, **fields}
+    try:
+        yield
+    finally:
+        _request = previous
+
+
+@contextmanager
+def span(stage, **fields):
+    """블록의 소요 시간을 {"type": "span", "stage": ..., "ms": ...} 기록으로 남깁니다.
+
+    블록 안에서 yield된 dict에 후보 수, 프롬프트 크기 같은 값을 넣으면 같은 기록에 함께 실립니다.
+    예외가 나면 error 필드에 예외 이름을 남기고 그대로 다시 올립니다.
+    """
+    started = time.perf_counter()
+    try:
+        yield fields
+    except BaseException as e:
+        fields["error"] = type(e).__name__
+        raise
+    finally:
+        ms = round((time.perf_counter() - started) * 1000, 2)
+        emit({"type": "span", "stage": stage, "ms": ms, **fields})
+
+
+# --- 요청 단위 프로파일링 (PLAN_PROFILE) ---
+@contextmanager
+def profiled(label):
+    """PLAN_PROFILE에 따라 블록 전체를 cProfile 또는 tracemalloc으로 측정합니다.
+
+    - cprofile: PLAN_PROFILE_DIR/<label>.prof 저장 + 누적 시간 상위 함수를 로그로 출력
+    - tracemalloc: 최대 메모리 사용량을 profile 기록으로 남기고 할당 상위 위치를 로그로 출력
+    """
+    if PLAN_PROFILE == "cprofile":
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(PLAN_PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PLAN_PROFILE_DIR, f"{label}.prof")
+            profiler.dump_stats(path)
+            print(f"\n🔬 cProfile 결과 저장: {path}")
+            pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            emit({"type": "profile", "profiler": "cprofile", "path": path})
+    elif PLAN_PROFILE == "tracemalloc":
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"\n🔬 tracemalloc: 현재 {current / 1024:.0f} KB / 최대 {peak / 1024:.0f} KB")
+            for stat in snapshot.statistics("lineno")[:PROFILE_TOP]:
+                print(f"   {stat}")
+            emit({"type": "profile", "profiler": "tracemalloc",
+                  "current_kb": round(current / 1024), "peak_kb": round(peak / 1024)})
+    else:
+        yield
@@ -0,0 +1,216 @@
+import re
+from collections import Counter
+import numpy as np
+from Place_catalog import normalize_title, iter_place_records
+from Place_geo import parse_coords
+from TripPlan_optimizer import NO_ACCOMMODATION, MIN_PLACES_PER_DAY, MAX_PLACES_PER_DAY
+
+# --- Gemini 응답 검증 설정 ---
+FUZZY_THRESHOLD = 0.5  # 트라이그램 유사도(Dice) 하한
+COORD_DIGITS = 4  # 이름이 안 맞을 때 좌표로 찾을 때의 반올림 자릿수 (약 10 m)
+_NAME_NOISE = re.compile(r"[\s\[\]\(\)<>{}·.,'\"/_-]+")
+
+
+def _name_key(name):
+    """정확 일치용 키: 정규화 후 공백/괄호/구두점 제거, 소문자."""
+    title = normalize_title(name)
+    return _NAME_NOISE.sub("", title).lower() if title else ""
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CandidateMatcher:
+    """프롬프트에 넣은 후보 목록 안에서 이름(정확 → 트라이그램 유사) 또는 좌표로 항목을 찾습니다."""
+
+    def __init__(self, df_part):
+        self.records = list(iter_place_records(df_part))
+        self.exact = {}
+        self.by_coords = {}
+        self.trigram_index = {}
+        self.trigram_counts = []
+        for i, record in enumerate(self.records):
+            key = _name_key(record.title)
+            self.exact.setdefault(key, i)
+            grams = _trigrams(key)
+            self.trigram_counts.append(len(grams))
+            for gram in grams:
+                self.trigram_index.setdefault(gram, []).append(i)
+            if record.coords != "없음":
+                self.by_coords.setdefault((round(record.lat, COORD_DIGITS), round(record.lng, COORD_DIGITS)), i)
+
+    def match(self, name, coords=None):
+        """(후보 번호, 방식 "exact" | "fuzzy" | "coords")를 반환합니다. 못 찾으면 (None, None)."""
+        key = _name_key(name)
+        if key in self.exact:
+            return self.exact[key], "exact"
+
+        if key:
+            grams = _trigrams(key)
+            shared = Counter(i for gram in grams for i in self.trigram_index.get(gram, ()))
+            if shared:
+                best, score = max(
+                    ((i, 2 * n / (len(grams) + self.trigram_counts[i])) for i, n in shared.items()),
+                    key=lambda pair: (pair[1], -pair[0]),
+                )
+                if score >= FUZZY_THRESHOLD:
+                    return best, "fuzzy"
+
+        point = parse_coords(coords)
+        if point is not None:
+            found = self.by_coords.get((round(point[0], COORD_DIGITS), round(point[1], COORD_DIGITS)))
+            if found is not None:
+                return found, "coords"
+        return None, None
+
+
+class PlanValidator:
+    """Gemini가 만든 계획을 후보 목록 기준으로 검사하고 고칩니다.
+
+    - 장소/숙소 이름과 좌표를 후보 목록의 값으로 맞추고(snap), 찾을 수 없는 항목은 제거
+    - 일자 번호를 1..duration으로 다시 매기고, 같은 장소가 여러 날에 나오면 처음 것만 유지
+    - 하루 장소 수를 최대 4개로 자르고, 남은 장소가 2개 미만이거나 숙소를 찾지 못한 날은 '깨진 날'로 표시
+    - 모델이 쓴 내용에서 무언가 바뀐 일자 번호는 changed_days에 모음 (이미 내보낸 일자를 다시 보낼 때 사용)
+    """
+
+    def __init__(self, user_info, df_places, df_accommodations):
+        self.duration = int(user_info['duration'])
+        self.places = CandidateMatcher(df_places)
+        self.accommodations = CandidateMatcher(df_accommodations)
+        self.stats = Counter()
+        self.changed_days = set()
+
+    def _snap(self, item, record):
+        snapped = dict(item)
+        snapped["name"] = record.title
+        snapped["coords"] = record.coords
+        try:
+            snapped["estimated_cost"] = max(0, int(item.get("estimated_cost") or 0))
+        except (TypeError, ValueError):
+            snapped["estimated_cost"] = 0
+        return snapped
+
+    @staticmethod
+    def _moved(item, snapped):
+        return item.get("name") != snapped["name"] or item.get("coords") != snapped["coords"]
+
+    def check_day(self, day, day_number, used=None):
+        """일자 하나를 검사해 (고친 일자, 문제 목록)을 반환합니다. used는 이미 배정된 장소 번호 집합(갱신됨)."""
+        used = used if used is not None else set()
+        problems = []
+        items = (day.get("places") or []) if isinstance(day, dict) else []
+        # 항목을 빼거나(후보에 없음/중복/개수 초과) 이름·좌표를 후보 값으로 바꾸면 바뀐 날로 기록
+        changed = not isinstance(day, dict) or day.get("day") != day_number
+
+        places = []
+        for item in items:
+            if not isinstance(item, dict):
+                changed = True
+                continue
+            found, how = self.places.match(item.get("name"), item.get("coords"))
+            if found is None:
+                self.stats["dropped"] += 1
+                changed = True
+                continue
+            if found in used:
+                self.stats["duplicate"] += 1
+                changed = True
+                continue
+            self.stats[how] += 1
+            used.add(found)
+            places.append(self._snap(item, self.places.records[found]))
+            changed = changed or self._moved(item, places[-1])
+            if len(places) == MAX_PLACES_PER_DAY:
+                break
+        changed = changed or len(places) < sum(isinstance(item, dict) for item in items)
+        if len(places) < MIN_PLACES_PER_DAY:
+            problems.append(f"장소 {len(places)}개 (최소 {MIN_PLACES_PER_DAY}개)")
+
+        accommodation = dict(NO_ACCOMMODATION)
+        item = day.get("accommodation") if isinstance(day, dict) else None
+        if day_number < self.duration:
+            found, how = (None, None)
+            if isinstance(item, dict):
+                found, how = self.accommodations.match(item.get("name"), item.get("coords"))
+            if found is None:
+                self.stats["dropped"] += 1
+                changed = True
+                problems.append(f"후보에 없는 숙소: {item.get('name') if isinstance(item, dict) else item}")
+            else:
+                self.stats[how] += 1
+                accommodation = self._snap(item, self.accommodations.records[found])
+                changed = changed or self._moved(item, accommodation)
+        elif isinstance(item, dict) and item.get("name") != NO_ACCOMMODATION["name"]:
+            # 마지막 날 숙소는 빼므로 바뀐 날
+            changed = True
+
+        if changed:
+            self.changed_days.add(day_number)
+        return {"day": day_number, "places": places, "accommodation": accommodation}, problems
+
+    def validate(self, plan):
+        """계획 전체를 검사합니다. (고친 계획, 깨진 일자 번호 목록)을 반환합니다."""
+        days = [d for d in (plan.get("travel_plan") or []) if isinstance(d, dict)]
+        # 모델이 매긴 일자 순서를 최대한 따르되 번호는 1..duration으로 다시 매김
+        days.sort(key=lambda d: d.get("day") if isinstance(d.get("day"), int) else len(days) + 1)
+        days = days[:self.duration]
+
+        used = set()
+        fixed, broken = [], []
+        for number in range(1, self.duration + 1):
+            if number <= len(days):
+                day, problems = self.check_day(days[number - 1], number, used)
+            else:
+                day, problems = {"day": number, "places": [], "accommodation": dict(NO_ACCOMMODATION)}, ["일자 누락"]
+                self.changed_days.add(number)
+            fixed.append(day)
+            if problems:
+                broken.append(number)
+
+        plan = dict(plan)
+        plan["travel_plan"] = fixed
+        return plan, broken
+
+    def used_positions(self, plan, skip_day=None):
+        """skip_day를 제외한 날들에 이미 배정된 장소 후보 번호 집합."""
+        used = set()
+        for day in plan.get("travel_plan") or []:
+            if day.get("day") == skip_day:
+                continue
+            for item in day.get("places") or []:
+                found, _ = self.places.match(item.get("name"), item.get("coords"))
+                if found is not None:
+                    used.add(found)
+        return used
+
+    def summary(self):
+        s = self.stats
+        return (f"정확 {s['exact']} / 유사 {s['fuzzy']} / 좌표 {s['coords']} / "
+                f"제거 {s['dropped']} / 중복 {s['duplicate']}")
+
+    def fill_missing_accommodation(self, day):
+        """재요청 후에도 숙소가 없는 날(마지막 날 제외)은 그날 장소 중심에서 가장 가까운 숙소 후보로 채웁니다."""
+        if day["day"] >= self.duration or day["accommodation"].get("name") != "없음":
+            return day
+        records = [r for r in self.accommodations.records if r.coords != "없음"]
+        if not records:
+            return day
+        points = [parse_coords(p["coords"]) for p in day["places"]]
+        points = [p for p in points if p is not None]
+        if points:
+            lat, lng = np.mean([p[0] for p in points]), np.mean([p[1] for p in points])
+            stay = min(records, key=lambda r: (r.lat - lat) ** 2 + (r.lng - lng) ** 2)
+        else:
+            stay = records[0]
+        day["accommodation"] = self._snap({"description": f"{day['day']}일차 동선 근처 숙소"}, stay)
+        self.changed_days.add(day["day"])
+        return day
+
+
+def unused_candidates(df_part, used):
+    """이미 다른 날에 배정된 후보를 뺀 df (깨진 날 재요청용)."""
+    keep = np.ones(len(df_part), dtype=bool)
+    keep[[i for i in used if i < len(df_part)]] = False
+    return df_part[keep]
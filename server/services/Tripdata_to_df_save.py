@@ -1,165 +1,384 @@
 import requests
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlencode, unquote
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
+import shutil
+import csv
+import json
 import time
 import math
 import sys
 import os
 from dotenv import load_dotenv
+from Rate_limit import TokenBucket
 
 sys.stdout.reconfigure(encoding='utf-8')
 load_dotenv()
 
-page_no = 1
 key = os.getenv("TRIP_KEY")
 base_url = os.getenv("TRIP_URL")
 
-def fetch_page_data(page_num, num_of_rows, contentTypeId):
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# --- 수집 설정 (환경 변수로 조정) ---
+ROWS_PER_PAGE = int(os.getenv("TRIP_ROWS_PER_PAGE", "1000"))
+REQUESTS_PER_SECOND = float(os.getenv("TRIP_RATE_PER_SEC", "2"))  # 토큰 버킷 충전 속도
+RATE_BURST = int(os.getenv("TRIP_RATE_BURST", "2"))  # 토큰 버킷 용량 (순간 최대 요청 수)
+CONCURRENCY = int(os.getenv("TRIP_CONCURRENCY", "4"))  # 동시 요청 수
+PAGE_RETRIES = int(os.getenv("TRIP_PAGE_RETRIES", "3"))
+REQUEST_TIMEOUT = 300
+CHECKPOINT_DIR = os.getenv("TRIP_CHECKPOINT_DIR", os.path.join(DATA_DIR, "ingest"))
+OUTPUT_FORMAT = os.getenv("TRIP_OUTPUT_FORMAT", "csv")  # csv | parquet
+
+# ID  콘텐츠              설명
+# 12	관광지	            가장 일반적인 관광 명소 (궁궐, 사찰, 공원, 박물관, 자연 명소 등)
+# 14	문화시설	        박물관, 미술관, 공연장, 기념관 등 문화 활동 관련 시설
+# 15	행사/공연/축제	     기간이 한정된 이벤트 정보 (지역 축제, 콘서트, 정기 공연 등)
+# 25	여행 코스	        여러 장소를 묶어 제공하는 추천 여행 경로 (도보, 자전거 코스 등)
+# 28	레포츠	            등산, 스키, 골프, 수상 레포츠 등 스포츠 및 여가 활동 시설
+# 32	숙박	            호텔, 콘도, 펜션, 게스트하우스, 한옥 등 숙박 시설
+# 38	쇼핑	            시장, 백화점, 면세점, 전문 쇼핑몰 등 구매 관련 시설
+# 39	음식점              맛집, 전문 식당 등 식도락 관련 시설
+#
+#
+# 1	서울특별시
+# 2	인천광역시
+# 3	대전광역시
+# 4	대구광역시
+# 5	광주광역시
+# 6	부산광역시
+# 7	울산광역시
+# 8	세종특별자치시
+# 31	경기도
+# 32	강원특별자치도
+# 33	충청북도
+# 34	충청남도
+# 35	경상북도
+# 36	경상남도
+# 37	전북특별자치도
+# 38	전라남도
+# 39	제주특별자치도
+
+# 수집 대상: 이름 → 요청 파라미터. 결과는 data/korea_tour_<이름>.csv 로 저장됩니다.
+DATASETS = {
+    "attractions": {"contentTypeId": 12},
+    "culture": {"contentTypeId": 14},
+    "leports": {"contentTypeId": 28},
+    "camping": {"contentTypeId": 28, "cat1": "A03", "cat2": "A0302", "cat3": "A03021700"},
+    "hotel": {"contentTypeId": 32},
+    "shop": {"contentTypeId": 38},
+    "food": {"contentTypeId": 39},
+}
+
+
+def create_session(pool_size=CONCURRENCY):
+    """커넥션을 재사용하는 requests.Session (동시 요청 수만큼 풀 크기 확보)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# API 항목 태그 → 저장 컬럼 (addr1/addr2는 합쳐서 addr)
+ITEM_FIELDS = {
+    "title": "title",
+    "areacode": "area",
+    "contentid": "contentid",
+    "cat1": "cat",
+    "mapx": "x",
+    "mapy": "y",
+}
+OUTPUT_COLUMNS = ["title", "area", "contentid", "addr", "cat", "x", "y"]
+
+
+def iter_items(source, info):
     """
-    ID  콘텐츠              설명
-    12	관광지	            가장 일반적인 관광 명소 (궁궐, 사찰, 공원, 박물관, 자연 명소 등)
-    14	문화시설	        박물관, 미술관, 공연장, 기념관 등 문화 활동 관련 시설
-    15	행사/공연/축제	     기간이 한정된 이벤트 정보 (지역 축제, 콘서트, 정기 공연 등)
-    25	여행 코스	        여러 장소를 묶어 제공하는 추천 여행 경로 (도보, 자전거 코스 등)
-    28	레포츠	            등산, 스키, 골프, 수상 레포츠 등 스포츠 및 여가 활동 시설
-    32	숙박	            호텔, 콘도, 펜션, 게스트하우스, 한옥 등 숙박 시설
-    38	쇼핑	            시장, 백화점, 면세점, 전문 쇼핑몰 등 구매 관련 시설
-    39	음식점              맛집, 전문 식당 등 식도락 관련 시설
-    
-    
-    1	서울특별시
-    2	인천광역시
-    3	대전광역시
-    4	대구광역시
-    5	광주광역시
-    6	부산광역시
-    7	울산광역시
-    8	세종특별자치시
-    31	경기도
-    32	강원특별자치도
-    33	충청북도
-    34	충청남도
-    35	경상북도
-    36	경상남도
-    37	전북특별자치도
-    38	전라남도
-    39	제주특별자치도
+    API 응답 XML을 iterparse로 흘려 읽으며 <item> 하나가 닫힐 때마다 행(dict)을 내보내는 제너레이터.
+    자식 태그는 한 번씩만 훑고, 처리한 요소는 바로 비워 응답 크기와 상관없이 메모리가 일정합니다.
+    <totalCount>를 만나면 info["total_count"]에 기록합니다.
     """
-    try:
-        params = {
-            'numOfRows': num_of_rows,
-            'pageNo': page_num,
-            'MobileOS': 'ETC',
-            'MobileApp': 'AppTest',
-            'ServiceKey': unquote(key), # Use unquote if the key might contain URL-encoded chars
-            'arrange': 'A',
-            'contentTypeId': contentTypeId, # 12 usually means 'Attractions' or 'Tour Sites'
-            'areaCode': '',
-            'sigunguCode': '',
-            'cat1': 'A03',
-            'cat2': 'A0302',
-            'cat3': 'A03021700'
-        }
+    for _, elem in ET.iterparse(source, events=("end",)):
+        if elem.tag == "item":
+            data = dict.fromkeys(ITEM_FIELDS.values(), "N/A")
+            addr1 = addr2 = ""
+            for child in elem:
+                text = child.text
+                if child.tag == "addr1":
+                    addr1 = text or ""
+                elif child.tag == "addr2":
+                    addr2 = text or ""
+                elif child.tag in ITEM_FIELDS:
+                    data[ITEM_FIELDS[child.tag]] = text
+            data['addr'] = ' '.join(filter(None, [addr1, addr2])) or 'N/A'
+            elem.clear()
+            yield data
+        elif elem.tag == "totalCount" and elem.text:
+            info["total_count"] = int(elem.text)
+
 
-        # Encode parameters for the final URL
-        query_string = urlencode(params)
-        request_url = f"{base_url}?{query_string}"
-
-
-        response = requests.get(request_url, timeout=300) # Added a timeout
-        time.sleep(5)
-        response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-
-        root = ET.fromstring(response.content)
-        items = root.findall('./body/items/item')
-        
-        if not items:
-                print(f"⚠️ 페이지 {page_no}에서 데이터를 찾을 수 없습니다. (데이터 소진 또는 오류)")
-
-        # Simple parsing logic (you may need to extend this)
-        page_data = []
-        for item in items:
-            data = {}
-            # Example fields - retrieve fields relevant to your need
-            data['title'] = item.find('title').text if item.find('title') is not None else 'N/A'
-            data['area'] = item.find('areacode').text if item.find('areacode') is not None else 'N/A'
-            addr1 = item.find('addr1').text if item.find('addr1') is not None else ''
-            addr2 = item.find('addr2').text if item.find('addr2') is not None else ''
-            address_parts = [addr1, addr2]
-            data['addr'] = ' '.join(filter(None, address_parts)) or 'N/A'
-            data["cat"] = item.find('cat1').text if item.find('cat1') is not None else 'N/A'
-            data['x'] = item.find('mapx').text if item.find('mapx') is not None else "N/A"
-            data['y'] = item.find('mapy').text if item.find('mapy') is not None else "N/A"
-            page_data.append(data)
-                
-        return page_data
-
-    except requests.exceptions.HTTPError as e:
-        print(f"🚨 HTTP Error fetching page {page_num}: {e}")
-        print(f"URL: {request_url}")
-        return []
-    except requests.exceptions.RequestException as e:
-        print(f"🚨 Network/Connection Error fetching page {page_num}: {e}")
-        return []
-    except ET.ParseError:
-        print(f"🚨 XML Parse Error for page {page_num}. Content: {response.text[:200]}...") # 에러 내용 일부 출력
-        return []
-    except Exception as e:
-        print(f"🚨 An unexpected error occurred for page {page_num}: {e}")
-        return []
-
-# total_count = 12894, rows_per_page = 12
-def fetch_all_data(total_count, rows_per_page, contentTypeId):
+def fetch_page_data(session, limiter, page_num, num_of_rows, dataset_params):
     """
-    모든 페이지를 반복하며 데이터를 가져오는 메인 함수
+    한 페이지를 요청해 (전체 건수, 행 목록)을 반환합니다.
+    네트워크/HTTP/XML 오류는 지수 백오프로 PAGE_RETRIES번까지 재시도하고, 끝내 실패하면 None을 반환합니다.
     """
-    total_pages = math.ceil(total_count / rows_per_page)
-    all_data = []
-    
-    print(f"✨ 총 {total_count}건의 데이터, 페이지당 {rows_per_page}건, 총 {total_pages} 페이지를 가져옵니다.")
-    
-    for page_num in range(1, total_pages + 1):
-        print(f"--- 🌐 현재 페이지: {page_num}/{total_pages} ---")
-        page_data = fetch_page_data(page_num, rows_per_page, contentTypeId)
-        all_data.extend(page_data)
-        
-        # API 서버에 과부하를 주지 않기 위해 잠시 대기 (선택 사항)
-        time.sleep(2) 
-        
-    print(f"✅ 데이터 수집 완료. 총 {len(all_data)}건의 데이터를 가져왔습니다.")
-    return all_data
-
-def save_to_dataframe_and_csv(data_list, filename="tour_data.csv"):
+    params = {
+        'numOfRows': num_of_rows,
+        'pageNo': page_num,
+        'MobileOS': 'ETC',
+        'MobileApp': 'AppTest',
+        'ServiceKey': unquote(key), # Use unquote if the key might contain URL-encoded chars
+        'arrange': 'A',
+        'areaCode': '',
+        'sigunguCode': '',
+        'cat1': '',
+        'cat2': '',
+        'cat3': '',
+        **dataset_params,
+    }
+    request_url = f"{base_url}?{urlencode(params)}"
+
+    for attempt in range(PAGE_RETRIES + 1):
+        limiter.acquire()
+        try:
+            with session.get(request_url, timeout=REQUEST_TIMEOUT, stream=True) as response:
+                response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+                response.raw.decode_content = True  # gzip 응답도 풀면서 읽기
+                info = {}
+                page_data = list(iter_items(response.raw, info))
+            return info.get("total_count"), page_data
+        except requests.exceptions.HTTPError as e:
+            error = f"HTTP Error: {e}"
+        except requests.exceptions.RequestException as e:
+            error = f"Network/Connection Error: {e}"
+        except ET.ParseError as e:
+            error = f"XML Parse Error: {e}"
+
+        if attempt < PAGE_RETRIES:
+            delay = 2 ** attempt
+            print(f"🔁 페이지 {page_num} 재시도 {attempt + 1}/{PAGE_RETRIES} ({delay}초 후) - {error}")
+            time.sleep(delay)
+        else:
+            print(f"🚨 페이지 {page_num} 수집 실패 - {error}")
+    return None
+
+
+# --- 체크포인트: data/ingest/<이름>/meta.json + pages/<페이지>.json ---
+def _checkpoint_dir(name):
+    return os.path.join(CHECKPOINT_DIR, name)
+
+
+def _page_path(name, page_num):
+    return os.path.join(_checkpoint_dir(name), "pages", f"{page_num:05d}.json")
+
+
+def _write_json_atomic(path, data):
+    """임시 파일에 쓴 뒤 교체하므로, 중간에 중단되어도 깨진 체크포인트가 남지 않습니다."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _load_meta(name, dataset_params, rows_per_page):
+    """이전 실행과 같은 조건이면 저장된 meta를 반환합니다. (조건이 바뀌었으면 None)"""
+    path = os.path.join(_checkpoint_dir(name), "meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("params") != dataset_params or meta.get("rows_per_page") != rows_per_page:
+        return None
+    return meta
+
+
+def fetch_all_data(name, session, limiter, executor, rows_per_page=ROWS_PER_PAGE, fresh=False):
     """
-    수집된 리스트 데이터를 DataFrame으로 변환하고 CSV 파일로 저장합니다.
+    한 데이터셋의 모든 페이지를 병렬로 가져와 페이지별 체크포인트로 저장합니다.
+    이미 저장된 페이지는 건너뛰므로, 중단된 뒤 다시 실행하면 남은 페이지만 요청합니다.
+    모든 페이지가 모이면 이번 실행에서 받은 행 수를, 실패한 페이지가 있으면 None을 반환합니다.
     """
-    print("--- 💾 데이터 변환 및 저장 시작 ---")
-    
-    # 1. DataFrame 변환
-    df = pd.DataFrame(data_list)
-    
-    # 3. CSV 파일 저장
-    # encoding='utf-8-sig'는 한글 깨짐 및 엑셀에서 파일 열람 시 호환성을 높여줍니다.
-    df.to_csv(filename, index=False, encoding='utf-8-sig')
-    
-    print(f"✅ 데이터프레임 변환 성공.")
-    print(f"✅ {filename} 파일로 저장 완료. (총 {len(df)} 행)")
-    print(df.head())
-    
-    return df
-
-# 음식점 total 14126, 숙박 total 3590
-TOTAL_COUNT = 2096
-ROWS_PER_PAGE = 1000
-CONTENT_TYPE_ID = 28
-
-# 1. API 호출로 모든 데이터 수집
-all_data_list = fetch_all_data(TOTAL_COUNT, ROWS_PER_PAGE, CONTENT_TYPE_ID)
-
-# 2. 수집된 데이터를 DataFrame으로 변환하고 CSV로 저장
-if all_data_list:
-    final_df = save_to_dataframe_and_csv(all_data_list, filename="korea_tour_hotel.csv")
-else:
-    print("❌ 수집된 데이터가 없어 DataFrame 변환 및 저장을 건너뜁니다.")
-    final_df = pd.DataFrame()
+    dataset_params = DATASETS[name]
+    if fresh:
+        shutil.rmtree(_checkpoint_dir(name), ignore_errors=True)
+
+    fetched_rows = 0
+    meta = _load_meta(name, dataset_params, rows_per_page)
+    if meta is None:
+        shutil.rmtree(_checkpoint_dir(name), ignore_errors=True)
+        # 1페이지로 전체 건수를 확인 (TOTAL_COUNT를 직접 적지 않아도 됨)
+        first = fetch_page_data(session, limiter, 1, rows_per_page, dataset_params)
+        if first is None or first[0] is None:
+            print(f"❌ [{name}] 전체 건수를 확인하지 못했습니다.")
+            return None
+        total_count, page_data = first
+        meta = {
+            "params": dataset_params,
+            "rows_per_page": rows_per_page,
+            "total_count": total_count,
+            "total_pages": max(1, math.ceil(total_count / rows_per_page)),
+        }
+        _write_json_atomic(_page_path(name, 1), page_data)
+        fetched_rows += len(page_data)
+        _write_json_atomic(os.path.join(_checkpoint_dir(name), "meta.json"), meta)
+
+    total_pages = meta["total_pages"]
+    remaining = [p for p in range(1, total_pages + 1) if not os.path.exists(_page_path(name, p))]
+    print(f"✨ [{name}] 총 {meta['total_count']}건, 페이지당 {rows_per_page}건, 총 {total_pages} 페이지 "
+          f"(남은 페이지 {len(remaining)}개)")
+
+    def fetch_and_save(page_num):
+        result = fetch_page_data(session, limiter, page_num, rows_per_page, dataset_params)
+        if result is None:
+            return None
+        if not result[1]:
+            print(f"⚠️ [{name}] 페이지 {page_num}에서 데이터를 찾을 수 없습니다. (데이터 소진 또는 오류)")
+        _write_json_atomic(_page_path(name, page_num), result[1])
+        return len(result[1])
+
+    futures = {executor.submit(fetch_and_save, p): p for p in remaining}
+    failed = []
+    for done, future in enumerate(as_completed(futures), start=1):
+        page_num = futures[future]
+        rows = future.result()
+        if rows is not None:
+            fetched_rows += rows
+            print(f"--- 🌐 [{name}] 페이지 {page_num} 저장 ({done}/{len(remaining)}) ---")
+        else:
+            failed.append(page_num)
+
+    if failed:
+        print(f"❌ [{name}] {len(failed)}개 페이지 수집 실패: {sorted(failed)} → 다시 실행하면 이어서 수집합니다.")
+        return None
+    return fetched_rows
+
+
+def iter_checkpoint_pages(name):
+    """저장된 페이지 체크포인트를 페이지 순서대로 하나씩 읽어 행 목록을 내보냅니다."""
+    pages_dir = os.path.join(_checkpoint_dir(name), "pages")
+    for filename in sorted(os.listdir(pages_dir)):
+        if filename.endswith(".json"):
+            with open(os.path.join(pages_dir, filename), encoding="utf-8") as f:
+                yield json.load(f)
+
+
+class CsvBatchWriter:
+    """행 묶음을 CSV 파일 끝에 이어 씁니다."""
+
+    def __init__(self, filename):
+        # encoding='utf-8-sig'는 한글 깨짐 및 엑셀에서 파일 열람 시 호환성을 높여줍니다.
+        self.file = open(filename, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.DictWriter(self.file, fieldnames=OUTPUT_COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetBatchWriter:
+    """행 묶음을 Parquet row group으로 이어 씁니다. (pyarrow 필요)"""
+
+    def __init__(self, filename):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("❌ Parquet 저장에는 pyarrow가 필요합니다. (pip install pyarrow)")
+
+        self.pa = pa
+        self.schema = pa.schema(
+            [(c, pa.float64() if c in ("x", "y") else pa.string()) for c in OUTPUT_COLUMNS]
+        )
+        self.writer = pq.ParquetWriter(filename, self.schema)
+
+    def write(self, rows):
+        df = pd.DataFrame(rows, columns=OUTPUT_COLUMNS)
+        df[["x", "y"]] = df[["x", "y"]].apply(pd.to_numeric, errors="coerce")
+        self.writer.write_table(self.pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
+
+
+BATCH_WRITERS = {"csv": CsvBatchWriter, "parquet": ParquetBatchWriter}
+
+
+def save_pages(pages, filename, output_format=OUTPUT_FORMAT):
+    """
+    페이지 단위 행 목록을 받아 파일에 바로 이어 씁니다. 전체 행을 메모리에 모으지 않습니다.
+    페이지 경계에서 중복으로 받은 항목(contentid 기준)은 건너뛰고, 저장한 행 수를 반환합니다.
+    완성된 뒤에 기존 파일과 교체하므로 중간에 실패해도 이전 파일은 그대로 남습니다.
+    """
+    print(f"--- 💾 {filename} 저장 시작 ---")
+    tmp_path = f"{filename}.tmp"
+    writer = BATCH_WRITERS[output_format](tmp_path)
+    seen = set()
+    written = 0
+    try:
+        for rows in pages:
+            batch = []
+            for row in rows:
+                contentid = row.get('contentid')
+                if contentid not in (None, 'N/A'):
+                    if contentid in seen:
+                        continue
+                    seen.add(contentid)
+                batch.append(row)
+            if batch:
+                writer.write(batch)
+                written += len(batch)
+    finally:
+        writer.close()
+    os.replace(tmp_path, filename)
+
+    print(f"✅ {filename} 파일로 저장 완료. (총 {written} 행)")
+    return written
+
+
+def ingest(names, fresh=False, output_format=OUTPUT_FORMAT):
+    """여러 데이터셋을 하나의 세션/속도 제한/스레드 풀로 수집하고, 완료된 데이터셋만 파일로 저장합니다."""
+    session = create_session()
+    limiter = TokenBucket(REQUESTS_PER_SECOND, RATE_BURST)
+    completed = []
+    fetched_total = written_total = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+        for name in names:
+            fetched = fetch_all_data(name, session, limiter, executor, fresh=fresh)
+            if fetched is None:
+                continue
+            fetched_total += fetched
+            filename = os.path.join(DATA_DIR, f"korea_tour_{name}.{output_format}")
+            written = save_pages(iter_checkpoint_pages(name), filename, output_format)
+            if written:
+                written_total += written
+                completed.append(name)
+            else:
+                print(f"❌ [{name}] 수집된 데이터가 없습니다.")
+    session.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ 데이터 수집 완료: {', '.join(completed) or '없음'} / 요청 {len(names)}개")
+    print(f"⏱️ {elapsed:.1f}초 - 수신 {fetched_total}행 ({fetched_total / elapsed:.0f} rows/s), "
+          f"저장 {written_total}행 ({written_total / elapsed:.0f} rows/s)")
+    return completed
+
+
+if __name__ == "__main__":
+    # 사용법: python Tripdata_to_df_save.py [데이터셋 ...] [--fresh] [--parquet]
+    #   데이터셋을 생략하면 DATASETS 전체를 수집합니다. --fresh는 저장된 체크포인트를 지우고 처음부터 받습니다.
+    #   --parquet은 CSV 대신 Parquet으로 저장합니다. (pyarrow 필요)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    unknown = [a for a in args if a not in DATASETS]
+    if unknown:
+        print(f"❌ 알 수 없는 데이터셋입니다: {', '.join(unknown)} ({' | '.join(DATASETS)})")
+        sys.exit(1)
+
+    output_format = "parquet" if "--parquet" in sys.argv[1:] else OUTPUT_FORMAT
+    ingest(args or list(DATASETS), fresh="--fresh" in sys.argv[1:], output_format=output_format)
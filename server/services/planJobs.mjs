@@ -0,0 +1,226 @@
+// server/services/planJobs.mjs
+// 여행 계획 생성 작업 관리: 작업 ID 발급 → 워커 풀 대기열 → 상태 저장 → Trip으로 결과 저장
+import { randomUUID } from "node:crypto";
+import { EventEmitter } from "node:events";
+import PlanJob from "../models/PlanJob.mjs";
+import Trip from "../models/Trip.mjs";
+import Route from "../models/Route.mjs";
+import plannerPool from "./plannerPool.mjs";
+
+// 대기 + 실행 중 작업 수 상한 (넘으면 429)
+const PLAN_QUEUE_LIMIT = Number(process.env.PLAN_QUEUE_LIMIT) || 50;
+
+const TRIP_CATEGORIES = ["카페", "맛집", "역사/문화", "자연", "쇼핑", "캠핑"];
+
+// 작업 완료 후 스트림 기록을 메모리에 유지하는 시간 (늦게 접속한 클라이언트용)
+const STREAM_RETENTION_MS = 5 * 60 * 1000;
+
+let activeJobs = 0;
+
+// jobId → { days: [...], result: null | { event, data }, events: EventEmitter }
+const jobStreams = new Map();
+
+const openJobStream = (jobId) => {
+  const stream = { days: [], result: null, events: new EventEmitter() };
+  jobStreams.set(jobId, stream);
+  return stream;
+};
+
+const closeJobStream = (jobId, event, data) => {
+  const stream = jobStreams.get(jobId);
+  if (!stream) return;
+  stream.result = { event, data };
+  stream.events.emit("end", stream.result);
+  setTimeout(() => jobStreams.delete(jobId), STREAM_RETENTION_MS).unref();
+};
+
+class QueueFullError extends Error {
+  constructor() {
+    super("여행 계획 생성 요청이 많습니다. 잠시 후 다시 시도해 주세요.");
+    this.name = "QueueFullError";
+  }
+}
+
+// 플래너 JSON의 장소/숙소 항목 → Trip.itinerary 항목
+const toPlanItem = (item = {}) => ({
+  name: item.name || "없음",
+  description: item.description,
+  coords: item.coords,
+  estimatedCost: Math.max(0, Number(item.estimated_cost) || 0),
+  closestSubway: item.closest_subway,
+  subwayWalkMeters: item.subway_walk_m ?? undefined,
+});
+
+// 완성된 여행 계획을 Trip 문서로 저장
+const saveTripFromPlan = async (owner, input, plan) => {
+  const startDate = new Date(input.start_date);
+  const endDate = new Date(input.end_date);
+  const duration = Math.round((endDate - startDate) / 86400000) + 1;
+
+  // "맛집:2" 처럼 비중이 붙은 테마는 이름만 사용
+  const themes = String(input.place_themes || "")
+    .split(",")
+    .map((t) => t.split(":")[0].trim());
+
+  return Trip.create({
+    title: String(plan.title || "여행 계획").slice(0, 100),
+    description: plan.description ? String(plan.description).slice(0, 500) : undefined,
+    owner,
+    startDate,
+    endDate,
+    duration,
+    destination: {
+      city: input.end_area,
+      district: input.detail_addr,
+      name: `${input.end_area} ${input.detail_addr}`,
+    },
+    categories: themes.filter((t) => TRIP_CATEGORIES.includes(t)),
+    peopleCount: Number(input.total_people) || 1,
+    constraints: {
+      budget: { perPerson: Number(input.budget_per_person) || 0 },
+    },
+    itinerary: (plan.travel_plan || []).map((day) => ({
+      day: day.day,
+      places: (day.places || []).map(toPlanItem),
+      accommodation: toPlanItem(day.accommodation),
+    })),
+  });
+};
+
+// 플래너 JSON의 일자별 route(legs + 합계) → Route 문서로 저장하고 Trip.activeRoute에 연결
+// route가 없는 계획(이전 캐시 항목 등)이면 아무것도 하지 않습니다.
+const saveRouteFromPlan = async (trip, plan) => {
+  const days = (plan.travel_plan || []).filter((day) => day.route);
+  if (!days.length) return null;
+
+  const dailyRoutes = days.map((day) => ({
+    day: day.day,
+    legs: (day.route.legs || []).map((leg) => ({
+      from: leg.from || "없음",
+      to: leg.to || "없음",
+      distanceKm: Math.max(0, Number(leg.distance_km) || 0),
+      durationMinutes: Math.max(0, Number(leg.minutes) || 0),
+      mode: leg.mode,
+    })),
+    totalDistanceKm: Math.max(0, Number(day.route.total_km) || 0),
+    totalDurationMinutes: Math.max(0, Number(day.route.total_minutes) || 0),
+  }));
+
+  const route = await Route.create({
+    tripId: trip._id,
+    owner: trip.owner,
+    provider: days[0].route.provider,
+    days: dailyRoutes,
+    totalDistanceKm: Number(
+      dailyRoutes.reduce((sum, d) => sum + d.totalDistanceKm, 0).toFixed(2)
+    ),
+    totalDurationMinutes: dailyRoutes.reduce((sum, d) => sum + d.totalDurationMinutes, 0),
+  });
+  await Trip.updateOne({ _id: trip._id }, { activeRoute: route._id });
+  return route;
+};
+
+const runJob = async (job) => {
+  const stream = openJobStream(job.jobId);
+  try {
+    const { plan, cache } = await plannerPool.submit(job.input, {
+      onStart: () => {
+        stream.events.emit("status", "running");
+        PlanJob.updateOne(
+          { _id: job._id },
+          { status: "running", startedAt: new Date() }
+        ).catch((err) => console.error("❌ 작업 상태 갱신 실패:", err.message));
+      },
+      onDay: (day) => {
+        // 검증/예산 맞춤으로 바뀐 일자는 같은 day 번호로 다시 오므로 교체하고 day_update로 알림
+        const index = stream.days.findIndex((d) => d.day === day.day);
+        if (index >= 0) {
+          stream.days[index] = day;
+          stream.events.emit("day_update", day);
+          return;
+        }
+        stream.days.push(day);
+        stream.events.emit("day", day);
+      },
+    });
+
+    const trip = await saveTripFromPlan(job.owner, job.input, plan);
+    // 경로 저장 실패는 계획 자체의 실패로 보지 않습니다.
+    await saveRouteFromPlan(trip, plan).catch((err) =>
+      console.error(`❌ 이동 경로 저장 실패: ${job.jobId}`, err.message)
+    );
+    await PlanJob.updateOne(
+      { _id: job._id },
+      { status: "done", trip: trip._id, cache, finishedAt: new Date() }
+    );
+    console.log(`✅ 여행 계획 작업 완료: ${job.jobId} → Trip ${trip._id}`);
+    closeJobStream(job.jobId, "done", {
+      tripId: trip._id,
+      title: plan.title,
+      description: plan.description,
+    });
+  } catch (err) {
+    console.error(`❌ 여행 계획 작업 실패: ${job.jobId}`, err.message);
+    await PlanJob.updateOne(
+      { _id: job._id },
+      { status: "failed", error: err.message, finishedAt: new Date() }
+    ).catch((e) => console.error("❌ 작업 상태 갱신 실패:", e.message));
+    closeJobStream(job.jobId, "failed", { error: err.message });
+  }
+};
+
+// 진행 중(또는 최근 완료) 작업의 일자별 결과 스트림. 없으면 null
+const getJobStream = (jobId) => jobStreams.get(jobId) || null;
+
+// 새 작업 등록. 대기열이 가득 차면 QueueFullError
+const enqueuePlanJob = async (owner, input) => {
+  if (activeJobs >= PLAN_QUEUE_LIMIT) throw new QueueFullError();
+
+  activeJobs += 1;
+  try {
+    const job = await PlanJob.create({
+      jobId: randomUUID(),
+      owner,
+      status: "queued",
+      input,
+    });
+    runJob(job).finally(() => {
+      activeJobs -= 1;
+    });
+    return job;
+  } catch (err) {
+    activeJobs -= 1;
+    throw err;
+  }
+};
+
+// 본인 작업만 조회 (완료 시 Trip 포함)
+const getPlanJob = (owner, jobId) =>
+  PlanJob.findOne({ jobId, owner }).populate("trip");
+
+// 서버 재시작 전에 대기/실행 중이던 작업은 더 이상 진행되지 않으므로 실패 처리
+const failStaleJobs = () =>
+  PlanJob.updateMany(
+    { status: { $in: ["queued", "running"] } },
+    {
+      status: "failed",
+      error: "서버 재시작으로 작업이 중단되었습니다.",
+      finishedAt: new Date(),
+    }
+  );
+
+const getQueueStats = () => ({
+  active: activeJobs,
+  limit: PLAN_QUEUE_LIMIT,
+  pending: plannerPool.pending.length,
+  workers: plannerPool.size,
+});
+
+export {
+  enqueuePlanJob,
+  getPlanJob,
+  getJobStream,
+  failStaleJobs,
+  getQueueStats,
+  QueueFullError,
+};
@@ -0,0 +1,100 @@
+// server/services/planMetrics.mjs
+// 플래너 워커가 추적 채널(fd 3)로 보내는 단계별 span 기록을 모아 p50/p95 등을 계산하는 집계기
+//   - 단계마다 최근 PLAN_METRICS_WINDOW개의 소요 시간(ms)으로 백분위수 계산
+//   - 실행 이후 전체 건수는 고정 구간 히스토그램으로 누적
+
+// 백분위수 계산에 쓰는 단계별 최근 기록 수
+const PLAN_METRICS_WINDOW = Number(process.env.PLAN_METRICS_WINDOW) || 1000;
+
+// 히스토그램 구간 상한 (ms), 마지막 구간은 그 이상 전부
+const HISTOGRAM_BOUNDS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000];
+
+// span 기록 중 단계별 평균을 함께 보여 줄 숫자 필드 (후보 수, 프롬프트 크기, 응답 크기 등)
+const SUMMED_FIELDS = ["places", "accommodations", "chars", "tokens", "response_chars", "first_day_ms"];
+
+const percentile = (sorted, p) => {
+  if (!sorted.length) return 0;
+  const rank = Math.min(sorted.length - 1, Math.ceil((p / 100) * sorted.length) - 1);
+  return sorted[Math.max(0, rank)];
+};
+
+const round = (value) => Number(value.toFixed(2));
+
+class StageMetrics {
+  constructor({ window = PLAN_METRICS_WINDOW } = {}) {
+    this.window = window;
+    this.stages = new Map();
+  }
+
+  stage(name) {
+    let stage = this.stages.get(name);
+    if (!stage) {
+      stage = {
+        count: 0,
+        errors: 0,
+        recent: [], // 최근 window개 소요 시간 (순환 버퍼)
+        next: 0,
+        buckets: new Array(HISTOGRAM_BOUNDS_MS.length + 1).fill(0),
+        sums: {},
+      };
+      this.stages.set(name, stage);
+    }
+    return stage;
+  }
+
+  // { stage, ms, ...fields } 한 건 기록 (플래너 span 또는 Node 쪽에서 잰 구간)
+  record({ stage: name, ms, error, ...fields }) {
+    if (!name || !Number.isFinite(ms)) return;
+    const stage = this.stage(name);
+    stage.count += 1;
+    if (error) stage.errors += 1;
+
+    if (stage.recent.length < this.window) stage.recent.push(ms);
+    else stage.recent[stage.next] = ms;
+    stage.next = (stage.next + 1) % this.window;
+
+    let bucket = HISTOGRAM_BOUNDS_MS.findIndex((bound) => ms <= bound);
+    if (bucket === -1) bucket = HISTOGRAM_BOUNDS_MS.length;
+    stage.buckets[bucket] += 1;
+
+    for (const field of SUMMED_FIELDS) {
+      const value = Number(fields[field]);
+      if (!Number.isFinite(value)) continue;
+      const sum = stage.sums[field] || (stage.sums[field] = { total: 0, count: 0 });
+      sum.total += value;
+      sum.count += 1;
+    }
+  }
+
+  // 단계별 { count, errors, p50, p95, p99, max, mean, histogram, avg: { 필드: 평균 } }
+  snapshot() {
+    const result = {};
+    for (const [name, stage] of this.stages) {
+      const sorted = [...stage.recent].sort((a, b) => a - b);
+      const mean = sorted.reduce((acc, ms) => acc + ms, 0) / (sorted.length || 1);
+      const avg = {};
+      for (const [field, { total, count }] of Object.entries(stage.sums)) {
+        avg[field] = round(total / count);
+      }
+      result[name] = {
+        count: stage.count,
+        errors: stage.errors,
+        window: sorted.length,
+        p50: round(percentile(sorted, 50)),
+        p95: round(percentile(sorted, 95)),
+        p99: round(percentile(sorted, 99)),
+        max: round(sorted[sorted.length - 1] || 0),
+        mean: round(mean),
+        // 구간별 건수 (누적 아님), upToMs가 null이면 마지막 구간 상한 초과
+        histogram: stage.buckets.map((count, i) => ({
+          upToMs: i < HISTOGRAM_BOUNDS_MS.length ? HISTOGRAM_BOUNDS_MS[i] : null,
+          count,
+        })),
+        avg,
+      };
+    }
+    return result;
+  }
+}
+
+export { StageMetrics, HISTOGRAM_BOUNDS_MS };
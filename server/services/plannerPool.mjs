@@ -0,0 +1,260 @@
+// server/services/plannerPool.mjs
+// TripPlan_base_api.py를 --serve 모드로 상주시켜 두고 요청을 나눠 주는 워커 풀
+import { spawn } from "node:child_process";
+import readline from "node:readline";
+import path from "path";
+import { fileURLToPath } from "url";
+import { StageMetrics } from "./planMetrics.mjs";
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+const PLANNER_SCRIPT = path.join(__dirname, "TripPlan_base_api.py");
+
+class PlannerWorker {
+  constructor(pool, index) {
+    this.pool = pool;
+    this.index = index;
+    this.ready = false;
+    this.current = null; // 처리 중인 작업 { id, input, resolve, reject }
+    this.spawn();
+  }
+
+  spawn() {
+    this.ready = false;
+    // fd 3: 단계별 소요 시간 추적 채널 (TripPlan_trace.py가 TRACE_FD로 씀)
+    const proc = spawn(this.pool.pythonBin, [PLANNER_SCRIPT, "--serve"], {
+      env: { ...process.env, PYTHONIOENCODING: "utf-8", TRACE_FD: "3" },
+      stdio: ["pipe", "pipe", "pipe", "pipe"],
+    });
+    this.proc = proc;
+
+    // stdout은 JSON Lines 응답 전용 채널 (교체된 이전 프로세스의 출력은 무시)
+    const lines = readline.createInterface({ input: proc.stdout });
+    lines.on("line", (line) => {
+      if (proc === this.proc) this.onMessage(line);
+    });
+
+    const traces = readline.createInterface({ input: proc.stdio[3] });
+    traces.on("line", (line) => this.onTrace(line));
+
+    // 파이썬 print 로그는 stderr로 들어옴
+    proc.stderr.on("data", (data) => {
+      console.log(`🐍 Planner[${this.index}]:`, data.toString());
+    });
+
+    // 실행 파일이 없거나(ENOENT) 죽은 워커에 쓰는 경우(EPIPE)에도 서버가 죽지 않도록 처리
+    proc.on("error", (err) => this.onProcessError(proc, err));
+    proc.stdin.on("error", (err) => this.onProcessError(proc, err));
+
+    proc.on("exit", (code, signal) => {
+      console.error(`🐍 Planner[${this.index}] 종료 (code: ${code ?? signal})`);
+      if (proc !== this.proc) return; // 이미 교체된 프로세스
+      this.failCurrent(new Error("플래너 워커가 비정상 종료되었습니다."));
+      this.replace();
+    });
+  }
+
+  onProcessError(proc, err) {
+    console.error(`❌ Planner[${this.index}] 오류:`, err.message);
+    if (proc !== this.proc) return;
+    this.failCurrent(new Error(`플래너 워커 오류: ${err.message}`));
+    this.replace();
+  }
+
+  // 처리 중인 작업을 실패로 끝냄
+  failCurrent(err) {
+    clearTimeout(this.timer);
+    const job = this.current;
+    this.current = null;
+    if (!job) return;
+    this.pool.stageMetrics.record({
+      stage: "worker_roundtrip",
+      ms: Date.now() - job.startedAt,
+      error: true,
+    });
+    job.reject(err);
+  }
+
+  // 현재 프로세스를 버리고 restartDelayMs 뒤 새로 띄움 (대기 중인 작업은 다른 워커로)
+  replace() {
+    const proc = this.proc;
+    this.proc = null;
+    this.ready = false;
+    if (proc && proc.exitCode === null && proc.signalCode === null) proc.kill("SIGKILL");
+    if (!this.pool.closed) {
+      setTimeout(() => {
+        if (!this.pool.closed) this.spawn();
+      }, this.pool.restartDelayMs);
+    }
+    this.pool.dispatch();
+  }
+
+  onTrace(line) {
+    let record;
+    try {
+      record = JSON.parse(line);
+    } catch {
+      return;
+    }
+    if (record.type === "span") {
+      this.pool.stageMetrics.record(record);
+    } else if (record.type === "profile") {
+      console.log(`🔬 Planner[${this.index}] 프로파일 (${record.profiler}):`, record.path || `최대 ${record.peak_kb} KB`);
+    }
+  }
+
+  onMessage(line) {
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch {
+      console.log(`🐍 Planner[${this.index}]:`, line);
+      return;
+    }
+
+    if (message.type === "ready") {
+      console.log(
+        `✅ Planner[${this.index}] 준비 완료 (장소 ${message.places}건 로드)`
+      );
+      this.ready = true;
+      this.pool.dispatch();
+      return;
+    }
+
+    const job = this.current;
+    if (!job || message.id !== job.id) return;
+
+    // 스트리밍 중간 결과: 완성된 일자 계획
+    if (message.type === "day") {
+      if (job.onDay) job.onDay(message.day);
+      return;
+    }
+
+    this.current = null;
+    clearTimeout(this.timer);
+
+    if (message.cache) this.pool.recordCache(message.cache);
+    this.pool.stageMetrics.record({
+      stage: "worker_roundtrip",
+      ms: Date.now() - job.startedAt,
+      error: !message.ok,
+    });
+
+    if (message.ok) {
+      job.resolve({ plan: message.plan, cache: message.cache });
+    } else {
+      job.reject(new Error(message.error || "여행 계획 생성 실패"));
+    }
+    this.pool.dispatch();
+  }
+
+  run(job) {
+    this.current = job;
+    job.startedAt = Date.now();
+    this.pool.stageMetrics.record({ stage: "queue_wait", ms: job.startedAt - job.enqueuedAt });
+    if (job.onStart) job.onStart();
+    // Gemini 호출이 멈추면 워커 슬롯이 영영 막히므로, 제한 시간을 넘기면 워커를 교체합니다.
+    if (this.pool.jobTimeoutMs > 0) {
+      this.timer = setTimeout(() => {
+        console.error(`⏰ Planner[${this.index}] 작업 ${job.id} 시간 초과 (${this.pool.jobTimeoutMs} ms)`);
+        this.failCurrent(new Error("여행 계획 생성 시간이 초과되었습니다."));
+        this.replace();
+      }, this.pool.jobTimeoutMs);
+    }
+    this.proc.stdin.write(
+      JSON.stringify({
+        id: job.id,
+        input: job.input,
+        stream: Boolean(job.onDay),
+      }) + "\n"
+    );
+  }
+
+  get idle() {
+    return this.ready && !this.current;
+  }
+}
+
+class PlannerPool {
+  constructor({ size = 2, pythonBin = "python", restartDelayMs = 1000, jobTimeoutMs = 180000 } = {}) {
+    this.size = size;
+    this.pythonBin = pythonBin;
+    this.restartDelayMs = restartDelayMs;
+    this.jobTimeoutMs = jobTimeoutMs; // 0이면 제한 없음
+    this.workers = [];
+    this.pending = [];
+    this.nextId = 1;
+    this.closed = false;
+    this.cacheStats = { hit: 0, miss: 0, off: 0 };
+    this.stageMetrics = new StageMetrics();
+  }
+
+  start() {
+    for (let i = this.workers.length; i < this.size; i++) {
+      this.workers.push(new PlannerWorker(this, i));
+    }
+    return this;
+  }
+
+  // 사용자 입력을 넘기면 { plan: 완성된 여행 계획(JSON), cache: "hit" | "miss" | "off" }로 resolve 되는 Promise 반환
+  // onStart: 대기열에서 꺼내져 워커가 실제로 처리를 시작할 때 호출
+  // onDay: 지정하면 스트리밍 모드로 요청하고, 일자별 계획이 완성될 때마다 호출
+  submit(input, { onStart, onDay } = {}) {
+    return new Promise((resolve, reject) => {
+      this.pending.push({
+        id: String(this.nextId++),
+        input,
+        onStart,
+        onDay,
+        enqueuedAt: Date.now(),
+        resolve,
+        reject,
+      });
+      this.dispatch();
+    });
+  }
+
+  dispatch() {
+    for (const worker of this.workers) {
+      if (this.pending.length === 0) return;
+      if (worker.idle) worker.run(this.pending.shift());
+    }
+  }
+
+  recordCache(status) {
+    if (status in this.cacheStats) this.cacheStats[status] += 1;
+  }
+
+  // 계획 캐시 적중/미스 집계 (모니터링용)
+  getCacheStats() {
+    const { hit, miss } = this.cacheStats;
+    const lookups = hit + miss;
+    return {
+      ...this.cacheStats,
+      hitRate: lookups ? Number((hit / lookups).toFixed(4)) : 0,
+    };
+  }
+
+  // 단계별 소요 시간 분포 (워커 span + 대기열 대기/워커 왕복 시간)
+  getStageStats() {
+    return this.stageMetrics.snapshot();
+  }
+
+  close() {
+    this.closed = true;
+    for (const worker of this.workers) {
+      clearTimeout(worker.timer);
+      if (worker.proc) worker.proc.kill();
+    }
+  }
+}
+
+const plannerPool = new PlannerPool({
+  size: Number(process.env.PLANNER_WORKERS) || 2,
+  pythonBin: process.env.PYTHON_BIN || "python",
+  jobTimeoutMs: Number(process.env.PLANNER_JOB_TIMEOUT_MS ?? 180000),
+});
+
+export { PlannerPool };
+export default plannerPool;
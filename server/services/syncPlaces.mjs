@@ -0,0 +1,279 @@
+// server/services/syncPlaces.mjs
+// Tour API 수집 CSV(server/services/data/korea_tour_*.csv) → place 컬렉션 증분 동기화
+//   - contentId 기준으로 행마다 내용 해시를 계산해 새 장소/바뀐 장소만 upsert
+//   - CSV에서 사라진 장소는 삭제하지 않고 isActive:false 처리
+//     (파일을 지정하면 그 파일에서 온 장소만, sourceFile이 없는 이전 데이터는 전체 동기화 때만)
+//   - 사용법: node syncPlaces.mjs [--dry-run] [파일 ...]
+import fs from "fs";
+import path from "path";
+import readline from "readline";
+import { createHash } from "node:crypto";
+import { fileURLToPath } from "url";
+import mongoose from "mongoose";
+import Place from "../models/Place.js";
+import connectDB from "../config/db.mjs";
+
+const DATA_DIR = path.join(path.dirname(fileURLToPath(import.meta.url)), "data");
+
+// 한 번의 bulkWrite에 담을 작업 수
+const BATCH_SIZE = Number(process.env.PLACE_SYNC_BATCH) || 1000;
+
+// Tour API 지역 코드 → 시/도 이름
+const AREA_NAMES = {
+  1: "서울특별시",
+  2: "인천광역시",
+  3: "대전광역시",
+  4: "대구광역시",
+  5: "광주광역시",
+  6: "부산광역시",
+  7: "울산광역시",
+  8: "세종특별자치시",
+  31: "경기도",
+  32: "강원특별자치도",
+  33: "충청북도",
+  34: "충청남도",
+  35: "경상북도",
+  36: "경상남도",
+  37: "전북특별자치도",
+  38: "전라남도",
+  39: "제주특별자치도",
+};
+
+// Tour API 대분류(cat1) → Place.category
+const CATEGORY_LABELS = {
+  A01: "자연",
+  A02: "역사/문화",
+  A04: "쇼핑",
+  A05: "맛집",
+  B02: "숙소",
+};
+
+// 파일 단위로 카테고리가 정해지는 데이터셋 (cat1만으로는 구분되지 않음)
+const FILE_CATEGORIES = {
+  "korea_tour_camping.csv": "캠핑",
+};
+
+// ===== CSV 읽기 =====
+// 따옴표로 감싼 필드("a, b")와 이스케이프된 따옴표("")를 처리하는 한 줄 파서
+const parseCsvLine = (line) => {
+  const fields = [];
+  let field = "";
+  let quoted = false;
+  for (let i = 0; i < line.length; i += 1) {
+    const ch = line[i];
+    if (quoted) {
+      if (ch === '"' && line[i + 1] === '"') {
+        field += '"';
+        i += 1;
+      } else if (ch === '"') {
+        quoted = false;
+      } else {
+        field += ch;
+      }
+    } else if (ch === '"') {
+      quoted = true;
+    } else if (ch === ",") {
+      fields.push(field);
+      field = "";
+    } else {
+      field += ch;
+    }
+  }
+  fields.push(field);
+  return fields;
+};
+
+// CSV를 한 줄씩 읽어 { 헤더: 값 } 객체를 내보냅니다.
+async function* readCsvRows(filePath) {
+  const lines = readline.createInterface({
+    input: fs.createReadStream(filePath, { encoding: "utf-8" }),
+    crlfDelay: Infinity,
+  });
+  let header = null;
+  for await (const rawLine of lines) {
+    const line = header ? rawLine : rawLine.replace(/^\uFEFF/, ""); // utf-8-sig BOM 제거
+    if (!line.trim()) continue;
+    const fields = parseCsvLine(line);
+    if (!header) {
+      header = fields.map((h) => h.trim());
+      continue;
+    }
+    yield Object.fromEntries(header.map((h, i) => [h, fields[i]]));
+  }
+}
+
+// ===== CSV 행 → Place 필드 =====
+const isKoreanCoords = (lng, lat) =>
+  lng >= 124 && lng <= 132 && lat >= 33 && lat <= 43; // Place 스키마 검증과 동일
+
+const hashPlace = (place) =>
+  createHash("sha1").update(JSON.stringify(place)).digest("hex");
+
+// 변환할 수 없는 행은 건너뛴 이유(문자열)를 반환합니다.
+const toPlaceFields = (row, fileName) => {
+  const title = (row.title || "").trim();
+  const full = (row.addr || "").replace(/\s+/g, " ").trim();
+  if (!title || title === "N/A" || !full || full === "N/A") return "필수 데이터 누락";
+
+  const category = FILE_CATEGORIES[fileName] || CATEGORY_LABELS[row.cat];
+  if (!category) return "카테고리 매핑 없음";
+
+  const lng = parseFloat(row.x);
+  const lat = parseFloat(row.y);
+  if (!isKoreanCoords(lng, lat)) return "좌표 범위 오류";
+
+  // 시/도는 지역 코드, 시군구는 주소 두 번째 토큰 (예: "경기도 안산시 상록구 ..." → 안산시)
+  const tokens = full.split(" ");
+  const city = AREA_NAMES[Number(row.area)] || tokens[0];
+  const district = tokens[1];
+  if (!district) return "시군구 없음";
+
+  // contentid가 없는 데이터셋(예: 이전 캠핑 CSV)은 이름+주소로 고정 키를 만듭니다.
+  const contentId =
+    row.contentid && row.contentid !== "N/A"
+      ? String(row.contentid).trim()
+      : `KTO_${createHash("sha1").update(`${title}|${full}`).digest("hex").slice(0, 16)}`;
+
+  const fields = {
+    title,
+    category,
+    address: { full, city, district },
+    coordinates: { type: "Point", coordinates: [lng, lat] },
+  };
+  return { contentId, fields, contentHash: hashPlace(fields) };
+};
+
+// ===== 동기화 =====
+const listCsvFiles = (names) => {
+  if (names.length) return names.map((n) => path.resolve(DATA_DIR, n));
+  return fs
+    .readdirSync(DATA_DIR)
+    .filter((f) => f.startsWith("korea_tour_") && f.endsWith(".csv"))
+    .sort()
+    .map((f) => path.join(DATA_DIR, f));
+};
+
+// CSV 전체를 contentId → { fields, contentHash } 로 모읍니다.
+// 같은 contentId는 처음 나온 행을 씁니다. (파일 이름순 → 행 순서, Place_catalog.build_catalog와 같은 규칙)
+const loadSourcePlaces = async (files) => {
+  const places = new Map();
+  const skipped = {};
+  let duplicates = 0;
+  for (const filePath of files) {
+    const fileName = path.basename(filePath);
+    let count = 0;
+    for await (const row of readCsvRows(filePath)) {
+      const place = toPlaceFields(row, fileName);
+      if (typeof place === "string") {
+        skipped[place] = (skipped[place] || 0) + 1;
+        continue;
+      }
+      place.sourceFile = fileName;
+      if (places.has(place.contentId)) {
+        duplicates += 1;
+        continue;
+      }
+      places.set(place.contentId, place);
+      count += 1;
+    }
+    console.log(`📄 ${fileName}: ${count}건`);
+  }
+  return { places, skipped, duplicates };
+};
+
+const flush = async (ops, dryRun) => {
+  const batch = ops.splice(0);
+  if (!batch.length || dryRun) return;
+  await Place.bulkWrite(batch, { ordered: false });
+};
+
+const syncPlaces = async ({ files, dryRun, fullSync }) => {
+  const startedAt = Date.now();
+  const { places, skipped, duplicates } = await loadSourcePlaces(files);
+  const syncedFiles = new Set(files.map((f) => path.basename(f)));
+
+  // KTO 장소 전체를 비교 대상으로 읽되, 비활성화는 이번에 동기화하는 파일에서 온 장소로만 한정
+  // (같은 카테고리라도 다른 CSV에서 온 장소는 건드리지 않음)
+  const existing = new Map();
+  const cursor = Place.find(
+    { dataSource: "KTO" },
+    { contentId: 1, contentHash: 1, isActive: 1, sourceFile: 1, _id: 0 }
+  )
+    .lean()
+    .cursor();
+  for await (const doc of cursor) existing.set(doc.contentId, doc);
+
+  const now = new Date();
+  const counts = { inserted: 0, updated: 0, reactivated: 0, unchanged: 0, deactivated: 0 };
+  const ops = [];
+
+  for (const [contentId, { fields, contentHash, sourceFile }] of places) {
+    const current = existing.get(contentId);
+    if (
+      current &&
+      current.contentHash === contentHash &&
+      current.isActive !== false &&
+      current.sourceFile === sourceFile
+    ) {
+      counts.unchanged += 1;
+      continue;
+    }
+    if (!current) counts.inserted += 1;
+    else if (current.isActive === false) counts.reactivated += 1;
+    else counts.updated += 1;
+
+    ops.push({
+      updateOne: {
+        filter: { contentId },
+        update: {
+          $set: { ...fields, contentHash, sourceFile, isActive: true, lastSyncedAt: now },
+          $setOnInsert: { contentId, dataSource: "KTO" },
+        },
+        upsert: true,
+      },
+    });
+    if (ops.length >= BATCH_SIZE) await flush(ops, dryRun);
+  }
+
+  // 동기화한 CSV에서 사라진 장소는 비활성화 (sourceFile이 없는 이전 데이터는 전체 동기화일 때만)
+  for (const [contentId, doc] of existing) {
+    if (places.has(contentId) || doc.isActive === false) continue;
+    if (doc.sourceFile ? !syncedFiles.has(doc.sourceFile) : !fullSync) continue;
+    counts.deactivated += 1;
+    ops.push({
+      updateOne: {
+        filter: { contentId },
+        update: { $set: { isActive: false, lastSyncedAt: now } },
+      },
+    });
+    if (ops.length >= BATCH_SIZE) await flush(ops, dryRun);
+  }
+  await flush(ops, dryRun);
+
+  const seconds = ((Date.now() - startedAt) / 1000).toFixed(1);
+  console.log(`${dryRun ? "🔎 [dry-run] " : "✅ "}장소 동기화 결과 (${seconds}초)`);
+  console.log(
+    `   추가 ${counts.inserted} / 변경 ${counts.updated} / 재활성화 ${counts.reactivated} / ` +
+      `비활성화 ${counts.deactivated} / 변경 없음 ${counts.unchanged}`
+  );
+  if (duplicates) console.log(`   ⚠️ CSV 내 중복 contentId: ${duplicates}건 (첫 행 사용)`);
+  for (const [reason, count] of Object.entries(skipped)) {
+    console.log(`   ⚠️ 건너뜀 - ${reason}: ${count}건`);
+  }
+  return counts;
+};
+
+const args = process.argv.slice(2);
+const dryRun = args.includes("--dry-run");
+const fileArgs = args.filter((a) => !a.startsWith("--"));
+const files = listCsvFiles(fileArgs);
+
+await connectDB();
+try {
+  await syncPlaces({ files, dryRun, fullSync: fileArgs.length === 0 });
+} catch (error) {
+  console.error(`❌ 장소 동기화 실패: ${error.message}`);
+  process.exitCode = 1;
+} finally {
+  await mongoose.disconnect();
+}
@@ -0,0 +1,18 @@
+import os
+import sys
+import pytest
+
+# 플래너 모듈은 server/services에 평평하게 있고 서로 모듈 이름으로 import 합니다.
+SERVICES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVICES_DIR not in sys.path:
+    sys.path.insert(0, SERVICES_DIR)
+
+
+@pytest.fixture(scope="session")
+def catalog():
+    """data/korea_tour_*.csv 카탈로그 (없으면 건너뜀)."""
+    from Place_catalog import load_catalog
+    try:
+        return load_catalog()
+    except (FileNotFoundError, ValueError):
+        pytest.skip("data/korea_tour_*.csv 카탈로그가 없습니다.")
@@ -0,0 +1,90 @@
+import pandas as pd
+from Place_geo import format_coords
+from TripPlan_costs import PlanCostModel
+from TripPlan_optimizer import MIN_PLACES_PER_DAY, NO_ACCOMMODATION
+
+PEOPLE = 2
+PLACES = [(f"장소 {i}", 37.56 + i * 0.001, 126.97, 10000 * (i + 1)) for i in range(8)]
+STAYS = [
+    ("비싼 호텔", 37.560, 126.970, 200000),
+    ("싼 호텔", 37.565, 126.975, 50000),
+    ("먼 호텔", 35.100, 129.030, 10000),
+]
+
+
+def _frame(rows, category):
+    return pd.DataFrame({
+        "title": [r[0] for r in rows],
+        "category": category,
+        "city": "서울특별시",
+        "x": [r[2] for r in rows],
+        "y": [r[1] for r in rows],
+        "averageCost": [r[3] for r in rows],
+    })
+
+
+def _item(row):
+    return {"name": row[0], "description": "", "coords": format_coords(row[1], row[2]),
+            "estimated_cost": 1, "closest_subway": "시청역", "subway_walk_m": 100}
+
+
+def _plan():
+    return {"travel_plan": [
+        {"day": 1, "places": [_item(PLACES[i]) for i in (0, 1, 2, 3)], "accommodation": _item(STAYS[0])},
+        {"day": 2, "places": [_item(PLACES[i]) for i in (4, 5, 6, 7)], "accommodation": dict(NO_ACCOMMODATION)},
+    ]}
+
+
+def _model(budget_per_person):
+    user_info = {"budget_per_person": budget_per_person, "total_people": PEOPLE}
+    return PlanCostModel(user_info, _frame(PLACES, "맛집"), _frame(STAYS, "숙소"))
+
+
+def test_within_budget_only_reprices():
+    plan = _plan()
+    changed = _model(1_000_000).enforce(plan)
+    assert changed == set()
+    assert plan["budget"]["adjustments"] == []
+    assert plan["budget"]["within_budget"]
+    assert plan["travel_plan"][0]["places"][0]["estimated_cost"] == 10000 * PEOPLE
+    assert plan["travel_plan"][0]["accommodation"]["estimated_cost"] == 200000
+    assert plan["budget"]["estimated_total"] == sum(plan["budget"]["per_day"])
+
+
+def test_swaps_to_a_cheaper_nearby_stay_first():
+    plan = _plan()
+    places_total = sum(p[3] for p in PLACES) * PEOPLE
+    changed = _model((places_total + 50000) // PEOPLE).enforce(plan)
+    stay = plan["travel_plan"][0]["accommodation"]
+    assert changed == {1}
+    assert stay["name"] == "싼 호텔"  # '먼 호텔'은 더 싸지만 STAY_SWAP_KM 밖
+    assert stay["closest_subway"] == "없음" and stay["subway_walk_m"] is None
+    assert [len(d["places"]) for d in plan["travel_plan"]] == [4, 4]
+    assert plan["budget"]["within_budget"]
+
+
+def test_drops_most_expensive_places_first():
+    plan = _plan()
+    places_total = sum(p[3] for p in PLACES) * PEOPLE
+    _model((places_total + 50000 - 80000 * PEOPLE) // PEOPLE).enforce(plan)
+    names = [p["name"] for d in plan["travel_plan"] for p in d["places"]]
+    assert "장소 7" not in names
+    assert len(names) == 7
+    assert plan["budget"]["within_budget"]
+
+
+def test_keeps_minimum_places_per_day_even_over_budget():
+    plan = _plan()
+    changed = _model(1).enforce(plan)
+    assert changed == {1, 2}
+    assert [len(d["places"]) for d in plan["travel_plan"]] == [MIN_PLACES_PER_DAY] * 2
+    # 남는 것은 각 날의 가장 싼 장소
+    assert [p["name"] for p in plan["travel_plan"][0]["places"]] == ["장소 0", "장소 1"]
+    assert not plan["budget"]["within_budget"]
+
+
+def test_zero_budget_is_not_enforced():
+    plan = _plan()
+    assert _model(0).enforce(plan) == set()
+    assert [len(d["places"]) for d in plan["travel_plan"]] == [4, 4]
+    assert plan["budget"]["within_budget"]
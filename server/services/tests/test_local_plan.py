@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+from TripPlan_costs import PlanCostModel
+from TripPlan_optimizer import build_local_plan, MIN_PLACES_PER_DAY, MAX_PLACES_PER_DAY, NO_ACCOMMODATION
+
+
+def _frame(n, category, seed, prefix):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "title": [f"{prefix} {i}" for i in range(n)],
+        "category": category,
+        "city": "서울특별시",
+        "district": "종로구",
+        "x": rng.uniform(126.95, 127.05, n),
+        "y": rng.uniform(37.55, 37.60, n),
+    })
+
+
+def _user_info(duration):
+    return {
+        "duration": duration,
+        "total_people": 2,
+        "budget_per_person": 0,
+        "place_themes": ["맛집"],
+        "end_city": "서울특별시",
+        "district": "종로구",
+    }
+
+
+def _names(plan):
+    return [place["name"] for day in plan["travel_plan"] for place in day["places"]]
+
+
+@pytest.mark.parametrize("duration", [1, 2, 3, 5])
+@pytest.mark.parametrize("places_per_day", [None, 1, 3, 9])
+def test_day_sizes_stay_within_range(duration, places_per_day):
+    plan = build_local_plan(
+        _user_info(duration), _frame(40, "맛집", 1, "장소"), _frame(5, "숙소", 2, "숙소"), places_per_day=places_per_day
+    )
+    days = plan["travel_plan"]
+    assert [day["day"] for day in days] == list(range(1, duration + 1))
+    for day in days:
+        assert MIN_PLACES_PER_DAY <= len(day["places"]) <= MAX_PLACES_PER_DAY
+    names = _names(plan)
+    assert len(names) == len(set(names))
+
+
+def test_few_candidates_still_fill_every_day():
+    duration = 3
+    plan = build_local_plan(_user_info(duration), _frame(MIN_PLACES_PER_DAY * duration, "맛집", 3, "장소"),
+                            _frame(3, "숙소", 4, "숙소"), places_per_day=MAX_PLACES_PER_DAY)
+    assert [len(day["places"]) for day in plan["travel_plan"]] == [MIN_PLACES_PER_DAY] * duration
+
+
+def test_too_few_candidates_returns_none():
+    duration = 3
+    places = _frame(MIN_PLACES_PER_DAY * duration - 1, "맛집", 5, "장소")
+    assert build_local_plan(_user_info(duration), places, _frame(3, "숙소", 6, "숙소")) is None
+
+
+def test_last_day_has_no_accommodation():
+    plan = build_local_plan(_user_info(3), _frame(20, "맛집", 7, "장소"), _frame(5, "숙소", 8, "숙소"))
+    stays = [day["accommodation"]["name"] for day in plan["travel_plan"]]
+    assert stays[-1] == NO_ACCOMMODATION["name"]
+    assert all(name.startswith("숙소") for name in stays[:-1])
+
+
+def test_costs_come_from_the_cost_model():
+    user_info = _user_info(2)
+    places, stays = _frame(12, "맛집", 9, "장소"), _frame(4, "숙소", 10, "숙소")
+    free = build_local_plan(user_info, places, stays)
+    priced = build_local_plan(user_info, places, stays, cost_model=PlanCostModel(user_info, places, stays))
+    assert all(place["estimated_cost"] == 0 for day in free["travel_plan"] for place in day["places"])
+    assert all(place["estimated_cost"] > 0 for day in priced["travel_plan"] for place in day["places"])
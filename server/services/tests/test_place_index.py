@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from Place_index import PlaceIndex, _legacy_select
+
+
+def _same(legacy, indexed):
+    if legacy is None or indexed is None:
+        return legacy is None and indexed is None
+    return np.array_equal(legacy[0], indexed[0]) and np.array_equal(legacy[1], indexed[1])
+
+
+@pytest.fixture
+def small_df():
+    rows = [
+        ("A 식당", "맛집", "서울특별시", "종로구"),
+        ("B 카페", "카페", "서울특별시", "종로구"),
+        ("C 호텔", "숙소", "서울특별시", "종로구"),
+        ("D 공원", "자연", "서울특별시", "종로구"),
+        ("E 미분류", None, "서울특별시", "종로구"),
+        ("F 식당", "맛집", "서울특별시", "중구"),
+        ("G 호텔", "숙소", "서울특별시", "중구"),
+        ("H 캠핑장", "캠핑", "강원특별자치도", "춘천시"),
+        ("I 식당", "맛집", "서울특별시", "종로구"),
+    ]
+    df = pd.DataFrame(rows, columns=["title", "category", "city", "district"])
+    for column in ("category", "city", "district"):
+        df[column] = df[column].astype("category")
+    return df
+
+
+@pytest.mark.parametrize("place_themes, accommodation_theme", [
+    (["맛집", "카페"], "숙소"),
+    (["자연"], "숙소"),
+    ([""], "숙소"),
+    ([], "숙소"),
+    (["캠핑"], "캠핑"),
+])
+def test_select_matches_legacy_filter(small_df, place_themes, accommodation_theme):
+    index = PlaceIndex(small_df)
+    areas = [("서울특별시", "종로구"), ("서울특별시", "중구"), ("강원특별자치도", "춘천시")]
+    for city, district in areas:
+        legacy = _legacy_select(small_df, city, district, place_themes, accommodation_theme)
+        assert _same(legacy, index.select(city, district, place_themes, accommodation_theme)), (city, district)
+
+
+def test_select_keeps_original_row_order(small_df):
+    places, accommodations = PlaceIndex(small_df).select("서울특별시", "종로구", ["맛집", "카페"], "숙소")
+    assert places.tolist() == [0, 1, 8]
+    assert accommodations.tolist() == [2]
+
+
+def test_unknown_area_returns_none(small_df):
+    index = PlaceIndex(small_df)
+    assert index.select("서울특별시", "없는구", ["맛집"], "숙소") is None
+    assert index.select("없는시", "종로구", ["맛집"], "숙소") is None
+
+
+@pytest.mark.parametrize("place_themes, accommodation_theme", [
+    (["맛집", "카페"], "숙소"),
+    ([""], "숙소"),
+    (["캠핑"], "캠핑"),
+])
+def test_select_matches_legacy_filter_on_catalog(catalog, place_themes, accommodation_theme):
+    df = catalog.reset_index(drop=True)
+    index = PlaceIndex(df)
+    areas = df[["city", "district"]].astype(object).dropna().drop_duplicates()
+    for city, district in areas.itertuples(index=False):
+        legacy = _legacy_select(df, city, district, place_themes, accommodation_theme)
+        assert _same(legacy, index.select(city, district, place_themes, accommodation_theme)), (city, district)
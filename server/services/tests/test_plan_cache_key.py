@@ -0,0 +1,64 @@
+import pytest
+from TripPlan_cache import plan_cache_key, BUDGET_BUCKET
+
+
+def _user_info(**overrides):
+    user_info = {
+        "userId": "user-a",
+        "start_loc": "서울특별시",
+        "end_city": "부산광역시",
+        "district": "해운대구",
+        "start_date": "2025-05-01",
+        "end_date": "2025-05-03",
+        "duration": 3,
+        "place_themes": ["맛집", "카페"],
+        "accommodation_theme": "숙소",
+        "budget_per_person": 300000,
+        "total_people": 2,
+        "plan_mode": "llm",
+    }
+    user_info.update(overrides)
+    return user_info
+
+
+def _key(**overrides):
+    return plan_cache_key(_user_info(**overrides))[0]
+
+
+def test_dates_and_user_are_not_part_of_the_key():
+    assert _key() == _key(userId="user-b", start_date="2025-09-10", end_date="2025-09-12", start_loc="대전광역시")
+
+
+def test_themes_are_trimmed_deduplicated_and_sorted():
+    assert _key() == _key(place_themes=[" 카페", "맛집 ", "카페", ""])
+
+
+def test_budget_is_bucketed():
+    low = (300000 // BUDGET_BUCKET) * BUDGET_BUCKET
+    assert _key(budget_per_person=low) == _key(budget_per_person=low + BUDGET_BUCKET - 1)
+    assert _key(budget_per_person=low) != _key(budget_per_person=low + BUDGET_BUCKET)
+
+
+@pytest.mark.parametrize("field, value", [
+    ("district", "수영구"),
+    ("duration", 4),
+    ("total_people", 3),
+    ("plan_mode", "local"),
+    ("accommodation_theme", "캠핑"),
+    ("place_themes", ["맛집"]),
+])
+def test_plan_inputs_change_the_key(field, value):
+    assert _key() != _key(**{field: value})
+
+
+def test_optional_fields_only_count_when_set():
+    assert _key() == _key(buffer_km=0, theme_weights={})
+    assert _key() != _key(buffer_km=2)
+    assert _key(theme_weights={"맛집": 2, "카페": 1}) == _key(theme_weights={"카페": 1.0, "맛집": 2.0})
+
+
+def test_canonical_request_is_returned():
+    _, canonical = plan_cache_key(_user_info(place_themes=["카페", "맛집"]))
+    assert canonical["themes"] == ["맛집", "카페"]
+    assert canonical["budget_bucket"] == 300000 // BUDGET_BUCKET
+    assert "start_date" not in canonical
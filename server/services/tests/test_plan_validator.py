@@ -0,0 +1,141 @@
+import pandas as pd
+import pytest
+from Place_geo import format_coords
+from TripPlan_optimizer import NO_ACCOMMODATION, MAX_PLACES_PER_DAY
+from TripPlan_validate import CandidateMatcher, PlanValidator
+
+PLACES = [
+    ("해운대 해수욕장", 35.1587, 129.1604),
+    ("광안리 해수욕장", 35.1532, 129.1186),
+    ("부산 시립 미술관", 35.1667, 129.1376),
+    ("동백섬 누리마루 APEC하우스", 35.1535, 129.1524),
+    ("해동 용궁사", 35.1884, 129.2233),
+    ("감천 문화마을", 35.0975, 129.0106),
+    ("자갈치 시장", 35.0966, 129.0306),
+    ("태종대 유원지", 35.0533, 129.0855),
+]
+STAYS = [
+    ("해운대 그랜드 호텔", 35.1600, 129.1650),
+    ("광안 비치 호텔", 35.1540, 129.1200),
+]
+
+
+def _frame(rows, category):
+    return pd.DataFrame({
+        "title": [r[0] for r in rows],
+        "category": category,
+        "city": "부산광역시",
+        "district": "해운대구",
+        "y": [r[1] for r in rows],
+        "x": [r[2] for r in rows],
+    })
+
+
+def _item(row, **overrides):
+    item = {"name": row[0], "description": "설명", "coords": format_coords(row[1], row[2]), "estimated_cost": 1000}
+    item.update(overrides)
+    return item
+
+
+def _day(number, places, stay=None):
+    return {"day": number, "places": [_item(PLACES[i]) for i in places],
+            "accommodation": _item(STAYS[stay]) if stay is not None else dict(NO_ACCOMMODATION)}
+
+
+@pytest.fixture
+def validator():
+    return PlanValidator({"duration": 3}, _frame(PLACES, "관광지"), _frame(STAYS, "숙소"))
+
+
+# --- CandidateMatcher ---
+def test_match_exact_ignores_spacing_and_punctuation():
+    matcher = CandidateMatcher(_frame(PLACES, "관광지"))
+    assert matcher.match("해운대해수욕장") == (0, "exact")
+    assert matcher.match(" [광안리] 해수욕장 ") == (1, "exact")
+
+
+def test_match_fuzzy_and_coords():
+    matcher = CandidateMatcher(_frame(PLACES, "관광지"))
+    assert matcher.match("동백섬 누리마루 하우스") == (3, "fuzzy")
+    assert matcher.match("전혀 다른 이름", format_coords(35.0966, 129.0306)) == (6, "coords")
+    assert matcher.match("전혀 다른 이름", "35.5, 129.5") == (None, None)
+    assert matcher.match(None, "없음") == (None, None)
+
+
+# --- PlanValidator ---
+def test_clean_plan_is_unchanged(validator):
+    plan = {"travel_plan": [_day(1, [0, 1], 0), _day(2, [2, 3], 1), _day(3, [4, 5])]}
+    fixed, broken = validator.validate(plan)
+    assert broken == []
+    assert fixed["travel_plan"] == plan["travel_plan"]
+    assert validator.changed_days == set()
+
+
+def test_snaps_names_and_coords_to_candidates(validator):
+    day = _day(1, [0, 1], 0)
+    day["places"][0]["name"] = "동백섬 누리마루 하우스"
+    day["places"][1] = _item(("자갈치", 35.0966, 129.0306), name="엉뚱한 이름")
+    fixed, problems = validator.check_day(day, 1)
+    assert problems == []
+    assert [p["name"] for p in fixed["places"]] == ["동백섬 누리마루 APEC하우스", "자갈치 시장"]
+    assert fixed["places"][0]["coords"] == format_coords(PLACES[3][1], PLACES[3][2])
+    assert validator.changed_days == {1}
+
+
+def test_duplicates_across_days_keep_first(validator):
+    plan = {"travel_plan": [_day(1, [0, 1], 0), _day(2, [1, 2, 3], 1), _day(3, [0, 4])]}
+    fixed, broken = validator.validate(plan)
+    assert [[p["name"] for p in d["places"]] for d in fixed["travel_plan"]] == [
+        ["해운대 해수욕장", "광안리 해수욕장"],
+        ["부산 시립 미술관", "동백섬 누리마루 APEC하우스"],
+        ["해동 용궁사"],
+    ]
+    assert broken == [3]
+    assert validator.stats["duplicate"] == 2
+    assert validator.changed_days == {2, 3}
+
+
+def test_day_counts_are_renumbered_and_trimmed(validator):
+    plan = {"travel_plan": [_day(5, [4, 5]), _day(2, [0, 1], 0), _day(3, [2, 3], 1), _day(9, [6, 7])]}
+    fixed, broken = validator.validate(plan)
+    days = fixed["travel_plan"]
+    assert [d["day"] for d in days] == [1, 2, 3]
+    assert [d["places"][0]["name"] for d in days] == ["해운대 해수욕장", "부산 시립 미술관", "해동 용궁사"]
+    assert broken == []
+    assert days[2]["accommodation"] == NO_ACCOMMODATION
+    assert validator.changed_days == {1, 2, 3}
+
+
+def test_missing_day_is_broken(validator):
+    fixed, broken = validator.validate({"travel_plan": [_day(1, [0, 1], 0), _day(2, [2, 3], 1)]})
+    assert len(fixed["travel_plan"]) == 3
+    assert broken == [3]
+    assert 3 in validator.changed_days
+
+
+def test_places_are_capped_per_day(validator):
+    fixed, problems = validator.check_day(_day(1, [0, 1, 2, 3, 4, 5], 0), 1)
+    assert len(fixed["places"]) == MAX_PLACES_PER_DAY
+    assert problems == []
+    assert validator.changed_days == {1}
+
+
+def test_last_day_stay_is_removed(validator):
+    fixed, problems = validator.check_day(_day(3, [0, 1], 0), 3)
+    assert fixed["accommodation"] == NO_ACCOMMODATION
+    assert problems == []
+    assert validator.changed_days == {3}
+
+
+def test_unknown_stay_breaks_the_day(validator):
+    day = _day(1, [0, 1])
+    day["accommodation"] = _item(("없는 호텔", 36.0, 128.0))
+    _, problems = validator.check_day(day, 1)
+    assert any("숙소" in p for p in problems)
+
+
+def test_fill_missing_accommodation_uses_nearest_stay(validator):
+    day = {"day": 1, "places": [_item(PLACES[1]), _item(PLACES[3])], "accommodation": dict(NO_ACCOMMODATION)}
+    validator.fill_missing_accommodation(day)
+    assert day["accommodation"]["name"] == "광안 비치 호텔"
+    assert validator.changed_days == {1}
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from Place_geo import haversine_km
+from Place_spatial import SpatialIndex
+
+N_POINTS = 3000
+N_QUERIES = 40
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(42)
+    # 서울 도심에 몰린 점 + 전국에 흩어진 점 + 좌표 없는/범위 밖 점
+    dense = np.column_stack((rng.uniform(37.45, 37.65, N_POINTS), rng.uniform(126.85, 127.15, N_POINTS)))
+    sparse = np.column_stack((rng.uniform(33.2, 38.5, 300), rng.uniform(124.6, 131.8, 300)))
+    invalid = np.array([[np.nan, np.nan], [0.0, 0.0], [51.5, -0.1]])
+    lat_lng = np.vstack((dense, sparse, invalid))
+    categories = np.array(["맛집", "카페", "숙소", "자연"])[rng.integers(0, 4, len(lat_lng))]
+    return pd.DataFrame({
+        "y": lat_lng[:, 0],
+        "x": lat_lng[:, 1],
+        "category": pd.Categorical(categories),
+    })
+
+
+@pytest.fixture(scope="module")
+def index(points):
+    return SpatialIndex(points)
+
+
+@pytest.fixture(scope="module")
+def queries(points):
+    rng = np.random.default_rng(7)
+    picked = points.iloc[rng.integers(0, N_POINTS + 300, N_QUERIES)]
+    return list(zip(picked["y"].tolist(), picked["x"].tolist()))
+
+
+def _brute_distances(points, lat, lng, codes=None):
+    dist = haversine_km(lat, lng, points["y"].to_numpy(), points["x"].to_numpy())
+    dist = np.where(np.isnan(dist), np.inf, dist)
+    if codes is not None:
+        dist = np.where(np.isin(points["category"].cat.codes.to_numpy(), list(codes)), dist, np.inf)
+    return dist
+
+
+def test_invalid_coordinates_are_not_indexed(points, index):
+    assert len(index) == N_POINTS + 300
+
+
+@pytest.mark.parametrize("km", [0.5, 3.0, 25.0])
+def test_radius_matches_brute_force(points, index, queries, km):
+    for lat, lng in queries:
+        dist = _brute_distances(points, lat, lng)
+        expected = np.flatnonzero(dist <= km)
+        found, found_dist = index.radius(lat, lng, km)
+        assert sorted(found.tolist()) == expected.tolist()
+        assert np.all(np.diff(found_dist) >= 0)
+
+
+@pytest.mark.parametrize("k", [1, 10, 50])
+def test_nearest_matches_brute_force(points, index, queries, k):
+    for lat, lng in queries:
+        dist = _brute_distances(points, lat, lng)
+        found, found_dist = index.nearest(lat, lng, k=k)
+        assert len(found) == k
+        assert np.allclose(found_dist, np.sort(dist)[:k])
+        assert np.allclose(dist[found], found_dist)
+
+
+def test_nearest_with_category_and_max_km(points, index, queries):
+    codes = {1, 3}
+    for lat, lng in queries:
+        dist = _brute_distances(points, lat, lng, codes)
+        found, found_dist = index.nearest(lat, lng, k=5, category_codes=codes, max_km=2.0)
+        expected = np.sort(dist[dist <= 2.0])[:5]
+        assert np.allclose(found_dist, expected)
+        assert set(points["category"].cat.codes.to_numpy()[found].tolist()) <= codes
+
+
+def test_nearest_far_from_everything(index):
+    # 독도 부근: 가장 가까운 점도 격자 블록 여러 칸 밖
+    found, found_dist = index.nearest(37.24, 131.87, k=3)
+    assert len(found) == 3
+    assert np.all(found_dist > 0)
+
+
+def test_buffer_matches_brute_force(points, index):
+    source = np.arange(0, 200, 7)
+    km = 1.5
+    lat, lng = points["y"].to_numpy(), points["x"].to_numpy()
+    near = np.zeros(len(points), dtype=bool)
+    for p in source:
+        near |= np.nan_to_num(haversine_km(lat[p], lng[p], lat, lng), nan=np.inf) <= km
+    assert index.buffer(source, km).tolist() == np.flatnonzero(near).tolist()
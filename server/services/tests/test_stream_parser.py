@@ -0,0 +1,57 @@
+import json
+import pytest
+from TripPlan_stream import TravelPlanStreamParser
+
+PLAN = {
+    "title": "부산 {2}일 [여행]",
+    "description": "따옴표 \"와 역슬래시 \\ 가 든 설명",
+    "travel_plan": [
+        {
+            "day": 1,
+            "places": [
+                {"name": "해운대 {해변}", "description": "]] 닫는 괄호", "coords": "35.1587, 129.1604", "estimated_cost": 0},
+                {"name": "카페 \"바다\"", "description": "{\"중첩\": [1, 2]}", "coords": "35.16, 129.16", "estimated_cost": 8000},
+            ],
+            "accommodation": {"name": "호텔 A", "description": "", "coords": "35.15, 129.15", "estimated_cost": 100000},
+        },
+        {
+            "day": 2,
+            "places": [{"name": "광안리", "description": "밤바다", "coords": "35.153, 129.118", "estimated_cost": 0}],
+            "accommodation": {"name": "없음", "description": "", "coords": "없음", "estimated_cost": 0},
+        },
+    ],
+    "extra": [{"day": 99}],
+}
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 10_000])
+def test_days_come_out_whole_for_any_chunking(size):
+    text = json.dumps(PLAN, ensure_ascii=False, indent=2)
+    parser = TravelPlanStreamParser()
+    days = [day for chunk in _chunks(text, size) for day in parser.feed(chunk)]
+    assert days == PLAN["travel_plan"]
+    assert json.loads(parser.full_text()) == PLAN
+
+
+def test_day_is_returned_as_soon_as_it_closes():
+    text = json.dumps(PLAN, ensure_ascii=False)
+    first_day_end = text.index('"day": 2') - 1
+    parser = TravelPlanStreamParser()
+    assert [day["day"] for day in parser.feed(text[:first_day_end])] == [1]
+    assert [day["day"] for day in parser.feed(text[first_day_end:])] == [2]
+
+
+def test_arrays_outside_travel_plan_are_ignored():
+    text = json.dumps({"extra": [{"day": 0}], "travel_plan": [{"day": 1}], "more": [{"day": 9}]})
+    parser = TravelPlanStreamParser()
+    assert [day for chunk in _chunks(text, 3) for day in parser.feed(chunk)] == [{"day": 1}]
+
+
+def test_unfinished_day_is_not_returned():
+    text = json.dumps(PLAN, ensure_ascii=False)
+    parser = TravelPlanStreamParser()
+    assert parser.feed(text[:text.index('"day": 2') + 20]) == [PLAN["travel_plan"][0]]
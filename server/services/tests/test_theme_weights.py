@@ -0,0 +1,35 @@
+import pytest
+from Place_themes import ThemeResolver, parse_theme_weights
+
+
+@pytest.fixture
+def resolver():
+    return ThemeResolver()
+
+
+def test_plain_themes_have_no_weights(resolver):
+    assert parse_theme_weights("맛집,카페", resolver) == (["맛집", "카페"], {})
+
+
+def test_weights_are_keyed_by_canonical_label(resolver):
+    themes, weights = parse_theme_weights("음식:2, 자연", resolver)
+    assert themes == ["음식", "자연"]
+    assert weights == {"맛집": 2.0, "자연": 1.0}
+
+
+def test_unknown_theme_keeps_its_own_name(resolver):
+    assert parse_theme_weights("야경:3,카페", resolver)[1] == {"야경": 3.0, "카페": 1.0}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("맛집:abc,자연:2", {"맛집": 1.0, "자연": 2.0}),   # 숫자가 아니면 1
+    ("맛집:-1,자연:2", {"맛집": 0.0, "자연": 2.0}),    # 음수는 0
+    ("맛집: 1.5 ,자연", {"맛집": 1.5, "자연": 1.0}),
+])
+def test_bad_or_spaced_weights(resolver, text, expected):
+    assert parse_theme_weights(text, resolver)[1] == expected
+
+
+def test_empty_input_matches_old_request_format(resolver):
+    # 테마를 고르지 않은 요청은 예전처럼 [''] (필터 없음)
+    assert parse_theme_weights("", resolver) == ([""], {})